@@ -1,9 +1,10 @@
-from typing import Annotated
+from typing import Annotated, List
 from fastapi import APIRouter, Depends, HTTPException, status
-from services.auth_service.app.services.auth_service import authenticate_user, get_user_from_token, create_new_user, get_user, get_user_by_id
-from services.auth_service.app.schemas import CreateUserRequest, LoginForm, Token, User, RegisterForm, RefreshTokenRequest
+from services.auth_service.app.services.auth_service import authenticate_user, get_user_from_token, create_new_user, get_user, get_user_by_id, get_users_by_ids
+from services.auth_service.app.schemas import CreateUserRequest, LoginForm, Token, User, RegisterForm, RefreshTokenRequest, UserBatchRequest
 from services.auth_service.app.utils import create_access_token, create_refresh_token, verify_token
-from services.auth_service.app.dependencies import db_depends
+from services.shared.edu_shared.dependencies import db_depends, read_db_depends
+from services.auth_service.app.services.password_hasher import password_hasher
 from uuid import UUID
 
 router = APIRouter(tags=["auth"])
@@ -53,7 +54,7 @@ async def get_profile(current_user : Annotated[User, Depends(get_user_from_token
     return current_user
 
 @router.get("/user/{user_id}", response_model=User, status_code=status.HTTP_200_OK)
-async def get_user_by_id_endpoint(user_id: UUID, db: db_depends):
+async def get_user_by_id_endpoint(user_id: UUID, db: read_db_depends):
     """Get user by ID"""
     user = await get_user_by_id(db, user_id)
     
@@ -62,6 +63,16 @@ async def get_user_by_id_endpoint(user_id: UUID, db: db_depends):
     
     return user
 
+@router.post("/users/batch", response_model=List[User], status_code=status.HTTP_200_OK)
+async def get_users_batch(request: UserBatchRequest, db: read_db_depends):
+    """Get users by IDs in one query, unknown IDs are skipped"""
+    return await get_users_by_ids(db, request.ids)
+
+@router.get("/metrics/password-hasher", status_code=status.HTTP_200_OK)
+async def get_password_hasher_metrics():
+    """Queue depth, rejections, queue wait and bcrypt latency of the password hasher pool"""
+    return password_hasher.stats()
+
 @router.post("/refresh", response_model=Token, status_code=status.HTTP_200_OK)
 async def refresh_token(request: RefreshTokenRequest):
     try:
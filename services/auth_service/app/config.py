@@ -1,14 +1,23 @@
 from pathlib import Path
-from pydantic_settings import BaseSettings
+from services.shared.edu_shared.db import DatabaseSettings
+from services.shared.edu_shared.log import LoggingSettings
 
 
-class Settings(BaseSettings):
+class Settings(DatabaseSettings, LoggingSettings):
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
-    DATABASE_URL : str
     FRONTEND_URL: str
+    REDIS_URL: str = "redis://redis:6379"
+
+    # Кэш пользователей в Redis (несуществующие id - с коротким TTL)
+    USER_CACHE_TTL_SECONDS: int = 300
+    USER_CACHE_NEGATIVE_TTL_SECONDS: int = 30
+
+    # bcrypt в пуле процессов: число процессов и предел ожидающих операций (сверх - 503)
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 64
     
     class Config:
         env_file = Path.cwd() / ".env" 
@@ -1,9 +1,27 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from services.auth_service.app.api.auth_router import router as auth_router
 from services.auth_service.app.config import settings
+from services.auth_service.app.db import database, redis_client
+from services.auth_service.app.services.password_hasher import password_hasher, PasswordHasherOverloaded
+from services.shared.edu_shared.log import RequestIdMiddleware, configure_logging
+from services.shared.edu_shared.metrics import CallbackMetric, install_metrics, register
 
-app = FastAPI(summary="Authentication Service")
+configure_logging(settings, "auth-service")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    password_hasher.start()
+    yield
+    await password_hasher.stop()
+    await database.dispose()
+
+
+app = FastAPI(summary="Authentication Service", lifespan=lifespan)
+app.state.database = database
 
 # CORS middleware
 app.add_middleware(
@@ -14,4 +32,27 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-app.include_router(auth_router, prefix="/auth")
\ No newline at end of file
+# Латентность, SQL/Redis на запрос: /metrics и заголовок Server-Timing
+install_metrics(app, database, redis_clients=[redis_client])
+register(CallbackMetric(
+    "password_hash_pending", "Password hash operations queued or running", (),
+    lambda: {(): password_hasher.stats()["pending"]},
+))
+register(CallbackMetric(
+    "password_hash_rejected_total", "Password hash operations rejected as overloaded", (),
+    lambda: {(): password_hasher.stats()["rejected"]}, kind="counter",
+))
+app.add_middleware(RequestIdMiddleware)
+
+
+@app.exception_handler(PasswordHasherOverloaded)
+async def password_hasher_overloaded_handler(request: Request, exc: PasswordHasherOverloaded):
+    # Быстрый отказ вместо очереди до таймаута: клиент повторит вход позже
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Too many login attempts in progress, try again later"},
+        headers={"Retry-After": "1"},
+    )
+
+
+app.include_router(auth_router, prefix="/auth")
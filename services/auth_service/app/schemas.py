@@ -1,3 +1,4 @@
+from typing import List
 from pydantic import BaseModel, EmailStr, Field
 from uuid import UUID
 
@@ -41,4 +42,7 @@ class CreateUserRequest(BaseModel):
         from_attributes = True
 
 class RefreshTokenRequest(BaseModel):
-    refresh_token: str
\ No newline at end of file
+    refresh_token: str
+
+class UserBatchRequest(BaseModel):
+    ids: List[UUID] = Field(..., max_length=500)
@@ -1,11 +1,17 @@
-from sqlalchemy import select
+from typing import Dict, List
+from uuid import UUID
+from sqlalchemy import select, any_, bindparam
+from sqlalchemy.dialects.postgresql import ARRAY, UUID as PG_UUID
 from services.auth_service.app.schemas import CreateUserRequest, User, UserInDB
-from services.auth_service.app.utils import get_password_hash, verify_password
+from services.auth_service.app.services.password_hasher import password_hasher
+from services.auth_service.app.services.user_cache import get_cached_users, cache_users, invalidate_user
 from jose import jwt
 from services.auth_service.app.config import settings
 from sqlalchemy.ext.asyncio import AsyncSession
 from services.auth_service.app.models import User as Users
-from services.auth_service.app.dependencies import  token_depends, db_depends
+from services.auth_service.app.db import database, new_session
+from services.auth_service.app.dependencies import token_depends
+from services.shared.edu_shared.dependencies import read_db_depends
 
 async def get_user(db : AsyncSession, email: str) -> UserInDB:
     query = select(Users).where(Users.email == email)
@@ -21,22 +27,56 @@ async def authenticate_user(db : AsyncSession, email: str, password: str) -> boo
     user = await get_user(db, email)
     if not user:
         return False
-    if not verify_password(password, user.hashed_password):
+    if not await password_hasher.verify(password, user.hashed_password):
         return False
     return user
 
 
-async def get_user_by_id(db : AsyncSession, user_id: int) -> UserInDB:
-    query = select(Users).where(Users.id == user_id)
+async def get_user_by_id(db : AsyncSession, user_id: UUID | str) -> User | None:
+    users = await get_users_by_ids(db, [user_id])
+    return users[0] if users else None
+
+
+async def _select_users(db : AsyncSession, user_ids: List[UUID]) -> Dict[UUID, User]:
+    # Один параметр-массив вместо IN (...) на каждый id: один план на любой размер пачки
+    query = select(Users).where(
+        Users.id == any_(bindparam("ids", user_ids, type_=ARRAY(PG_UUID(as_uuid=True))))
+    )
     result = await db.execute(query)
-    user = result.scalars().first()
+    return {user.id: User.model_validate(user) for user in result.scalars()}
 
-    if user is None:
-        return None
-    return UserInDB.model_validate(user)
+
+async def get_users_by_ids(db : AsyncSession, user_ids: List[UUID | str]) -> List[User]:
+    try:
+        user_ids = list(dict.fromkeys(UUID(str(user_id)) for user_id in user_ids))
+    except ValueError:
+        return []
+    if not user_ids:
+        return []
+
+    # Сначала кэш, в базу одним запросом идут только промахи
+    cached = await get_cached_users(user_ids)
+    missing = [user_id for user_id in user_ids if user_id not in cached]
+    found: Dict[UUID, User] = {}
+    if missing:
+        found = await _select_users(db, missing)
+        not_found = [user_id for user_id in missing if user_id not in found]
+        if not_found and database.is_replica(db):
+            # Только что созданный пользователь мог ещё не дойти до реплики:
+            # отсутствие, которое попадёт в кэш, проверяем на primary
+            async with new_session() as primary:
+                found.update(await _select_users(primary, not_found))
+        await cache_users(list(found.values()), [user_id for user_id in missing if user_id not in found])
+
+    users = []
+    for user_id in user_ids:
+        user = cached.get(user_id) or found.get(user_id)
+        if user is not None:
+            users.append(user)
+    return users
 
 
-async def get_user_from_token(db : db_depends, token: token_depends) -> User | None:
+async def get_user_from_token(db : read_db_depends, token: token_depends) -> User | None:
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         user_id: str = payload.get("sub")
@@ -50,10 +90,12 @@ async def get_user_from_token(db : db_depends, token: token_depends) -> User | N
 async def create_new_user(request : CreateUserRequest, db : AsyncSession) -> User:
     new_user = Users(
         email=request.email,
-        hashed_password=get_password_hash(request.password)
+        hashed_password=await password_hasher.hash(request.password)
     )
     db.add(new_user)
     await db.commit()
     await db.refresh(new_user)
+    # id мог попасть в кэш как несуществующий
+    await invalidate_user(new_user.id)
 
     return User.model_validate(new_user)
\ No newline at end of file
@@ -0,0 +1,114 @@
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from services.auth_service.app.config import settings
+from services.auth_service.app.utils import get_password_hash, verify_password
+
+
+class PasswordHasherOverloaded(Exception):
+    """Очередь на хэширование заполнена, запрос нужно отклонить"""
+
+
+def _timed(func: Callable[..., Any], *args: Any) -> Tuple[Any, float]:
+    # Выполняется в процессе пула: время самого bcrypt без ожидания в очереди
+    started = time.perf_counter()
+    return func(*args), time.perf_counter() - started
+
+
+class _Timing:
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def as_dict(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "avg_ms": round(self.total / self.count * 1000, 2) if self.count else 0.0,
+            "max_ms": round(self.max * 1000, 2),
+        }
+
+
+class PasswordHasher:
+    """
+    bcrypt в отдельных процессах, чтобы хэширование не блокировало event loop.
+
+    Пул ограничен max_workers процессами, а число ожидающих и выполняемых
+    операций - max_pending: сверх этого запрос сразу получает
+    PasswordHasherOverloaded (503), а не копится в очереди до таймаута.
+    """
+
+    def __init__(self, max_workers: int, max_pending: int):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pending = 0
+        self.rejected = 0
+        self.queue_wait = _Timing()
+        self.hash_time = _Timing()
+
+    def _executor(self) -> ProcessPoolExecutor:
+        # Создаётся в lifespan, но вне приложения поднимется при первом вызове
+        if self._pool is None:
+            # spawn, а не fork: форк процесса с запущенным event loop и потоками небезопасен
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._pool
+
+    def start(self) -> None:
+        self._executor()
+
+    async def stop(self) -> None:
+        if self._pool is not None:
+            pool, self._pool = self._pool, None
+            # Ждём текущие хэши в потоке: shutdown(wait=True) блокировал бы event loop
+            await asyncio.to_thread(pool.shutdown, cancel_futures=True)
+
+    async def _run(self, func: Callable[..., Any], *args: Any) -> Any:
+        if self._pending >= self.max_pending:
+            self.rejected += 1
+            raise PasswordHasherOverloaded()
+
+        self._pending += 1
+        started = time.perf_counter()
+        try:
+            result, elapsed = await asyncio.get_running_loop().run_in_executor(
+                self._executor(), _timed, func, *args
+            )
+        finally:
+            self._pending -= 1
+        self.hash_time.observe(elapsed)
+        self.queue_wait.observe(max(0.0, time.perf_counter() - started - elapsed))
+        return result
+
+    async def hash(self, password: str) -> str:
+        return await self._run(get_password_hash, password)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        return await self._run(verify_password, password, hashed_password)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "pending": self._pending,
+            "rejected": self.rejected,
+            "queue_wait": self.queue_wait.as_dict(),
+            "hash_time": self.hash_time.as_dict(),
+        }
+
+
+password_hasher = PasswordHasher(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+)
@@ -0,0 +1,62 @@
+import logging
+from typing import Dict, Iterable, List, Optional
+from uuid import UUID
+
+from redis.exceptions import RedisError
+
+from services.auth_service.app.config import settings
+from services.auth_service.app.db import redis_client
+from services.auth_service.app.schemas import User
+
+logger = logging.getLogger(__name__)
+
+# Пустая строка в кэше - пользователя с таким id нет
+_MISSING = ""
+
+
+def _key(user_id: UUID) -> str:
+    return f"auth:user:{user_id}"
+
+
+async def get_cached_users(user_ids: Iterable[UUID]) -> Dict[UUID, Optional[User]]:
+    """
+    Пользователи из кэша одним MGET: None - известно, что пользователя нет.
+    Id, которых нет в результате, надо читать из базы.
+    """
+    user_ids = list(user_ids)
+    if not user_ids:
+        return {}
+    try:
+        values = await redis_client.mget([_key(user_id) for user_id in user_ids])
+    except RedisError as e:
+        # Кэш недоступен - читаем всё из базы
+        logger.warning("User cache read failed: %s", e)
+        return {}
+
+    result: Dict[UUID, Optional[User]] = {}
+    for user_id, value in zip(user_ids, values):
+        if value is None:
+            continue
+        result[user_id] = User.model_validate_json(value) if value != _MISSING else None
+    return result
+
+
+async def cache_users(users: List[User], missing_ids: Iterable[UUID] = ()) -> None:
+    """Кладёт найденных пользователей и отсутствующие id в кэш одним пайплайном"""
+    try:
+        async with redis_client.pipeline(transaction=False) as pipe:
+            for user in users:
+                pipe.set(_key(user.id), user.model_dump_json(), ex=settings.USER_CACHE_TTL_SECONDS)
+            for user_id in missing_ids:
+                pipe.set(_key(user_id), _MISSING, ex=settings.USER_CACHE_NEGATIVE_TTL_SECONDS)
+            await pipe.execute()
+    except RedisError as e:
+        logger.warning("User cache write failed: %s", e)
+
+
+async def invalidate_user(user_id: UUID) -> None:
+    """Сбрасывает запись пользователя, в том числе отрицательную, после изменения в базе"""
+    try:
+        await redis_client.delete(_key(user_id))
+    except RedisError as e:
+        logger.warning("User cache invalidation failed for %s: %s", user_id, e)
@@ -0,0 +1,38 @@
+"""
+Сравнение двух отчётов services.loadtest.cli.run.
+
+    python -m services.loadtest.cli.compare baseline.json current.json --tolerance 0.1
+
+Печатает регрессии по эндпоинтам (p95/p99, пропускная способность, доля
+ошибок) и завершается с кодом 1, если они есть.
+"""
+import argparse
+import json
+import sys
+
+from services.loadtest.report import compare_reports
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Compare two load test reports")
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="Allowed relative change, 0.1 = 10%%")
+    parser.add_argument("--min-count", type=int, default=20, help="Skip endpoints with fewer requests")
+    args = parser.parse_args()
+
+    with open(args.baseline, encoding="utf-8") as source:
+        baseline = json.load(source)
+    with open(args.current, encoding="utf-8") as source:
+        current = json.load(source)
+
+    regressions = compare_reports(baseline, current, args.tolerance, args.min_count)
+    for regression in regressions:
+        print(regression)
+    if not regressions:
+        print("No regressions")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,69 @@
+"""
+Синтетические данные для нагрузочного теста: пользователи, квизы с вопросами,
+ответами и тегами, попытки и рейтинг в Redis. Пишется через COPY.
+
+    python -m services.loadtest.cli.generate --truncate --users 20000 --quizzes 300000
+
+--truncate очищает таблицы auth, results и quiz и ключи рейтинга целиком, не
+только прошлые данные генератора: запускайте только на отдельной базе. Манифест
+для services.loadtest.cli.run пишется в --manifest, отчёт печатается в stdout как JSON.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+from dataclasses import asdict
+
+from services.loadtest.generator import DatasetSpec, generate, save_manifest
+
+
+def main() -> int:
+    defaults = DatasetSpec()
+    parser = argparse.ArgumentParser(description="Generate synthetic data for load tests")
+    parser.add_argument("--database-url", default=os.environ.get("DATABASE_URL"), help="Defaults to DATABASE_URL")
+    parser.add_argument("--redis-url", default=os.environ.get("REDIS_URL", "redis://localhost:6379"))
+    parser.add_argument("--truncate", action="store_true", help="Wipe ALL service tables and leaderboard keys first")
+    parser.add_argument("--manifest", default="loadtest-manifest.json", help="Where to write the manifest for the runner")
+    parser.add_argument("--users", type=int, default=defaults.users)
+    parser.add_argument("--quizzes", type=int, default=defaults.quizzes)
+    parser.add_argument("--min-questions", type=int, default=defaults.min_questions)
+    parser.add_argument("--max-questions", type=int, default=defaults.max_questions)
+    parser.add_argument("--answers-per-question", type=int, default=defaults.answers_per_question)
+    parser.add_argument("--tags", type=int, default=defaults.tags)
+    parser.add_argument("--attempts", type=int, default=defaults.attempts)
+    parser.add_argument("--skew", type=float, default=defaults.skew, help="Popularity skew, 1 is uniform")
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--batch-size", type=int, default=defaults.batch_size, help="Rows per COPY")
+    args = parser.parse_args()
+
+    if not args.database_url:
+        parser.error("--database-url or DATABASE_URL is required")
+    if args.answers_per_question < 2 or args.min_questions < 1 or args.min_questions > args.max_questions:
+        parser.error("Need at least 2 answers per question and 1 <= --min-questions <= --max-questions")
+
+    spec = DatasetSpec(
+        users=args.users,
+        quizzes=args.quizzes,
+        min_questions=args.min_questions,
+        max_questions=args.max_questions,
+        answers_per_question=args.answers_per_question,
+        tags=args.tags,
+        attempts=args.attempts,
+        skew=args.skew,
+        seed=args.seed,
+        batch_size=args.batch_size,
+    )
+    try:
+        report, manifest = asyncio.run(generate(args.database_url, args.redis_url, spec, args.truncate))
+    except RuntimeError as e:
+        print(e, file=sys.stderr)
+        return 1
+
+    save_manifest(args.manifest, manifest, report)
+    print(json.dumps(asdict(report), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+"""
+Смешанная нагрузка на auth, quiz и results service по манифесту генератора.
+
+    python -m services.loadtest.cli.run --manifest loadtest-manifest.json \\
+        --users 50 --duration 120 --output run.json
+
+Сценарии и их доли задаются --mix (browse=25,search=20,...). Отчёт - JSON
+с пропускной способностью и p50/p95/p99 по эндпоинтам - пишется в --output
+или в stdout; сравнить два прогона: services.loadtest.cli.compare.
+"""
+import argparse
+import asyncio
+import json
+import sys
+from datetime import datetime, timezone
+from typing import Dict
+
+from services.loadtest.generator import load_manifest
+from services.loadtest.workload import DEFAULT_MIX, LoadConfig, Targets, run_load
+
+
+def parse_mix(value: str) -> Dict[str, int]:
+    mix = {}
+    for item in value.split(","):
+        name, _, weight = item.partition("=")
+        try:
+            mix[name.strip()] = int(weight)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"Expected scenario=weight, got {item!r}")
+    return mix
+
+
+def main() -> int:
+    targets = Targets()
+    defaults = LoadConfig()
+    parser = argparse.ArgumentParser(description="Drive a mixed workload against the running services")
+    parser.add_argument("--manifest", default="loadtest-manifest.json", help="Written by services.loadtest.cli.generate")
+    parser.add_argument("--auth-url", default=targets.auth_url)
+    parser.add_argument("--quiz-url", default=targets.quiz_url)
+    parser.add_argument("--results-url", default=targets.results_url)
+    parser.add_argument("--users", type=int, default=defaults.virtual_users, help="Concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=defaults.duration_seconds, help="Measured seconds")
+    parser.add_argument("--warmup", type=float, default=defaults.warmup_seconds, help="Unmeasured seconds first")
+    parser.add_argument("--think", type=float, default=defaults.think_seconds, help="Mean pause between scenarios, s")
+    parser.add_argument(
+        "--mix", type=parse_mix, default=DEFAULT_MIX,
+        help="Scenario weights: " + ",".join(f"{name}={weight}" for name, weight in DEFAULT_MIX.items()),
+    )
+    parser.add_argument("--login-burst-size", type=int, default=defaults.login_burst_size, help="0 disables bursts")
+    parser.add_argument("--login-burst-interval", type=float, default=defaults.login_burst_interval_seconds)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--output", help="Report file, stdout if omitted")
+    args = parser.parse_args()
+
+    config = LoadConfig(
+        virtual_users=args.users,
+        duration_seconds=args.duration,
+        warmup_seconds=args.warmup,
+        think_seconds=args.think,
+        mix=args.mix,
+        login_burst_size=args.login_burst_size,
+        login_burst_interval_seconds=args.login_burst_interval,
+        seed=args.seed,
+    )
+    started_at = datetime.now(timezone.utc).isoformat()
+    try:
+        report = asyncio.run(run_load(
+            Targets(args.auth_url, args.quiz_url, args.results_url), load_manifest(args.manifest), config
+        ))
+    except (RuntimeError, ValueError) as e:
+        print(e, file=sys.stderr)
+        return 1
+
+    output = json.dumps({"started_at": started_at, **report}, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as target:
+            target.write(output + "\n")
+    else:
+        print(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
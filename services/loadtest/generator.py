@@ -0,0 +1,348 @@
+import json
+import random
+import time
+from collections import defaultdict
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from uuid import UUID
+
+import asyncpg
+from passlib.context import CryptContext
+from sqlalchemy.engine import make_url
+
+# Пользователи нагрузочного теста узнаются по домену почты, пароль у всех общий
+EMAIL_DOMAIN = "loadtest.example.com"
+DEFAULT_PASSWORD = "loadtest-password"
+
+# Ключи рейтинга те же, что у LeaderboardService (quiz service здесь не импортируем:
+# его настройки требуют полного окружения сервиса)
+LEADERBOARD_KEY = "quiz_leaderboard"
+USER_DATA_KEY = "user_data"
+LEADERBOARD_DAILY_TTL_DAYS = 35
+LEADERBOARD_QUIZ_TTL_DAYS = 90
+
+# Слова для заголовков и описаний: русские и английские, как и контент платформы
+WORDS = (
+    "история", "математика", "физика", "химия", "биология", "география", "литература",
+    "алгебра", "геометрия", "программирование", "космос", "музыка", "искусство", "экономика",
+    "философия", "грамматика", "животные", "растения", "океан", "вулканы", "революция",
+    "империя", "уравнения", "функции", "вероятность", "статистика", "молекулы", "клетка",
+    "history", "math", "physics", "chemistry", "biology", "geography", "literature",
+    "algebra", "geometry", "python", "javascript", "databases", "networks", "algorithms",
+    "space", "music", "art", "economics", "philosophy", "grammar", "animals", "plants",
+    "ocean", "volcanoes", "revolution", "empire", "equations", "functions", "probability",
+    "statistics", "molecules", "cells", "sql", "linux", "cinema", "football", "chess",
+)
+DESCRIPTION_WORDS = (
+    "basic", "advanced", "quick", "practice", "review", "exam", "questions", "about", "the",
+    "and", "for", "beginners", "students", "school", "university", "level", "topics",
+    "основы", "вопросы", "для", "начинающих", "студентов", "повторение", "экзамен", "тема",
+)
+QUESTION_TYPES = (("SINGLE_CHOICE", 0.6), ("MULTIPLE_CHOICE", 0.3), ("TEXT_ANSWER", 0.1))
+
+
+def user_email(index: int) -> str:
+    return f"user{index}@{EMAIL_DOMAIN}"
+
+
+def asyncpg_dsn(url: str) -> str:
+    """DATABASE_URL сервисов (postgresql+asyncpg://...) в DSN для asyncpg"""
+    return make_url(url).set(drivername="postgresql").render_as_string(hide_password=False)
+
+
+@dataclass
+class DatasetSpec:
+    users: int = 10_000
+    quizzes: int = 200_000
+    min_questions: int = 3
+    max_questions: int = 10
+    answers_per_question: int = 4
+    tags: int = 300
+    max_tags_per_quiz: int = 3
+    attempts: int = 500_000
+    # Даты квизов и попыток равномерно за последние days дней
+    days: int = 365
+    # Популярность авторов, тегов и квизов: индекс = n * random() ** skew, 1 - равномерно
+    skew: float = 2.5
+    seed: int = 42
+    batch_size: int = 5_000
+    password: str = DEFAULT_PASSWORD
+    # Квизов в манифесте для нагрузки, в порядке популярности
+    manifest_quizzes: int = 10_000
+
+
+@dataclass
+class GenerationReport:
+    users: int = 0
+    tags: int = 0
+    quizzes: int = 0
+    questions: int = 0
+    answers: int = 0
+    attempts: int = 0
+    leaderboard_members: int = 0
+    seconds: Dict[str, float] = field(default_factory=dict)
+
+
+class SyntheticDataGenerator:
+    """
+    Детерминированный набор данных для нагрузочного теста.
+
+    Строки пишутся в базу через COPY (copy_records_to_table) пачками по
+    batch_size, без ORM и без загрузки всего набора в память: квизы,
+    теги квизов, вопросы и ответы - по пачке квизов за раз. Попытки в
+    quiz_result согласованы с рейтингом в Redis: общий, дневные и
+    квизовые ZSET собираются из тех же баллов, так что rebuild_leaderboard
+    --reconcile ничего не исправит. Один и тот же seed даёт одни и те же данные.
+    """
+
+    def __init__(self, conn: asyncpg.Connection, redis, spec: DatasetSpec):
+        self.conn = conn
+        self.redis = redis
+        self.spec = spec
+        self.rng = random.Random(spec.seed)
+        self.now = datetime.now(timezone.utc).replace(tzinfo=None)
+        self.report = GenerationReport()
+        self.user_ids: List[UUID] = []
+        self.tag_names: List[str] = []
+        # Квизы в порядке популярности: (id, число вопросов, сумма баллов)
+        self.quizzes: List[Tuple[UUID, int, int]] = []
+
+    def _uuid(self) -> UUID:
+        return UUID(int=self.rng.getrandbits(128), version=4)
+
+    def _popular(self, n: int) -> int:
+        """Индекс из range(n) со смещением к началу: популярные авторы, теги и квизы"""
+        return min(int(n * self.rng.random() ** self.spec.skew), n - 1)
+
+    def _timestamp(self) -> datetime:
+        return self.now - timedelta(seconds=self.rng.uniform(0, self.spec.days * 86400))
+
+    async def _timed(self, stage: str, coro) -> Any:
+        started = time.perf_counter()
+        result = await coro
+        self.report.seconds[stage] = round(time.perf_counter() - started, 3)
+        return result
+
+    async def _copy(self, schema: str, table: str, columns: List[str], records: List[tuple]) -> None:
+        if records:
+            await self.conn.copy_records_to_table(table, schema_name=schema, columns=columns, records=records)
+
+    async def check_empty(self) -> None:
+        exists = await self.conn.fetchval(
+            "SELECT EXISTS (SELECT 1 FROM auth.users WHERE email LIKE $1)", f"%@{EMAIL_DOMAIN}"
+        )
+        if exists:
+            raise RuntimeError("Load test data already exists, run the generator with --truncate to replace it")
+
+    async def truncate(self) -> None:
+        """Удаляет ВСЕ данные сервисов и рейтинг, а не только сгенерированные"""
+        await self.conn.execute(
+            "TRUNCATE auth.users, results.results, quiz.quiz_result, quiz.quiz_tag_association, "
+            "quiz.answer, quiz.question, quiz.tag, quiz.quiz CASCADE"
+        )
+        keys = [key async for key in self.redis.scan_iter(match=f"{LEADERBOARD_KEY}*")]
+        await self.redis.unlink(USER_DATA_KEY, *keys)
+
+    async def _copy_users(self) -> None:
+        # bcrypt считается один раз: хэш одинаковый у всех, проверка при логине - полной стоимости
+        hashed_password = CryptContext(schemes=["bcrypt"]).hash(self.spec.password)
+        self.user_ids = [self._uuid() for _ in range(self.spec.users)]
+        for start in range(0, self.spec.users, self.spec.batch_size):
+            await self._copy("auth", "users", ["id", "email", "hashed_password"], [
+                (user_id, user_email(start + offset), hashed_password)
+                for offset, user_id in enumerate(self.user_ids[start:start + self.spec.batch_size])
+            ])
+        # Одна запись results на пользователя: GET /results/result без неё отвечает ошибкой
+        for start in range(0, self.spec.users, self.spec.batch_size):
+            await self._copy("results", "results", ["id", "user_id", "points"], [
+                (self._uuid(), user_id, self.rng.randint(0, 140))
+                for user_id in self.user_ids[start:start + self.spec.batch_size]
+            ])
+        self.report.users = self.spec.users
+
+    async def _copy_tags(self) -> List[UUID]:
+        names = list(WORDS[:self.spec.tags])
+        suffix = 2
+        while len(names) < self.spec.tags:
+            names.extend(f"{word}-{suffix}" for word in WORDS[:self.spec.tags - len(names)])
+            suffix += 1
+        self.tag_names = names
+        tag_ids = [self._uuid() for _ in names]
+        created_at = self.now - timedelta(days=self.spec.days)
+        await self._copy("quiz", "tag", ["id", "name", "created_at", "updated_at"], [
+            (tag_id, name, created_at, created_at) for tag_id, name in zip(tag_ids, names)
+        ])
+        self.report.tags = len(names)
+        return tag_ids
+
+    def _quiz_batch(self, size: int, tag_ids: List[UUID]) -> Iterator[Tuple[str, List[str], List[tuple]]]:
+        quizzes, associations, questions, answers = [], [], [], []
+        for _ in range(size):
+            quiz_id = self._uuid()
+            created_at = self._timestamp()
+            topic = self.rng.choice(WORDS)
+            title = " ".join([topic.capitalize(), *self.rng.sample(WORDS, self.rng.randint(1, 3))])
+            description = " ".join(self.rng.choices(DESCRIPTION_WORDS + WORDS, k=self.rng.randint(6, 16)))
+            quizzes.append((
+                quiz_id, title, description, self.rng.random() < 0.2, created_at, created_at,
+                self.user_ids[self._popular(len(self.user_ids))],
+            ))
+            quiz_tags = {self._popular(len(tag_ids)) for _ in range(self.rng.randint(1, self.spec.max_tags_per_quiz))}
+            associations.extend((quiz_id, tag_ids[index]) for index in quiz_tags)
+
+            question_count = self.rng.randint(self.spec.min_questions, self.spec.max_questions)
+            total_points = 0
+            for position in range(question_count):
+                question_id = self._uuid()
+                question_type = self.rng.choices(
+                    [name for name, _ in QUESTION_TYPES], [weight for _, weight in QUESTION_TYPES]
+                )[0]
+                points = self.rng.randint(1, 3)
+                total_points += points
+                questions.append((
+                    question_id, quiz_id, question_type,
+                    f"{topic.capitalize()}: question {position + 1} ({' '.join(self.rng.sample(WORDS, 3))})?",
+                    points, created_at, created_at,
+                ))
+                if question_type == "TEXT_ANSWER":
+                    answers.append((self._uuid(), question_id, self.rng.choice(WORDS), True))
+                    continue
+                correct = {0} if question_type == "SINGLE_CHOICE" else set(
+                    self.rng.sample(range(self.spec.answers_per_question), 2)
+                )
+                answers.extend(
+                    (self._uuid(), question_id, self.rng.choice(WORDS), index in correct)
+                    for index in range(self.spec.answers_per_question)
+                )
+            self.quizzes.append((quiz_id, question_count, total_points))
+
+        self.report.quizzes += len(quizzes)
+        self.report.questions += len(questions)
+        self.report.answers += len(answers)
+        # Порядок важен для внешних ключей
+        yield "quiz", ["id", "title", "description", "is_ai_generated", "created_at", "updated_at", "user_id"], quizzes
+        yield "quiz_tag_association", ["quiz_id", "tag_id"], associations
+        yield "question", [
+            "id", "quiz_id", "question_type", "question_text", "points", "created_at", "updated_at"
+        ], questions
+        yield "answer", ["id", "question_id", "answer_text", "is_correct"], answers
+
+    async def _copy_quizzes(self, tag_ids: List[UUID]) -> None:
+        for start in range(0, self.spec.quizzes, self.spec.batch_size):
+            size = min(self.spec.batch_size, self.spec.quizzes - start)
+            for table, columns, records in self._quiz_batch(size, tag_ids):
+                await self._copy("quiz", table, columns, records)
+
+    async def _copy_attempts(self) -> Dict[str, Dict[str, float]]:
+        """Попытки в quiz_result; возвращает баллы по ключам рейтинга: {key: {email: score}}"""
+        boards: Dict[str, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+        daily_since = self.now.date() - timedelta(days=LEADERBOARD_DAILY_TTL_DAYS)
+        columns = [
+            "id", "quiz_id", "user_id", "score", "total_questions", "correct_answers",
+            "total_points", "earned_points", "duration_ms", "created_at",
+        ]
+        for start in range(0, self.spec.attempts, self.spec.batch_size):
+            records = []
+            for _ in range(min(self.spec.batch_size, self.spec.attempts - start)):
+                quiz_id, question_count, total_points = self.quizzes[self._popular(len(self.quizzes))]
+                user_index = self._popular(len(self.user_ids))
+                correct = self.rng.randint(0, question_count)
+                earned = round(total_points * correct / question_count)
+                created_at = self._timestamp()
+                records.append((
+                    self._uuid(), quiz_id, self.user_ids[user_index], round(correct / question_count * 100),
+                    question_count, correct, total_points, earned,
+                    self.rng.randint(question_count * 3_000, question_count * 40_000), created_at,
+                ))
+                if not earned:
+                    continue
+                email = user_email(user_index)
+                boards[LEADERBOARD_KEY][email] += earned
+                # В рейтинге квиза лучшая попытка, как ZADD GT в increment_user_score
+                quiz_board = boards[f"{LEADERBOARD_KEY}:quiz:{quiz_id}"]
+                quiz_board[email] = max(quiz_board[email], earned)
+                if created_at.date() > daily_since:
+                    boards[f"{LEADERBOARD_KEY}:daily:{created_at.date().isoformat()}"][email] += earned
+            await self._copy("quiz", "quiz_result", columns, records)
+        self.report.attempts = self.spec.attempts
+        return boards
+
+    async def _load_leaderboard(self, boards: Dict[str, Dict[str, float]]) -> None:
+        """Рейтинги с тем же TTL, что выставляет increment_user_score, считая от дня попытки"""
+        members = boards.get(LEADERBOARD_KEY, {})
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for key, scores in boards.items():
+                items = list(scores.items())
+                for start in range(0, len(items), self.spec.batch_size):
+                    pipe.zadd(key, dict(items[start:start + self.spec.batch_size]))
+                if ":daily:" in key:
+                    day = datetime.fromisoformat(key.rsplit(":", 1)[1]).replace(tzinfo=timezone.utc)
+                    pipe.expireat(key, day + timedelta(days=LEADERBOARD_DAILY_TTL_DAYS))
+                elif ":quiz:" in key:
+                    pipe.expire(key, timedelta(days=LEADERBOARD_QUIZ_TTL_DAYS))
+                if len(pipe.command_stack) >= self.spec.batch_size:
+                    await pipe.execute()
+            emails = list(members)
+            for start in range(0, len(emails), self.spec.batch_size):
+                pipe.hset(USER_DATA_KEY, mapping={
+                    email: json.dumps({"email": email}) for email in emails[start:start + self.spec.batch_size]
+                })
+            await pipe.execute()
+        self.report.leaderboard_members = len(members)
+
+    async def run(self) -> GenerationReport:
+        await self._timed("users", self._copy_users())
+        tag_ids = await self._timed("tags", self._copy_tags())
+        await self._timed("quizzes", self._copy_quizzes(tag_ids))
+        if self.quizzes and self.user_ids:
+            boards = await self._timed("attempts", self._copy_attempts())
+            await self._timed("leaderboard", self._load_leaderboard(boards))
+        # Свежая статистика планировщику, иначе первые запросы идут по планам для пустых таблиц
+        await self._timed("analyze", self.conn.execute(
+            "ANALYZE auth.users, results.results, quiz.quiz, quiz.tag, quiz.quiz_tag_association, "
+            "quiz.question, quiz.answer, quiz.quiz_result"
+        ))
+        return self.report
+
+    def manifest(self) -> Dict[str, Any]:
+        """Что нужно нагрузке: как войти, какие квизы открывать и какие теги искать"""
+        return {
+            "seed": self.spec.seed,
+            "users": self.spec.users,
+            "email_domain": EMAIL_DOMAIN,
+            "password": self.spec.password,
+            "tags": self.tag_names,
+            "quiz_ids": [str(quiz_id) for quiz_id, _, _ in self.quizzes[:self.spec.manifest_quizzes]],
+            "spec": {key: value for key, value in asdict(self.spec).items() if key != "password"},
+        }
+
+
+async def generate(
+    database_url: str, redis_url: str, spec: DatasetSpec, truncate: bool = False
+) -> Tuple[GenerationReport, Dict[str, Any]]:
+    from redis.asyncio import from_url
+
+    conn = await asyncpg.connect(asyncpg_dsn(database_url))
+    redis = from_url(redis_url, decode_responses=True)
+    try:
+        generator = SyntheticDataGenerator(conn, redis, spec)
+        if truncate:
+            await generator.truncate()
+        else:
+            await generator.check_empty()
+        report = await generator.run()
+        return report, generator.manifest()
+    finally:
+        await conn.close()
+        await redis.aclose()
+
+
+def load_manifest(path: str) -> Dict[str, Any]:
+    with open(path, encoding="utf-8") as source:
+        return json.load(source)
+
+
+def save_manifest(path: str, manifest: Dict[str, Any], report: Optional[GenerationReport] = None) -> None:
+    with open(path, "w", encoding="utf-8") as target:
+        json.dump({**manifest, "report": asdict(report) if report else None}, target, ensure_ascii=False, indent=2)
@@ -0,0 +1,94 @@
+import math
+from collections import Counter, defaultdict
+from typing import Any, Dict, List
+
+PERCENTILES = (50, 95, 99)
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Nearest-rank: значение, не меньше которого q% наблюдений"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(q / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class Recorder:
+    """
+    Латентности и статусы по эндпоинтам. Эндпоинт - шаблон пути
+    ("GET /quiz/{quiz_id}"), чтобы id квизов не дробили статистику.
+    До конца прогрева (recording=False) ничего не записывается.
+    """
+
+    def __init__(self):
+        self.recording = False
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Counter] = defaultdict(Counter)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    def record(self, endpoint: str, status: str, seconds: float, ok: bool) -> None:
+        if not self.recording:
+            return
+        self.latencies[endpoint].append(seconds)
+        self.statuses[endpoint][status] += 1
+        if not ok:
+            self.errors[endpoint] += 1
+
+    def summary(self, duration_seconds: float) -> Dict[str, Any]:
+        endpoints = {}
+        for endpoint in sorted(self.latencies):
+            values = sorted(self.latencies[endpoint])
+            endpoints[endpoint] = {
+                "count": len(values),
+                "errors": self.errors[endpoint],
+                "throughput_rps": round(len(values) / duration_seconds, 2),
+                "latency_ms": {
+                    "mean": round(sum(values) / len(values) * 1000, 2),
+                    **{f"p{q}": round(percentile(values, q) * 1000, 2) for q in PERCENTILES},
+                    "max": round(values[-1] * 1000, 2),
+                },
+                "statuses": dict(sorted(self.statuses[endpoint].items())),
+            }
+        requests = sum(item["count"] for item in endpoints.values())
+        errors = sum(item["errors"] for item in endpoints.values())
+        all_values = sorted(value for values in self.latencies.values() for value in values)
+        return {
+            "totals": {
+                "count": requests,
+                "errors": errors,
+                "throughput_rps": round(requests / duration_seconds, 2),
+                "latency_ms": {f"p{q}": round(percentile(all_values, q) * 1000, 2) for q in PERCENTILES},
+            },
+            "endpoints": endpoints,
+        }
+
+
+def compare_reports(
+    baseline: Dict[str, Any], current: Dict[str, Any], tolerance: float, min_count: int = 20
+) -> List[str]:
+    """
+    Регрессии current относительно baseline по эндпоинтам, которые есть
+    в обоих отчётах: p95/p99 выросли, а пропускная способность упала больше
+    чем на tolerance (доля), или появились ошибки. Эндпоинты, где запросов
+    меньше min_count, не сравниваются: их перцентили - шум.
+    """
+    regressions = []
+    for endpoint, base in baseline["endpoints"].items():
+        cur = current["endpoints"].get(endpoint)
+        if cur is None:
+            regressions.append(f"{endpoint}: missing from the current run")
+            continue
+        if base["count"] < min_count or cur["count"] < min_count:
+            continue
+        for q in ("p95", "p99"):
+            before, after = base["latency_ms"][q], cur["latency_ms"][q]
+            if after > before * (1 + tolerance):
+                regressions.append(f"{endpoint}: {q} {before:.1f} ms -> {after:.1f} ms")
+        before, after = base["throughput_rps"], cur["throughput_rps"]
+        if after < before * (1 - tolerance):
+            regressions.append(f"{endpoint}: throughput {before:.1f} -> {after:.1f} req/s")
+        base_rate = base["errors"] / base["count"]
+        cur_rate = cur["errors"] / cur["count"]
+        if cur_rate > base_rate + 0.001:
+            regressions.append(f"{endpoint}: error rate {base_rate:.2%} -> {cur_rate:.2%}")
+    return regressions
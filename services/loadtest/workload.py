@@ -0,0 +1,256 @@
+import asyncio
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+from jose import jwt
+
+from services.loadtest.generator import WORDS, user_email
+from services.loadtest.report import Recorder
+
+# Доли сценариев виртуального пользователя по умолчанию
+DEFAULT_MIX = {
+    "browse": 25,
+    "search": 20,
+    "open_quiz": 20,
+    "take_quiz": 15,
+    "leaderboard": 15,
+    "profile": 5,
+}
+LEADERBOARD_WINDOWS = ("all", "all", "daily", "weekly", "monthly")
+
+
+@dataclass
+class Targets:
+    auth_url: str = "http://localhost:8001"
+    quiz_url: str = "http://localhost:8003"
+    results_url: str = "http://localhost:8002"
+
+
+@dataclass
+class LoadConfig:
+    virtual_users: int = 50
+    duration_seconds: float = 60.0
+    warmup_seconds: float = 10.0
+    # Средняя пауза между сценариями (экспоненциальная); 0 - замкнутый цикл без пауз
+    think_seconds: float = 0.0
+    mix: Dict[str, int] = field(default_factory=lambda: dict(DEFAULT_MIX))
+    # Всплески логинов: login_burst_size одновременных POST /auth/login раз в interval
+    login_burst_size: int = 20
+    login_burst_interval_seconds: float = 10.0
+    # Одновременных логинов при подготовке виртуальных пользователей
+    setup_concurrency: int = 8
+    timeout_seconds: float = 30.0
+    seed: int = 1
+
+
+@dataclass
+class UserSession:
+    user_id: str
+    headers: Dict[str, str]
+    rng: random.Random
+
+
+class Workload:
+    """
+    Сценарии нагрузки на три сервиса. Каждый HTTP-запрос записывается в
+    Recorder под шаблоном эндпоинта; сетевые ошибки и таймауты - со
+    статусом "error". Популярные квизы и теги открываются чаще: выбор из
+    манифеста генератора с тем же смещением, что и при генерации попыток.
+    """
+
+    def __init__(self, targets: Targets, manifest: Dict[str, Any], config: LoadConfig, recorder: Recorder):
+        self.targets = targets
+        self.manifest = manifest
+        self.config = config
+        self.recorder = recorder
+        self.skew = manifest["spec"]["skew"]
+        self.rng = random.Random(config.seed)
+        limits = httpx.Limits(max_connections=config.virtual_users + config.login_burst_size)
+        timeout = httpx.Timeout(config.timeout_seconds)
+        self.auth = httpx.AsyncClient(base_url=targets.auth_url, limits=limits, timeout=timeout)
+        self.quiz = httpx.AsyncClient(base_url=targets.quiz_url, limits=limits, timeout=timeout)
+        self.results = httpx.AsyncClient(base_url=targets.results_url, limits=limits, timeout=timeout)
+        self.scenarios: Dict[str, Callable[[UserSession], Awaitable[None]]] = {
+            "browse": self.browse,
+            "search": self.search,
+            "open_quiz": self.open_quiz,
+            "take_quiz": self.take_quiz,
+            "leaderboard": self.leaderboard,
+            "profile": self.profile,
+        }
+        unknown = set(config.mix) - set(self.scenarios)
+        if unknown:
+            raise ValueError(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+
+    async def aclose(self) -> None:
+        for client in (self.auth, self.quiz, self.results):
+            await client.aclose()
+
+    def _popular(self, rng: random.Random, items: List[Any]) -> Any:
+        return items[min(int(len(items) * rng.random() ** self.skew), len(items) - 1)]
+
+    async def request(
+        self, client: httpx.AsyncClient, method: str, endpoint: str, url: str, **kwargs
+    ) -> Optional[httpx.Response]:
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            self.recorder.record(endpoint, "error", time.perf_counter() - started, ok=False)
+            return None
+        self.recorder.record(
+            endpoint, str(response.status_code), time.perf_counter() - started, ok=response.status_code < 400
+        )
+        return response
+
+    async def login(self, index: int, rng: random.Random) -> Optional[UserSession]:
+        response = await self.request(
+            self.auth, "POST", "POST /auth/login", "/auth/login",
+            json={"email": user_email(index), "password": self.manifest["password"]},
+        )
+        if response is None or response.status_code != 200:
+            return None
+        token = response.json()["access_token"]
+        return UserSession(
+            user_id=jwt.get_unverified_claims(token)["sub"],
+            headers={"Authorization": f"Bearer {token}"},
+            rng=rng,
+        )
+
+    async def login_users(self, count: int) -> List[UserSession]:
+        """Логин виртуальных пользователей до начала замера"""
+        semaphore = asyncio.Semaphore(self.config.setup_concurrency)
+        indexes = self.rng.sample(range(self.manifest["users"]), min(count, self.manifest["users"]))
+
+        async def login(position: int, index: int) -> Optional[UserSession]:
+            async with semaphore:
+                return await self.login(index, random.Random(self.config.seed * 100_003 + position))
+
+        sessions = await asyncio.gather(*(login(position, index) for position, index in enumerate(indexes)))
+        return [session for session in sessions if session is not None]
+
+    async def browse(self, session: UserSession) -> None:
+        """Лента новых квизов и, иногда, следующая страница"""
+        params = {"size": 10, "sort_by": session.rng.choice(("created_at", "created_at", "updated_at", "title"))}
+        response = await self.request(self.quiz, "GET", "GET /quiz/search/ (browse)", "/quiz/search/", params=params)
+        if response is None or response.status_code != 200 or session.rng.random() < 0.5:
+            return
+        next_cursor = response.json().get("next_cursor")
+        if next_cursor:
+            # Курсор действителен только с той же сортировкой
+            await self.request(
+                self.quiz, "GET", "GET /quiz/search/ (next page)", "/quiz/search/",
+                params={**params, "cursor": next_cursor},
+            )
+
+    async def search(self, session: UserSession) -> None:
+        """Полнотекстовый поиск, часто с тегом, иногда с фасетами"""
+        params: Dict[str, Any] = {"q": session.rng.choice(WORDS), "size": 10, "sort_by": "relevance"}
+        if session.rng.random() < 0.5:
+            params["tags"] = [self._popular(session.rng, self.manifest["tags"])]
+        if session.rng.random() < 0.2:
+            params["facets"] = True
+        await self.request(self.quiz, "GET", "GET /quiz/search/ (text)", "/quiz/search/", params=params)
+
+    async def _get_quiz(self, session: UserSession) -> Optional[Dict[str, Any]]:
+        quiz_id = self._popular(session.rng, self.manifest["quiz_ids"])
+        response = await self.request(self.quiz, "GET", "GET /quiz/{quiz_id}", f"/quiz/{quiz_id}")
+        if response is None or response.status_code != 200:
+            return None
+        return response.json()
+
+    async def open_quiz(self, session: UserSession) -> None:
+        await self._get_quiz(session)
+
+    async def take_quiz(self, session: UserSession) -> None:
+        """Открыть квиз и отправить случайные ответы"""
+        quiz = await self._get_quiz(session)
+        if quiz is None:
+            return
+        answers = []
+        for question in quiz["questions"]:
+            if question["question_type"] == "long_answer":
+                answers.append({"question_id": question["id"], "text_answer": session.rng.choice(WORDS)})
+            elif question["answers"]:
+                answers.append({
+                    "question_id": question["id"],
+                    "answers": [session.rng.choice(question["answers"])["id"]],
+                })
+        await self.request(
+            self.quiz, "POST", "POST /quiz/{quiz_id}/calculate-result", f"/quiz/{quiz['id']}/calculate-result",
+            json={
+                "quiz_id": quiz["id"],
+                "answers": answers,
+                "duration_ms": session.rng.randint(5_000, 300_000),
+            },
+            headers=session.headers,
+        )
+
+    async def leaderboard(self, session: UserSession) -> None:
+        """Опрос рейтинга, как его делает открытая страница лидерборда"""
+        await self.request(
+            self.quiz, "GET", "GET /api/leaderboard/", "/api/leaderboard/",
+            params={"top": 10, "window": session.rng.choice(LEADERBOARD_WINDOWS)},
+            headers=session.headers,
+        )
+
+    async def profile(self, session: UserSession) -> None:
+        """Страница профиля: результат, статистика и свои квизы"""
+        await self.request(self.results, "GET", "GET /results/result", "/results/result", headers=session.headers)
+        await self.request(
+            self.quiz, "GET", "GET /quiz/user/{user_id}/stats", f"/quiz/user/{session.user_id}/stats"
+        )
+        await self.request(
+            self.quiz, "GET", "GET /quiz/user/{user_id}", f"/quiz/user/{session.user_id}", params={"size": 10}
+        )
+
+    async def virtual_user(self, session: UserSession, stop_at: float) -> None:
+        names = list(self.config.mix)
+        weights = [self.config.mix[name] for name in names]
+        while time.monotonic() < stop_at:
+            await self.scenarios[session.rng.choices(names, weights)[0]](session)
+            if self.config.think_seconds:
+                await asyncio.sleep(session.rng.expovariate(1 / self.config.think_seconds))
+
+    async def login_bursts(self, stop_at: float) -> None:
+        """Одновременные логины разных пользователей, как в начале занятия"""
+        while time.monotonic() + self.config.login_burst_interval_seconds < stop_at:
+            await asyncio.sleep(self.config.login_burst_interval_seconds)
+            indexes = self.rng.sample(
+                range(self.manifest["users"]), min(self.config.login_burst_size, self.manifest["users"])
+            )
+            await asyncio.gather(*(self.login(index, self.rng) for index in indexes))
+
+
+async def run_load(targets: Targets, manifest: Dict[str, Any], config: LoadConfig) -> Dict[str, Any]:
+    """Прогрев, затем замер duration_seconds; возвращает отчёт с перцентилями по эндпоинтам"""
+    recorder = Recorder()
+    workload = Workload(targets, manifest, config, recorder)
+    try:
+        sessions = await workload.login_users(config.virtual_users)
+        if not sessions:
+            raise RuntimeError("No virtual user could log in, check the services and the manifest")
+
+        stop_at = time.monotonic() + config.warmup_seconds + config.duration_seconds
+        tasks = [asyncio.create_task(workload.virtual_user(session, stop_at)) for session in sessions]
+        if config.login_burst_size:
+            tasks.append(asyncio.create_task(workload.login_bursts(stop_at)))
+
+        await asyncio.sleep(config.warmup_seconds)
+        recorder.recording = True
+        started = time.perf_counter()
+        await asyncio.gather(*tasks)
+        duration = time.perf_counter() - started
+    finally:
+        await workload.aclose()
+
+    return {
+        "targets": vars(targets),
+        "config": {**vars(config), "virtual_users": len(sessions)},
+        "dataset": manifest["spec"],
+        "duration_seconds": round(duration, 3),
+        **recorder.summary(duration),
+    }
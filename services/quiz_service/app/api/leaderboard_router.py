@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Optional
 from uuid import UUID
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from services.quiz_service.app.schemas import (
@@ -7,28 +7,44 @@ from services.quiz_service.app.schemas import (
     UserScoreUpdate,
     UserData
 )
-from services.quiz_service.app.services.leaderboard_service import LeaderboardService
+from services.quiz_service.app.services.leaderboard_service import LeaderboardService, LEADERBOARD_WINDOWS
 from services.shared.edu_shared.dependencies import get_current_user_id
 
 router = APIRouter(prefix="/leaderboard", tags=["leaderboard"])
 
+WINDOW_DESCRIPTION = "Период рейтинга: all, daily, weekly или monthly"
+QUIZ_ID_DESCRIPTION = "Рейтинг по одному квизу: лучшая попытка каждого участника (только за всё время)"
+
+
+def validate_board(window: str, quiz_id: Optional[UUID]) -> None:
+    if window not in LEADERBOARD_WINDOWS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid window. Must be one of: {', '.join(LEADERBOARD_WINDOWS)}"
+        )
+    if quiz_id is not None and window != "all":
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Quiz leaderboards are only available for window=all"
+        )
+
 
 @router.get("/", response_model=LeaderboardResponse)
 async def get_leaderboard(
     top: int = Query(10, ge=1, le=100, description="Количество топ пользователей"),
+    window: str = Query("all", description=WINDOW_DESCRIPTION),
+    quiz_id: Optional[UUID] = Query(None, description=QUIZ_ID_DESCRIPTION),
     current_user_id: str = Depends(get_current_user_id)
 ):
     """
     Получает топ пользователей по баллам
     """
+    validate_board(window, quiz_id)
     try:
-        # Получаем leaderboard
-        entries_data = await LeaderboardService.get_leaderboard(top=top, with_user_data=True)
-        
-        # Получаем информацию о текущем пользователе
-        current_user_rank = await LeaderboardService.get_user_rank(current_user_id)
-        current_user_score = await LeaderboardService.get_user_score(current_user_id)
-        total_users = await LeaderboardService.get_total_users()
+        # Страница рейтинга и позиция текущего пользователя одним вызовом
+        entries_data, standing = await LeaderboardService.get_leaderboard_page(
+            top, current_user_id, window, quiz_id
+        )
         
         # Преобразуем данные в схемы
         entries = []
@@ -47,9 +63,9 @@ async def get_leaderboard(
         
         return LeaderboardResponse(
             entries=entries,
-            total_users=total_users,
-            current_user_rank=current_user_rank,
-            current_user_score=current_user_score
+            total_users=standing["total_users"],
+            current_user_rank=standing["rank"],
+            current_user_score=standing["score"]
         )
     except Exception as e:
         raise HTTPException(
@@ -61,13 +77,16 @@ async def get_leaderboard(
 @router.get("/user/{user_id}/around", response_model=List[LeaderboardEntry])
 async def get_users_around_user(
     user_id: str,
-    range_size: int = Query(5, ge=1, le=20, description="Количество пользователей с каждой стороны")
+    range_size: int = Query(5, ge=1, le=20, description="Количество пользователей с каждой стороны"),
+    window: str = Query("all", description=WINDOW_DESCRIPTION),
+    quiz_id: Optional[UUID] = Query(None, description=QUIZ_ID_DESCRIPTION)
 ):
     """
     Получает пользователей вокруг указанного пользователя
     """
+    validate_board(window, quiz_id)
     try:
-        entries_data = await LeaderboardService.get_users_around_user(user_id, range_size)
+        entries_data = await LeaderboardService.get_users_around_user(user_id, range_size, window, quiz_id)
         
         entries = []
         for entry_data in entries_data:
@@ -132,13 +151,18 @@ async def update_user_score(
 
 
 @router.get("/user/{user_id}/score")
-async def get_user_score(user_id: str):
+async def get_user_score(
+    user_id: str,
+    window: str = Query("all", description=WINDOW_DESCRIPTION),
+    quiz_id: Optional[UUID] = Query(None, description=QUIZ_ID_DESCRIPTION)
+):
     """
     Получает баллы пользователя
     """
+    validate_board(window, quiz_id)
     try:
-        score = await LeaderboardService.get_user_score(user_id)
-        rank = await LeaderboardService.get_user_rank(user_id)
+        standing = await LeaderboardService.get_user_standing(user_id, window, quiz_id)
+        score, rank = standing["score"], standing["rank"]
         
         if score is None:
             raise HTTPException(
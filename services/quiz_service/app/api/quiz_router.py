@@ -1,9 +1,14 @@
+import json
+import logging
+from datetime import datetime, timezone
 from typing import List, Optional
-from uuid import UUID
+from uuid import UUID, uuid4
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
 
-from services.quiz_service.app.dependencies import db_depends
+from services.quiz_service.app.db import database, new_session
+from services.shared.edu_shared.dependencies import db_depends, read_db_depends
 from services.quiz_service.app.schemas import (
     QuizCreate,
     QuizUpdate,
@@ -13,16 +18,41 @@ from services.quiz_service.app.schemas import (
     QuizSearchParams,
     QuizResult,
     QuizResultResponse,
+    QuizImportReport,
     TagResponse,
+    GenerationJobResponse,
 )
-from services.quiz_service.app.services.quiz_service import QuizService
-from services.quiz_service.app.services.gemini_service import GeminiService, QuizGenerationRequest
-from services.quiz_service.app.utils import get_quiz_with_questions
+from services.quiz_service.app.config import settings
+from services.quiz_service.app.services.quiz_service import QuizService, SUMMARY_VIEW, FULL_VIEW, RELEVANCE_SORT
+from services.quiz_service.app.services.gemini_service import QuizGenerationRequest
+from services.quiz_service.app.services.generation_jobs import generation_jobs, GenerationQueueFull
+from services.quiz_service.app.services.grading_service import grade_submission
+from services.quiz_service.app.services.import_service import QuizImporter, iter_ndjson_lines
+from services.quiz_service.app.services.leaderboard_service import LeaderboardService
+from services.quiz_service.app.services.attempt_writer import attempt_writer
 from services.shared.edu_shared.dependencies import get_current_user_id
-import httpx
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+LISTING_VIEWS = [SUMMARY_VIEW, FULL_VIEW]
+
+
+def _validate_view(view: str) -> None:
+    if view not in LISTING_VIEWS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid view. Must be one of: {LISTING_VIEWS}",
+        )
+
+
+def _listing_items(quizzes, view: str) -> list:
+    # Полные карточки (view=full) отдаём со всеми вопросами и ответами
+    if view == FULL_VIEW:
+        return [QuizListResponse.model_validate(quiz) for quiz in quizzes]
+    return quizzes
+
 
 @router.post("/", response_model=QuizResponse, status_code=status.HTTP_201_CREATED)
 async def create_quiz(
@@ -36,51 +66,70 @@ async def create_quiz(
     return QuizResponse.model_validate(quiz)
 
 
+@router.post("/import", response_model=QuizImportReport)
+async def import_quizzes(
+    request: Request,
+    db: db_depends,
+    chunk_size: int = Query(
+        settings.QUIZ_IMPORT_CHUNK_SIZE, ge=1, le=5000, description="Quizzes per transaction"
+    ),
+    user_id: str = Depends(get_current_user_id),
+):
+    """Bulk import quizzes from an NDJSON body, one QuizCreate document per line"""
+    importer = QuizImporter(db, UUID(user_id), chunk_size, settings.QUIZ_IMPORT_MAX_LINE_BYTES)
+    return await importer.run(iter_ndjson_lines(request.stream(), settings.QUIZ_IMPORT_MAX_LINE_BYTES))
+
+
 @router.get("/{quiz_id}", response_model=QuizResponse)
-async def get_quiz(quiz_id: UUID, db: db_depends):
+async def get_quiz(quiz_id: UUID, db: read_db_depends):
     """Get quiz by ID with all questions and answers"""
-    quiz = await get_quiz_with_questions(quiz_id, db)
+    quiz_service = QuizService(db)
+    quiz = await quiz_service.get_quiz(quiz_id)
+
+    if not quiz and database.is_replica(db):
+        # Только что созданный квиз мог ещё не дойти до реплики
+        async with new_session() as primary:
+            quiz = await QuizService(primary).get_quiz(quiz_id)
 
     if not quiz:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Quiz not found"
         )
 
-    return QuizResponse.model_validate(quiz)
+    return quiz
 
 
 @router.get("/user/{user_id}", response_model=PaginatedQuizResponse)
 async def get_user_quizzes(
     user_id: UUID,
-    db: db_depends,
-    page: int = Query(1, ge=1, description="Page number"),
+    db: read_db_depends,
+    cursor: Optional[str] = Query(None, description="Cursor of the page (next_cursor of the previous one)"),
     size: int = Query(10, ge=1, le=50, description="Items per page"),
+    include_total: bool = Query(False, description="Also count all user quizzes"),
+    view: str = Query(SUMMARY_VIEW, description="Listing shape: summary, full"),
 ):
-    """Get quizzes created by user with proper pagination"""
+    """Get quizzes created by user with cursor pagination"""
+    _validate_view(view)
     quiz_service = QuizService(db)
 
-    # Calculate offset
-    offset = (page - 1) * size
-
-    # Get quizzes and total count
-    quizzes = await quiz_service.get_quizzes_by_user(user_id, size, offset)
-    total_count = await quiz_service.get_quiz_count_by_user(user_id)
-
-    # Convert to response format - фронтенд сам посчитает количество вопросов
-    items = [QuizListResponse.model_validate(quiz) for quiz in quizzes]
+    try:
+        quizzes, next_cursor = await quiz_service.get_quizzes_by_user(
+            user_id, size, cursor=cursor, view=view
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
-    # Calculate pagination info
-    total_pages = (total_count + size - 1) // size
-    has_next = page < total_pages
-    has_prev = page > 1
+    total_count = None
+    if include_total:
+        total_count = await quiz_service.get_quiz_count_by_user(user_id)
 
     return PaginatedQuizResponse(
-        items=items,
+        items=_listing_items(quizzes, view),
         total=total_count,
         limit=size,
-        offset=offset,
-        has_next=has_next,
-        has_prev=has_prev,
+        next_cursor=next_cursor,
+        has_next=next_cursor is not None,
+        has_prev=cursor is not None,
     )
 
 
@@ -95,7 +144,7 @@ async def update_quiz(
     quiz_service = QuizService(db)
 
     # Check if quiz exists and user owns it
-    quiz = await get_quiz_with_questions(quiz_id, db)
+    quiz = await quiz_service.get_quiz(quiz_id)
     if not quiz:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Quiz not found"
@@ -113,7 +162,7 @@ async def update_quiz(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to update quiz"
         )
-    return QuizResponse.model_validate(updated_quiz)
+    return updated_quiz
 
 
 @router.delete("/{quiz_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -126,7 +175,7 @@ async def delete_quiz(
     quiz_service = QuizService(db)
 
     # Check if quiz exists and user owns it
-    quiz = await get_quiz_with_questions(quiz_id, db)
+    quiz = await quiz_service.get_quiz(quiz_id)
     if not quiz:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Quiz not found"
@@ -148,8 +197,8 @@ async def delete_quiz(
 
 @router.get("/search/", response_model=PaginatedQuizResponse)
 async def search_quizzes(
-    db: db_depends,
-    q: Optional[str] = Query(None, description="Search query (title or description)"),
+    db: read_db_depends,
+    q: Optional[str] = Query(None, description="Full-text search query (title or description)"),
     tags: Optional[List[str]] = Query(None, description="Filter by tags"),
     user_id: Optional[UUID] = Query(None, description="Filter by user"),
     exclude_user_id: Optional[UUID] = Query(None, description="Exclude quizzes by user"),
@@ -157,26 +206,33 @@ async def search_quizzes(
         None, description="Filter by AI generation"
     ),
     sort_by: str = Query(
-        "created_at", description="Sort by: created_at, title, updated_at"
+        "created_at", description="Sort by: created_at, title, updated_at, relevance (requires q)"
     ),
     sort_order: str = Query("desc", description="Sort order: asc, desc"),
-    page: int = Query(1, ge=1, description="Page number"),
+    cursor: Optional[str] = Query(None, description="Cursor of the page (next_cursor of the previous one)"),
     size: int = Query(10, ge=1, le=50, description="Items per page"),
+    include_total: bool = Query(False, description="Also count all matching quizzes"),
+    facets: bool = Query(False, description="Also count matching quizzes per tag (implies include_total)"),
+    view: str = Query(SUMMARY_VIEW, description="Listing shape: summary, full"),
 ):
-    """Search quizzes with advanced filtering and pagination"""
+    """Search quizzes with advanced filtering and cursor pagination"""
+    _validate_view(view)
     quiz_service = QuizService(db)
 
-    # Calculate offset
-    offset = (page - 1) * size
-
     # Validate sort parameters
-    valid_sort_fields = ["created_at", "title", "updated_at"]
+    valid_sort_fields = ["created_at", "title", "updated_at", RELEVANCE_SORT]
     if sort_by not in valid_sort_fields:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Invalid sort_by. Must be one of: {valid_sort_fields}",
         )
 
+    if sort_by == RELEVANCE_SORT and not q:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="sort_by=relevance requires a search query",
+        )
+
     if sort_order not in ["asc", "desc"]:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -184,48 +240,57 @@ async def search_quizzes(
         )
 
     # Get quizzes with filters
-    quizzes = await quiz_service.search_quizzes_advanced(
-        search_query=q,
-        tags=tags,
-        user_id=user_id,
-        exclude_user_id=exclude_user_id,
-        is_ai_generated=is_ai_generated,
-        sort_by=sort_by,
-        sort_order=sort_order,
-        limit=size,
-        offset=offset,
-    )
-
-    # Get total count for pagination
-    total_count = await quiz_service.get_search_count(
-        search_query=q, 
-        tags=tags, 
-        user_id=user_id, 
-        exclude_user_id=exclude_user_id,
-        is_ai_generated=is_ai_generated
-    )
-
-    # Convert to response format - фронтенд сам посчитает количество вопросов
-    items = [QuizListResponse.model_validate(quiz) for quiz in quizzes]
-
-    # Calculate pagination info
-    total_pages = (total_count + size - 1) // size
-    has_next = page < total_pages
-    has_prev = page > 1
+    try:
+        quizzes, next_cursor = await quiz_service.search_quizzes_advanced(
+            search_query=q,
+            tags=tags,
+            user_id=user_id,
+            exclude_user_id=exclude_user_id,
+            is_ai_generated=is_ai_generated,
+            sort_by=sort_by,
+            sort_order=sort_order,
+            limit=size,
+            cursor=cursor,
+            view=view,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    # Total count is optional: it costs a full scan of the matching rows
+    total_count = None
+    tag_facets = None
+    if facets:
+        # Фасеты всё равно проходят по всем найденным квизам, total считается тем же запросом
+        total_count, tag_facets = await quiz_service.get_search_facets(
+            search_query=q,
+            tags=tags,
+            user_id=user_id,
+            exclude_user_id=exclude_user_id,
+            is_ai_generated=is_ai_generated,
+        )
+    elif include_total:
+        total_count = await quiz_service.get_search_count(
+            search_query=q, 
+            tags=tags, 
+            user_id=user_id, 
+            exclude_user_id=exclude_user_id,
+            is_ai_generated=is_ai_generated
+        )
 
     return PaginatedQuizResponse(
-        items=items,
+        items=_listing_items(quizzes, view),
         total=total_count,
         limit=size,
-        offset=offset,
-        has_next=has_next,
-        has_prev=has_prev,
+        next_cursor=next_cursor,
+        has_next=next_cursor is not None,
+        has_prev=cursor is not None,
+        facets=tag_facets,
     )
 
 
 @router.get("/tags/", response_model=List[TagResponse])
 async def get_all_tags(
-    db: db_depends,
+    db: read_db_depends,
     search: Optional[str] = Query(None, description="Search tags by name"),
     limit: int = Query(50, ge=1, le=100, description="Maximum tags to return"),
 ):
@@ -236,14 +301,14 @@ async def get_all_tags(
 
 
 @router.get("/user/{user_id}/count")
-async def get_user_quiz_count(user_id: UUID, db: db_depends):
+async def get_user_quiz_count(user_id: UUID, db: read_db_depends):
     """Get total number of quizzes created by user"""
     quiz_service = QuizService(db)
     count = await quiz_service.get_quiz_count_by_user(user_id)
     return {"user_id": user_id, "quiz_count": count, "status": "success"}
 
 @router.get("/user/{user_id}/stats")
-async def get_user_stats(user_id: UUID, db: db_depends):
+async def get_user_stats(user_id: UUID, db: read_db_depends):
     """Get user statistics"""
     quiz_service = QuizService(db)
     
@@ -276,166 +341,103 @@ async def calculate_quiz_result(
     user_id: str = Depends(get_current_user_id)
 ):
     """Calculate quiz result and update leaderboard"""
-    print(f"Backend received quiz_id: {quiz_id}")
-    print(f"Backend received result: {result}")
-    print(f"Backend received answers: {result.answers}")
-    
+    logger.debug("Grading %d answers for quiz %s", len(result.answers), quiz_id)
+
     quiz_service = QuizService(db)
-    quiz = await quiz_service.get_quiz(quiz_id)
+    compiled = await quiz_service.get_compiled_quiz(quiz_id)
     
-    if not quiz:
+    if not compiled:
         raise HTTPException(status_code=404, detail="Quiz not found")
     
-    # Подсчитываем результаты
-    total_questions = len(quiz.questions)
-    correct_answers = 0
-    total_points = 0
-    earned_points = 0
+    # Подсчитываем результаты по скомпилированному ключу ответов
+    grading = grade_submission(compiled.answer_key, result.answers)
+    earned_points = grading.earned_points
+
+    # Попытка уходит в quiz_result фоновой пачкой, без INSERT в запросе
+    attempt_writer.submit({
+        "id": uuid4(),
+        "quiz_id": quiz_id,
+        "quiz_title": compiled.quiz.title,
+        "user_id": UUID(user_id),
+        "score": grading.score,
+        "total_questions": grading.total_questions,
+        "correct_answers": grading.correct_answers,
+        "total_points": grading.total_points,
+        "earned_points": earned_points,
+        "details": grading.details,
+        "duration_ms": result.duration_ms,
+        "created_at": datetime.now(timezone.utc).replace(tzinfo=None),
+    })
     
-    for question in quiz.questions:
-        user_answer = next((a for a in result.answers if a.question_id == question.id), None)
-        
-        if question.question_type == "long_answer":
-            # Для текстовых вопросов проверяем, есть ли ответ пользователя
-            if user_answer and user_answer.text_answer and user_answer.text_answer.strip():
-                # Если есть правильные ответы в базе, проверяем совпадение
-                correct_answer_list = [a for a in question.answers if a.is_correct]
-                if correct_answer_list:
-                    # Проверяем, содержит ли ответ пользователя ключевые слова из правильных ответов
-                    user_answer_lower = user_answer.text_answer.lower().strip()
-                    is_correct = any(
-                        correct_answer.answer_text.lower().strip() in user_answer_lower or
-                        user_answer_lower in correct_answer.answer_text.lower().strip()
-                        for correct_answer in correct_answer_list
-                    )
-                else:
-                    # Если нет правильных ответов в базе, считаем любой непустой ответ правильным
-                    is_correct = True
-                
-                if is_correct:
-                    correct_answers += 1
-                    earned_points += question.points
-                
-                total_points += question.points
-                print(f"Text question: {question.question_text}")
-                print(f"User answer: {user_answer.text_answer}")
-                print(f"Correct answers in DB: {[a.answer_text for a in question.answers if a.is_correct]}")
-                print(f"Is correct: {is_correct}")
-                print(f"Points: {question.points}, Earned: {earned_points if is_correct else 0}")
-            else:
-                print(f"Text question without answer: {question.question_text}")
-                print(f"User answer: {user_answer.text_answer if user_answer else 'No user answer'}")
-                total_points += question.points
-        else:
-            # Для вопросов с выбором
-            if user_answer and user_answer.answers:
-                correct_answer_ids = [str(a.id) for a in question.answers if a.is_correct]
-                user_answer_ids = user_answer.answers
-                
-                is_correct = (
-                    len(correct_answer_ids) == len(user_answer_ids) and
-                    all(aid in correct_answer_ids for aid in user_answer_ids)
-                )
-                
-                if is_correct:
-                    correct_answers += 1
-                    earned_points += question.points
-                
-                total_points += question.points
-                print(f"Choice question: {question.question_text}")
-                print(f"User answers: {user_answer.answers}")
-                print(f"Correct answers: {correct_answer_ids}")
-                print(f"Is correct: {is_correct}")
-                print(f"Points: {question.points}, Earned: {earned_points if is_correct else 0}")
-            else:
-                total_points += question.points
-    
-    # Рассчитываем процент правильных ответов
-    score = round((correct_answers / total_questions) * 100) if total_questions > 0 else 0
-    
-    # Обновляем leaderboard с заработанными баллами
-    try:
-        from services.quiz_service.app.services.leaderboard_service import LeaderboardService
-        
-        # Получаем текущие баллы пользователя
-        current_score = await LeaderboardService.get_user_score(user_id) or 0
-        
-        # Добавляем новые баллы к текущим
-        new_total_score = current_score + earned_points
-        
-        # Получаем email пользователя из auth service
-        auth_base_url = "http://auth-service:8000"
-        async with httpx.AsyncClient() as client:
-            response = await client.get(f"{auth_base_url}/auth/user/{user_id}")
-            user_email = None
-            if response.status_code == 200:
-                user_data = response.json()
-                user_email = user_data.get("email")
-        
-        # Обновляем leaderboard
-        await LeaderboardService.add_user_score(
-            user_id=user_id,
-            score=new_total_score,
-            user_data={"email": user_email} if user_email else None
-        )
-        
-        print(f"Updated leaderboard for user {user_id}: {current_score} + {earned_points} = {new_total_score}")
-    except Exception as e:
-        print(f"Error updating leaderboard: {e}")
-        # Не прерываем выполнение, если leaderboard недоступен
+    # Атомарно прибавляем заработанные баллы в leaderboard.
+    # Ошибки не пробрасываются: недоступный leaderboard не мешает выдать результат
+    new_total_score = await LeaderboardService.increment_user_score(user_id, earned_points, quiz_id=quiz_id)
+    if new_total_score is not None:
+        logger.debug("Leaderboard score of user %s: +%d = %d", user_id, earned_points, new_total_score)
     
     return QuizResultResponse(
-        score=score,
-        total_questions=total_questions,
-        correct_answers=correct_answers,
-        total_points=total_points,
-        earned_points=earned_points,
+        score=grading.score,
+        total_questions=grading.total_questions,
+        correct_answers=grading.correct_answers,
+        total_points=grading.total_points,
+        earned_points=grading.earned_points,
         answers=result.answers,
-        details=[]  # Пустой массив деталей
+        details=grading.details,
     )
 
-@router.post("/generate-with-ai", response_model=QuizResponse, status_code=status.HTTP_201_CREATED)
+@router.post("/generate-with-ai", response_model=GenerationJobResponse, status_code=status.HTTP_202_ACCEPTED)
 async def generate_quiz_with_ai(
     request: QuizGenerationRequest,
-    db: db_depends,
     user_id: str = Depends(get_current_user_id),
 ):
-    """Generate quiz with AI"""
+    """Queue quiz generation with AI; poll the job or follow its events for the created quiz"""
     try:
-        gemini_service = GeminiService()
-        generated_quiz = await gemini_service.generate_quiz_with_fallback(request)
-        
-        # Преобразуем сгенерированный квиз в формат QuizCreate
-        quiz_data = QuizCreate(
-            title=generated_quiz.title,
-            description=generated_quiz.description,
-            is_ai_generated=True,
-            tags=[],  # Можно добавить автоматические теги
-            questions=[
-                {
-                    "question_type": q["question_type"],
-                    "question_text": q["question_text"],
-                    "points": q["points"],
-                    "answers": [
-                        {
-                            "answer_text": a["answer_text"],
-                            "is_correct": a["is_correct"]
-                        }
-                        for a in q["answers"]
-                    ]
-                }
-                for q in generated_quiz.questions
-            ]
-        )
-        
-        # Создаем квиз в базе данных
-        quiz_service = QuizService(db)
-        quiz = await quiz_service.create_quiz(quiz_data, UUID(user_id))
-        
-        return QuizResponse.model_validate(quiz)
-        
-    except Exception as e:
+        job = await generation_jobs.submit(request, user_id)
+    except GenerationQueueFull:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Ошибка генерации квиза: {str(e)}"
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Слишком много квизов генерируется, попробуйте позже",
+            headers={"Retry-After": "5"},
         )
+    return GenerationJobResponse(**job)
+
+
+async def _get_own_job(job_id: UUID, user_id: str) -> dict:
+    job = await generation_jobs.get(str(job_id))
+    if not job or job["user_id"] != user_id:
+        raise HTTPException(status_code=404, detail="Generation job not found")
+    return job
+
+
+@router.get("/generate-with-ai/{job_id}", response_model=GenerationJobResponse)
+async def get_generation_job(job_id: UUID, user_id: str = Depends(get_current_user_id)):
+    """Get AI generation job status"""
+    return GenerationJobResponse(**await _get_own_job(job_id, user_id))
+
+
+@router.get("/generate-with-ai/{job_id}/events")
+async def stream_generation_job(job_id: UUID, user_id: str = Depends(get_current_user_id)):
+    """
+    Stream AI generation job as server-sent events until it finishes:
+    `status` on every job change and, in streaming mode, `question` for every saved question
+    """
+    await _get_own_job(job_id, user_id)
+
+    async def events():
+        async for event in generation_jobs.watch(str(job_id)):
+            if event is None:
+                # Комментарий SSE держит соединение открытым через прокси
+                yield ": keepalive\n\n"
+                continue
+            name, payload = event
+            if name == "status":
+                data = GenerationJobResponse(**payload).model_dump_json()
+            else:
+                data = json.dumps(payload, ensure_ascii=False)
+            yield f"event: {name}\ndata: {data}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
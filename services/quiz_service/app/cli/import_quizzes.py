@@ -0,0 +1,54 @@
+"""
+Массовый импорт квизов из NDJSON файла напрямую в базу, минуя HTTP.
+
+    python -m services.quiz_service.app.cli.import_quizzes quizzes.ndjson --user-id <uuid>
+
+Каждая строка файла - документ QuizCreate. Отчёт печатается в stdout как JSON.
+"""
+import argparse
+import asyncio
+import sys
+from typing import AsyncIterator, TextIO
+from uuid import UUID
+
+from services.quiz_service.app.config import settings
+from services.quiz_service.app.db import engine, new_session
+from services.quiz_service.app.schemas import QuizImportReport
+from services.quiz_service.app.services.import_service import QuizImporter
+
+
+async def _read_lines(source: TextIO) -> AsyncIterator[str]:
+    for line in source:
+        yield line
+
+
+async def import_file(source: TextIO, user_id: UUID, chunk_size: int) -> QuizImportReport:
+    try:
+        async with new_session() as session:
+            importer = QuizImporter(session, user_id, chunk_size, settings.QUIZ_IMPORT_MAX_LINE_BYTES)
+            return await importer.run(_read_lines(source))
+    finally:
+        await engine.dispose()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Import quizzes from an NDJSON file")
+    parser.add_argument("path", help="NDJSON file with one QuizCreate document per line, '-' for stdin")
+    parser.add_argument("--user-id", type=UUID, required=True, help="Owner of the imported quizzes")
+    parser.add_argument(
+        "--chunk-size", type=int, default=settings.QUIZ_IMPORT_CHUNK_SIZE, help="Quizzes per transaction"
+    )
+    args = parser.parse_args()
+
+    if args.path == "-":
+        report = asyncio.run(import_file(sys.stdin, args.user_id, args.chunk_size))
+    else:
+        with open(args.path, encoding="utf-8") as source:
+            report = asyncio.run(import_file(source, args.user_id, args.chunk_size))
+
+    print(report.model_dump_json(indent=2))
+    return 1 if report.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+"""
+Восстановление общего рейтинга из сохранённых попыток (quiz_result).
+
+    python -m services.quiz_service.app.cli.rebuild_leaderboard
+    python -m services.quiz_service.app.cli.rebuild_leaderboard --reconcile
+    python -m services.quiz_service.app.cli.rebuild_leaderboard --reconcile --prune-unknown
+
+Без флагов рейтинг собирается заново, подменяется атомарно и сверяется с
+базой: так возвращаются баллы, начисленные во время сборки. Попытки, ещё не
+записанные в quiz_result, не учитываются - их выправит следующий --reconcile.
+Пустой или вдвое меньший живого рейтинг подменяется только с --force: иначе
+пропали бы баллы, которых в quiz_result нет.
+
+С --reconcile живой рейтинг сверяется с базой и исправляется на месте. Участники рейтинга
+без попыток в базе удаляются только с --prune-unknown, и их баллы теряются:
+так пропадут и баллы, которых нет в quiz_result (начисленные до него или
+отброшенные буфером попыток), и пользователи, не найденные в auth service.
+Отчёт печатается в stdout как JSON.
+"""
+import argparse
+import asyncio
+import json
+import sys
+from dataclasses import asdict
+
+from services.quiz_service.app.config import settings
+from services.quiz_service.app.db import engine, new_session, redis_client
+from services.quiz_service.app.services.identity_service import identity_resolver
+from services.quiz_service.app.services.leaderboard_rebuild import (
+    LeaderboardRebuilder,
+    LeaderboardRebuildRefused,
+    LeaderboardRebuildReport,
+)
+
+
+async def run(
+    reconcile: bool, chunk_size: int, prune_unknown: bool = False, force: bool = False
+) -> LeaderboardRebuildReport:
+    rebuilder = LeaderboardRebuilder(new_session, chunk_size, prune_unknown=prune_unknown)
+    try:
+        if reconcile:
+            return await rebuilder.reconcile()
+        return await rebuilder.rebuild(force=force)
+    finally:
+        await identity_resolver.stop()
+        await redis_client.aclose()
+        await engine.dispose()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Rebuild the quiz leaderboard from stored attempts. The rebuilt board replaces the live one "
+            "and is then reconciled, which restores points scored during the rebuild; attempts still "
+            "waiting in the write buffer are not counted until the next --reconcile"
+        )
+    )
+    parser.add_argument(
+        "--reconcile", action="store_true", help="Fix drift in the live leaderboard instead of replacing it"
+    )
+    parser.add_argument(
+        "--prune-unknown", action="store_true",
+        help=(
+            "With --reconcile, also remove members that have no stored attempts. "
+            "DATA LOSS: their points are deleted for good, including points that never reached "
+            "quiz_result and users the auth service could not resolve"
+        ),
+    )
+    parser.add_argument(
+        "--force", action="store_true",
+        help=(
+            "Replace the live leaderboard even if the rebuilt one is empty or less than half its size. "
+            "DATA LOSS: points that are not in quiz_result are deleted"
+        ),
+    )
+    parser.add_argument(
+        "--chunk-size", type=int, default=settings.LEADERBOARD_REBUILD_CHUNK_SIZE, help="Users per batch"
+    )
+    args = parser.parse_args()
+    if args.prune_unknown and not args.reconcile:
+        parser.error("--prune-unknown requires --reconcile")
+    if args.force and args.reconcile:
+        parser.error("--force only applies to a rebuild, not to --reconcile")
+
+    try:
+        report = asyncio.run(run(args.reconcile, args.chunk_size, args.prune_unknown, args.force))
+    except LeaderboardRebuildRefused as e:
+        print(f"Leaderboard was not replaced: {e}. Use --reconcile, or --force to replace it anyway", file=sys.stderr)
+        return 1
+    print(json.dumps(asdict(report), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,16 +1,59 @@
 from pathlib import Path
-from pydantic_settings import BaseSettings
+from services.shared.edu_shared.db import DatabaseSettings
+from services.shared.edu_shared.log import LoggingSettings
 
 
-class Settings(BaseSettings):
+class Settings(DatabaseSettings, LoggingSettings):
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
-    DATABASE_URL : str
     GOOGLE_API_KEY : str
     REDIS_URL: str = "redis://redis:6379"
     FRONTEND_URL: str
+
+    # Кэш скомпилированных квизов (L1 - память воркера, L2 - Redis)
+    QUIZ_CACHE_L1_SIZE: int = 1024
+    QUIZ_CACHE_L1_TTL_SECONDS: int = 60
+    QUIZ_CACHE_TTL_SECONDS: int = 3600
+
+    # Auth service: пул соединений и кэш профилей пользователей
+    AUTH_SERVICE_URL: str = "http://auth-service:8000"
+    AUTH_SERVICE_TIMEOUT_SECONDS: float = 5.0
+    AUTH_SERVICE_MAX_CONNECTIONS: int = 20
+    IDENTITY_CACHE_SIZE: int = 10000
+    IDENTITY_CACHE_TTL_SECONDS: int = 300
+    IDENTITY_NEGATIVE_TTL_SECONDS: int = 30
+
+    # Попытки прохождения: write-behind буфер перед quiz_result
+    ATTEMPT_BUFFER_MAX_ROWS: int = 10000
+    ATTEMPT_FLUSH_ROWS: int = 500
+    ATTEMPT_FLUSH_INTERVAL_MS: int = 1000
+
+    # Рейтинги по периодам и по квизам. Дневные ZSET хранятся дольше месяца:
+    # из них собираются недельная и месячная свёртки, которые живут ROLLUP_TTL
+    LEADERBOARD_DAILY_TTL_DAYS: int = 35
+    LEADERBOARD_QUIZ_TTL_DAYS: int = 90
+    LEADERBOARD_ROLLUP_TTL_SECONDS: int = 60
+    # Пользователей в пачке при восстановлении рейтинга из quiz_result
+    LEADERBOARD_REBUILD_CHUNK_SIZE: int = 5000
+
+    # Генерация квизов моделью: бэкенд (gemini или stub), воркеры и очередь заданий
+    AI_GENERATION_BACKEND: str = "gemini"
+    AI_GENERATION_MODEL: str = "gemini-1.5-flash"
+    AI_GENERATION_WORKERS: int = 4
+    AI_GENERATION_MAX_QUEUE: int = 100
+    AI_GENERATION_TIMEOUT_SECONDS: int = 120
+    AI_GENERATION_JOB_TTL_SECONDS: int = 3600
+    AI_STUB_DELAY_SECONDS: float = 0.0
+    # Кэш сгенерированных квизов по содержимому запроса: TTL (0 - выключен)
+    # и сколько раз один результат можно выдать (0 - без ограничения)
+    AI_GENERATION_CACHE_TTL_SECONDS: int = 86400
+    AI_GENERATION_CACHE_MAX_REUSES: int = 0
+
+    # Массовый импорт: квизов в одной транзакции и предел длины строки NDJSON
+    QUIZ_IMPORT_CHUNK_SIZE: int = 500
+    QUIZ_IMPORT_MAX_LINE_BYTES: int = 1024 * 1024
     
     class Config:
         env_file = Path.cwd() / ".env" 
@@ -1,8 +1,6 @@
-from typing import Annotated
-from fastapi import Depends, HTTPException, status
+from fastapi import HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from services.quiz_service.app.models import Quiz, Question, Tag
-from services.quiz_service.app.db import get_session
 from sqlalchemy import select
 from uuid import UUID
 
@@ -41,6 +39,3 @@ async def get_tag_by_id(tag_id: UUID, db: AsyncSession) -> Tag:
             detail="Tag not found"
         )
     return tag
-
-# Dependency for database session
-db_depends = Annotated[AsyncSession, Depends(get_session)]
@@ -1,10 +1,37 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from services.quiz_service.app.api.quiz_router import router as quiz_router
 from services.quiz_service.app.api.leaderboard_router import router as leaderboard_router
 from services.quiz_service.app.config import settings
+from services.quiz_service.app.db import database, redis_client
+from services.quiz_service.app.services.quiz_cache import quiz_cache
+from services.quiz_service.app.services.identity_service import identity_resolver
+from services.quiz_service.app.services.attempt_writer import attempt_writer
+from services.quiz_service.app.services.generation_jobs import generation_jobs
+from services.shared.edu_shared.log import RequestIdMiddleware, configure_logging
+from services.shared.edu_shared.metrics import install_metrics
 
-app = FastAPI(title="Quiz Service", version="1.0.0")
+# Логи через очередь, в том числе записи фоновых компонентов при старте
+configure_logging(settings, "quiz-service")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    quiz_cache.start()
+    await identity_resolver.start()
+    attempt_writer.start()
+    generation_jobs.start()
+    yield
+    await generation_jobs.stop()
+    await attempt_writer.stop()
+    await identity_resolver.stop()
+    await quiz_cache.stop()
+    await database.dispose()
+
+
+app = FastAPI(title="Quiz Service", version="1.0.0", lifespan=lifespan)
+app.state.database = database
 
 app.add_middleware(
     CORSMiddleware,
@@ -14,5 +41,10 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Латентность, SQL/Redis/HTTP на запрос: /metrics и заголовок Server-Timing
+install_metrics(app, database, redis_clients=[redis_client])
+# Снаружи остальных middleware: request id есть во всех записях запроса
+app.add_middleware(RequestIdMiddleware)
+
 app.include_router(quiz_router, prefix="/quiz", tags=["quiz"])
 app.include_router(leaderboard_router, prefix="/api", tags=["leaderboard"])
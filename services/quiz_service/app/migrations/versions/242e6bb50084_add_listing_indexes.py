@@ -0,0 +1,32 @@
+"""add listing indexes
+
+Revision ID: 242e6bb50084
+Revises: 75f9b966d729
+Create Date: 2026-10-17 09:12:40.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '242e6bb50084'
+down_revision: Union[str, Sequence[str], None] = '75f9b966d729'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(op.f('ix_quiz_quiz_user_id'), 'quiz', ['user_id'], unique=False, schema='quiz')
+    op.create_index(op.f('ix_quiz_question_quiz_id'), 'question', ['quiz_id'], unique=False, schema='quiz')
+    op.create_index(op.f('ix_quiz_answer_question_id'), 'answer', ['question_id'], unique=False, schema='quiz')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_quiz_answer_question_id'), table_name='answer', schema='quiz')
+    op.drop_index(op.f('ix_quiz_question_quiz_id'), table_name='question', schema='quiz')
+    op.drop_index(op.f('ix_quiz_quiz_user_id'), table_name='quiz', schema='quiz')
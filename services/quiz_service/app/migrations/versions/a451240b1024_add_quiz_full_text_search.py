@@ -0,0 +1,60 @@
+"""add quiz full text search
+
+Revision ID: a451240b1024
+Revises: fdfd2dd45a2e
+Create Date: 2026-10-17 12:41:09.305117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a451240b1024'
+down_revision: Union[str, Sequence[str], None] = 'fdfd2dd45a2e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Копия выражения из models.py: миграция не должна зависеть от кода моделей
+SEARCH_VECTOR_EXPRESSION = (
+    "setweight(to_tsvector('russian', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('russian', coalesce(description, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(description, '')), 'B')"
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.add_column(
+        'quiz',
+        sa.Column(
+            'search_vector',
+            postgresql.TSVECTOR(),
+            sa.Computed(SEARCH_VECTOR_EXPRESSION, persisted=True),
+            nullable=True,
+        ),
+        schema='quiz',
+    )
+    op.create_index('ix_quiz_search_vector', 'quiz', ['search_vector'], unique=False, schema='quiz', postgresql_using='gin')
+    op.create_index(
+        'ix_quiz_title_trgm', 'quiz', ['title'], unique=False, schema='quiz',
+        postgresql_using='gin', postgresql_ops={'title': 'gin_trgm_ops'},
+    )
+    op.create_index(
+        'ix_quiz_description_trgm', 'quiz', ['description'], unique=False, schema='quiz',
+        postgresql_using='gin', postgresql_ops={'description': 'gin_trgm_ops'},
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_quiz_description_trgm', table_name='quiz', schema='quiz', postgresql_using='gin')
+    op.drop_index('ix_quiz_title_trgm', table_name='quiz', schema='quiz', postgresql_using='gin')
+    op.drop_index('ix_quiz_search_vector', table_name='quiz', schema='quiz', postgresql_using='gin')
+    op.drop_column('quiz', 'search_vector', schema='quiz')
@@ -0,0 +1,55 @@
+"""store quiz attempts
+
+Revision ID: bc3d62051f52
+Revises: e2924e5c0893
+Create Date: 2026-10-17 15:02:18.471390
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'bc3d62051f52'
+down_revision: Union[str, Sequence[str], None] = 'e2924e5c0893'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('quiz_result', sa.Column('details', postgresql.JSONB(astext_type=sa.Text()), nullable=True), schema='quiz')
+    op.add_column('quiz_result', sa.Column('duration_ms', sa.Integer(), nullable=True), schema='quiz')
+    op.add_column('quiz_result', sa.Column('quiz_title', sa.String(), nullable=True), schema='quiz')
+    op.execute(
+        "UPDATE quiz.quiz_result AS r SET quiz_title = q.title FROM quiz.quiz AS q WHERE q.id = r.quiz_id"
+    )
+    # Удаление квиза не трогает историю попыток, ссылка на квиз просто обнуляется
+    op.alter_column('quiz_result', 'quiz_id', existing_type=sa.UUID(), nullable=True, schema='quiz')
+    op.drop_constraint('quiz_result_quiz_id_fkey', 'quiz_result', schema='quiz', type_='foreignkey')
+    op.create_foreign_key(
+        'quiz_result_quiz_id_fkey', 'quiz_result', 'quiz', ['quiz_id'], ['id'],
+        source_schema='quiz', referent_schema='quiz', ondelete='SET NULL',
+    )
+    op.create_index('ix_quiz_result_user_id_created_at', 'quiz_result', ['user_id', 'created_at'], unique=False, schema='quiz')
+    op.create_index('ix_quiz_result_quiz_id_created_at', 'quiz_result', ['quiz_id', 'created_at'], unique=False, schema='quiz')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_quiz_result_quiz_id_created_at', table_name='quiz_result', schema='quiz')
+    op.drop_index('ix_quiz_result_user_id_created_at', table_name='quiz_result', schema='quiz')
+    op.drop_constraint('quiz_result_quiz_id_fkey', 'quiz_result', schema='quiz', type_='foreignkey')
+    op.create_foreign_key(
+        'quiz_result_quiz_id_fkey', 'quiz_result', 'quiz', ['quiz_id'], ['id'],
+        source_schema='quiz', referent_schema='quiz',
+    )
+    # Попытки удалённых квизов в старой схеме не хранились
+    op.execute("DELETE FROM quiz.quiz_result WHERE quiz_id IS NULL")
+    op.alter_column('quiz_result', 'quiz_id', existing_type=sa.UUID(), nullable=False, schema='quiz')
+    op.drop_column('quiz_result', 'quiz_title', schema='quiz')
+    op.drop_column('quiz_result', 'duration_ms', schema='quiz')
+    op.drop_column('quiz_result', 'details', schema='quiz')
@@ -0,0 +1,52 @@
+"""unique tag names
+
+Revision ID: e2924e5c0893
+Revises: a451240b1024
+Create Date: 2026-10-17 13:27:51.664021
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2924e5c0893'
+down_revision: Union[str, Sequence[str], None] = 'a451240b1024'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Склеиваем дубли (без учёта регистра и пробелов по краям) в самый старый тег
+    op.execute("""
+        CREATE TEMPORARY TABLE tag_merge ON COMMIT DROP AS
+        SELECT id AS duplicate_id, first_value(id) OVER (
+            PARTITION BY lower(btrim(name)) ORDER BY created_at, id
+        ) AS tag_id
+        FROM quiz.tag
+    """)
+    op.execute("DELETE FROM tag_merge WHERE duplicate_id = tag_id")
+    op.execute("""
+        INSERT INTO quiz.quiz_tag_association (quiz_id, tag_id)
+        SELECT a.quiz_id, m.tag_id
+        FROM quiz.quiz_tag_association a
+        JOIN tag_merge m ON m.duplicate_id = a.tag_id
+        ON CONFLICT DO NOTHING
+    """)
+    op.execute("""
+        DELETE FROM quiz.quiz_tag_association a
+        USING tag_merge m
+        WHERE a.tag_id = m.duplicate_id
+    """)
+    op.execute("DELETE FROM quiz.tag t USING tag_merge m WHERE t.id = m.duplicate_id")
+    op.execute("UPDATE quiz.tag SET name = btrim(name) WHERE name <> btrim(name)")
+    op.create_index('ix_quiz_tag_lower_name', 'tag', [sa.text('lower(name)')], unique=True, schema='quiz')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Склеенные дубли не восстанавливаются
+    op.drop_index('ix_quiz_tag_lower_name', table_name='tag', schema='quiz')
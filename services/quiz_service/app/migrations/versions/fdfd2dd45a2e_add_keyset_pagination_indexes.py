@@ -0,0 +1,37 @@
+"""add keyset pagination indexes
+
+Revision ID: fdfd2dd45a2e
+Revises: 242e6bb50084
+Create Date: 2026-10-17 11:03:27.540917
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'fdfd2dd45a2e'
+down_revision: Union[str, Sequence[str], None] = '242e6bb50084'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Составной индекс покрывает и поиск по user_id
+    op.drop_index(op.f('ix_quiz_quiz_user_id'), table_name='quiz', schema='quiz')
+    op.create_index('ix_quiz_user_id_created_at_id', 'quiz', ['user_id', 'created_at', 'id'], unique=False, schema='quiz')
+    op.create_index('ix_quiz_created_at_id', 'quiz', ['created_at', 'id'], unique=False, schema='quiz')
+    op.create_index('ix_quiz_updated_at_id', 'quiz', ['updated_at', 'id'], unique=False, schema='quiz')
+    op.create_index('ix_quiz_title_id', 'quiz', ['title', 'id'], unique=False, schema='quiz')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_quiz_title_id', table_name='quiz', schema='quiz')
+    op.drop_index('ix_quiz_updated_at_id', table_name='quiz', schema='quiz')
+    op.drop_index('ix_quiz_created_at_id', table_name='quiz', schema='quiz')
+    op.drop_index('ix_quiz_user_id_created_at_id', table_name='quiz', schema='quiz')
+    op.create_index(op.f('ix_quiz_quiz_user_id'), 'quiz', ['user_id'], unique=False, schema='quiz')
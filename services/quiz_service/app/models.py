@@ -1,9 +1,9 @@
 import uuid
-from sqlalchemy import Column, String, DateTime, Boolean, Table, ForeignKey, Integer
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, String, DateTime, Boolean, Table, ForeignKey, Integer, Index, Computed
+from sqlalchemy.dialects.postgresql import UUID, TSVECTOR, JSONB
 from services.quiz_service.app.db import Base
 from sqlalchemy.types import Enum as SQLAlchemyEnum
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, deferred
 from sqlalchemy.sql import func
 from enum import Enum
 
@@ -15,9 +15,34 @@ quiz_tag_association = Table(
     schema="quiz" 
 )
 
+# Контент по умолчанию русский (language="ru"), но встречается и английский,
+# поэтому индексируем обеими конфигурациями; заголовок весит больше описания
+SEARCH_CONFIGS = ("russian", "english")
+SEARCH_VECTOR_EXPRESSION = " || ".join(
+    f"setweight(to_tsvector('{config}', coalesce({column}, '')), '{weight}')"
+    for column, weight in (("title", "A"), ("description", "B"))
+    for config in SEARCH_CONFIGS
+)
+
 class Quiz(Base):
     __tablename__ = "quiz"
-    __table_args__ = {"schema": "quiz"}
+    __table_args__ = (
+        # Индексы под keyset-пагинацию: (колонка сортировки, id)
+        Index("ix_quiz_user_id_created_at_id", "user_id", "created_at", "id"),
+        Index("ix_quiz_created_at_id", "created_at", "id"),
+        Index("ix_quiz_updated_at_id", "updated_at", "id"),
+        Index("ix_quiz_title_id", "title", "id"),
+        # Полнотекстовый поиск и триграммы для поиска подстроки (ILIKE)
+        Index("ix_quiz_search_vector", "search_vector", postgresql_using="gin"),
+        Index("ix_quiz_title_trgm", "title", postgresql_using="gin", postgresql_ops={"title": "gin_trgm_ops"}),
+        Index(
+            "ix_quiz_description_trgm",
+            "description",
+            postgresql_using="gin",
+            postgresql_ops={"description": "gin_trgm_ops"},
+        ),
+        {"schema": "quiz"},
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     title = Column(String, nullable=False)
@@ -25,6 +50,8 @@ class Quiz(Base):
     is_ai_generated = Column(Boolean, nullable=False, default=False)
     created_at = Column(DateTime, nullable=False, default=func.now())
     updated_at = Column(DateTime, nullable=False, default=func.now(), onupdate=func.now())
+    # Поддерживается самим Postgres, в ORM не загружаем
+    search_vector = deferred(Column(TSVECTOR, Computed(SEARCH_VECTOR_EXPRESSION, persisted=True)))
     
     tags = relationship("Tag", secondary=quiz_tag_association, back_populates="quizzes", lazy="joined")
     questions = relationship("Question", back_populates="quiz", lazy="joined", cascade="all, delete-orphan")
@@ -47,13 +74,16 @@ class Tag(Base):
     updated_at = Column(DateTime, nullable=False, default=func.now(), onupdate=func.now())
     
     quizzes = relationship("Quiz", secondary=quiz_tag_association, back_populates="tags", lazy="joined")
+
+# Имя тега уникально без учёта регистра, на нём держится upsert в get_or_create_tags
+Index("ix_quiz_tag_lower_name", func.lower(Tag.name), unique=True)
     
 class Question(Base):
     __tablename__ = "question"
     __table_args__ = {"schema": "quiz"}
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    quiz_id = Column(UUID(as_uuid=True), ForeignKey("quiz.quiz.id"), nullable=False)
+    quiz_id = Column(UUID(as_uuid=True), ForeignKey("quiz.quiz.id"), nullable=False, index=True)
     question_type = Column(SQLAlchemyEnum(QuestionType), nullable=False)
     question_text = Column(String, nullable=False)
     points = Column(Integer, nullable=False, default=1)  # Количество баллов за вопрос
@@ -68,9 +98,31 @@ class Answer(Base):
     __table_args__ = {"schema": "quiz"}
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    question_id = Column(UUID(as_uuid=True), ForeignKey("quiz.question.id"), nullable=False)
+    question_id = Column(UUID(as_uuid=True), ForeignKey("quiz.question.id"), nullable=False, index=True)
     answer_text = Column(String, nullable=False)
     is_correct = Column(Boolean, nullable=False, default=False)
     question = relationship("Question", back_populates="answers", lazy="joined")
 
 
+class QuizResult(Base):
+    """Попытка прохождения квиза, пишется пачками через AttemptWriter"""
+    __tablename__ = "quiz_result"
+    __table_args__ = (
+        Index("ix_quiz_result_user_id_created_at", "user_id", "created_at"),
+        Index("ix_quiz_result_quiz_id_created_at", "quiz_id", "created_at"),
+        {"schema": "quiz"},
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    # История попыток переживает квиз: при удалении квиза остаётся NULL и quiz_title
+    quiz_id = Column(UUID(as_uuid=True), ForeignKey("quiz.quiz.id", ondelete="SET NULL"), nullable=True)
+    quiz_title = Column(String, nullable=True)  # Название квиза на момент попытки
+    user_id = Column(UUID(as_uuid=True), nullable=False)
+    score = Column(Integer, nullable=False)
+    total_questions = Column(Integer, nullable=False)
+    correct_answers = Column(Integer, nullable=False)
+    total_points = Column(Integer, nullable=False)
+    earned_points = Column(Integer, nullable=False)
+    details = Column(JSONB, nullable=True)  # Результат по каждому вопросу
+    duration_ms = Column(Integer, nullable=True)  # Время прохождения по данным клиента
+    created_at = Column(DateTime, nullable=False, default=func.now())
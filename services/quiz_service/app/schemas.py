@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, field_validator
-from typing import List, Optional
+from typing import Dict, List, Optional, Union
 from uuid import UUID
 from datetime import datetime
 from enum import Enum
@@ -10,6 +10,12 @@ class QuestionType(str, Enum):
     TEXT_ANSWER = "long_answer"
     SINGLE_CHOICE = "single_choice"
 
+class GenerationJobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
 # Base schemas
 class TagBase(BaseModel):
     name: str = Field(..., min_length=1, max_length=50)
@@ -118,6 +124,22 @@ class QuizListResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class QuizSummaryResponse(BaseModel):
+    """Облегчённая карточка квиза для списков: агрегаты считает SQL"""
+    id: UUID
+    title: str
+    description: str
+    is_ai_generated: bool
+    user_id: UUID
+    created_at: datetime
+    updated_at: datetime
+    tags: List[str]
+    question_count: int
+    total_points: int
+
+    class Config:
+        from_attributes = True
+
 # Search and filter schemas
 class QuizSearchParams(BaseModel):
     title: Optional[str] = None
@@ -139,6 +161,7 @@ class QuizResult(BaseModel):
     score: Optional[int] = None
     total_questions: Optional[int] = None
     correct_answers: Optional[int] = None
+    duration_ms: Optional[int] = Field(None, ge=0, description="Время прохождения квиза, мс")
 
 class QuizResultResponse(BaseModel):
     score: int
@@ -149,14 +172,36 @@ class QuizResultResponse(BaseModel):
     answers: List[QuizAnswer]
     details: List[dict]  # Детальная информация по каждому вопросу
 
+# Bulk import schemas
+class QuizImportError(BaseModel):
+    line: int  # Номер строки NDJSON, с единицы
+    error: str
+
+class QuizImportReport(BaseModel):
+    imported: int = 0
+    failed: int = 0
+    errors: List[QuizImportError] = []  # Первые ошибки, failed считает все
+
+# AI generation job schemas
+class GenerationJobResponse(BaseModel):
+    job_id: UUID
+    status: GenerationJobStatus
+    quiz_id: Optional[UUID] = None  # Созданный квиз; в потоковом режиме - с первого вопроса
+    error: Optional[str] = None  # Причина, когда status = failed (или partial)
+    questions_generated: Optional[int] = None  # Сохранено вопросов, в потоковом режиме
+    partial: bool = False  # Поток оборвался, квиз сохранён с уже готовыми вопросами
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
 # Pagination response
 class PaginatedQuizResponse(BaseModel):
-    items: List[QuizListResponse]
-    total: int
+    items: List[Union[QuizSummaryResponse, QuizListResponse]]
+    total: Optional[int] = None  # Только если запрошен include_total
     limit: int
-    offset: int
+    next_cursor: Optional[str] = None
     has_next: bool
     has_prev: bool
+    facets: Optional[Dict[str, int]] = None  # Тег -> число найденных квизов, если запрошены facets
 
 # Leaderboard schemas
 class UserData(BaseModel):
@@ -0,0 +1,148 @@
+import asyncio
+import logging
+from contextlib import suppress
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from services.quiz_service.app.config import settings
+from services.quiz_service.app.db import new_session
+from services.quiz_service.app.models import Quiz, QuizResult
+
+logger = logging.getLogger(__name__)
+
+
+class AttemptWriter:
+    """
+    Write-behind буфер попыток прохождения квизов.
+
+    Проверка ответа только кладёт строку в память, фоновая задача пишет
+    накопленное пакетным INSERT (executemany) раз в flush_interval_ms или
+    как только набралось flush_rows строк. Буфер ограничен max_rows: при переполнении
+    (например, база недоступна) новые попытки отбрасываются с предупреждением,
+    а не тормозят проверку. При остановке сервиса буфер дописывается.
+    """
+
+    # Повторы записи пачки при ошибке базы
+    FLUSH_ATTEMPTS = 3
+    RETRY_DELAY_SECONDS = 1.0
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        max_rows: int,
+        flush_rows: int,
+        flush_interval_ms: int,
+    ):
+        self.session_factory = session_factory
+        self.max_rows = max_rows
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval_ms / 1000
+        self._buffer: List[Dict[str, Any]] = []
+        self._has_rows = asyncio.Event()
+        self._batch_ready = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._inflight: Optional[asyncio.Future] = None
+        self.dropped = 0
+
+    def submit(self, attempt: Dict[str, Any]) -> bool:
+        """Кладёт строку quiz_result в буфер, False если буфер переполнен"""
+        if len(self._buffer) >= self.max_rows:
+            self.dropped += 1
+            logger.warning("Attempt buffer is full (%d rows), dropping attempt", self.max_rows)
+            return False
+
+        self._buffer.append(attempt)
+        self._has_rows.set()
+        if len(self._buffer) >= self.flush_rows:
+            self._batch_ready.set()
+        return True
+
+    def _take_batch(self) -> List[Dict[str, Any]]:
+        batch = self._buffer[:self.flush_rows]
+        del self._buffer[:self.flush_rows]
+        if not self._buffer:
+            self._has_rows.clear()
+        if len(self._buffer) < self.flush_rows:
+            self._batch_ready.clear()
+        return batch
+
+    async def _detach_deleted_quizzes(self, batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        # Квиз могли удалить, пока попытка ждала в буфере: попытку сохраняем без
+        # ссылки на квиз, как и те, что уже были в базе при его удалении
+        quiz_ids = {row["quiz_id"] for row in batch if row["quiz_id"] is not None}
+        async with self.session_factory() as session:
+            existing = set((await session.scalars(select(Quiz.id).where(Quiz.id.in_(quiz_ids)))).all())
+        detached = 0
+        rows = []
+        for row in batch:
+            if row["quiz_id"] is not None and row["quiz_id"] not in existing:
+                row = {**row, "quiz_id": None}
+                detached += 1
+            rows.append(row)
+        if detached:
+            logger.info("Storing %d quiz attempts of deleted quizzes without the quiz reference", detached)
+        return rows
+
+    async def _write(self, batch: List[Dict[str, Any]]) -> None:
+        # Никаких исключений наружу: иначе фоновая задача записи остановится навсегда
+        detach_deleted_quizzes = False
+        for attempt in range(1, self.FLUSH_ATTEMPTS + 1):
+            try:
+                if detach_deleted_quizzes:
+                    batch = await self._detach_deleted_quizzes(batch)
+                async with self.session_factory() as session:
+                    await session.execute(insert(QuizResult.__table__), batch)
+                    await session.commit()
+                return
+            except IntegrityError as e:
+                # Одна строка удалённого квиза не должна терять остальную пачку:
+                # следующая попытка сначала уберёт у таких строк ссылку на квиз
+                detach_deleted_quizzes = True
+                error = str(e.orig)
+            except Exception as e:
+                # Без SQL и параметров: в пачке их тысячи
+                error = str(getattr(e, "orig", None) or e)
+            if attempt == self.FLUSH_ATTEMPTS:
+                self.dropped += len(batch)
+                logger.error("Failed to store %d quiz attempts, dropping them: %s", len(batch), error)
+                return
+            logger.warning("Failed to store %d quiz attempts (attempt %d): %s", len(batch), attempt, error)
+            await asyncio.sleep(self.RETRY_DELAY_SECONDS * attempt)
+
+    async def _run(self) -> None:
+        while True:
+            await self._has_rows.wait()
+            # Ждём полную пачку, но не дольше интервала
+            with suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._batch_ready.wait(), self.flush_interval)
+            # Запись не прерываем отменой задачи, stop() её дождётся
+            self._inflight = asyncio.ensure_future(self._write(self._take_batch()))
+            await asyncio.shield(self._inflight)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Останавливает фоновую запись и дописывает всё, что осталось в буфере"""
+        if self._task is not None:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        if self._inflight is not None:
+            await self._inflight
+            self._inflight = None
+        while self._buffer:
+            await self._write(self._take_batch())
+
+
+attempt_writer = AttemptWriter(
+    new_session,
+    max_rows=settings.ATTEMPT_BUFFER_MAX_ROWS,
+    flush_rows=settings.ATTEMPT_FLUSH_ROWS,
+    flush_interval_ms=settings.ATTEMPT_FLUSH_INTERVAL_MS,
+)
@@ -1,30 +1,127 @@
+import asyncio
 import google.generativeai as genai
-from typing import List, Dict, Any
+from functools import lru_cache
+from typing import TYPE_CHECKING, AsyncIterator, List, Dict, Any, Optional, Protocol
 import json
+import logging
 import os
 from pydantic import BaseModel
 from services.quiz_service.app.config import settings
 
+if TYPE_CHECKING:
+    from services.quiz_service.app.services.generation_cache import GenerationCache
+
+logger = logging.getLogger(__name__)
+
 class QuizGenerationRequest(BaseModel):
     topic: str
     difficulty: str = "medium"  # easy, medium, hard
     question_count: int = 5
     question_types: List[str] = ["multiple_choice", "single_choice", "long_answer"]
     language: str = "ru"
+    use_cache: bool = True  # False - всегда генерировать новый вариант
+    stream: bool = False  # True - сохранять вопросы по мере генерации
 
 class QuizGenerationResponse(BaseModel):
     title: str
     description: str
     questions: List[Dict[str, Any]]
 
-class GeminiService:
-    def __init__(self):
-        api_key = settings.GOOGLE_API_KEY
+
+class QuizGenerationBackend(Protocol):
+    """Модель, которая по промпту возвращает текст ответа (JSON квиза)"""
+
+    async def generate(self, prompt: str, request: QuizGenerationRequest) -> str:
+        ...
+
+    def stream(self, prompt: str, request: QuizGenerationRequest) -> AsyncIterator[str]:
+        """Тот же ответ кусками текста по мере генерации"""
+        ...
+
+
+class GeminiBackend:
+    def __init__(self, api_key: str, model_name: str):
         if not api_key:
             raise ValueError("GEMINI_API_KEY environment variable is required")
         
         genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('gemini-1.5-flash')
+        self.model = genai.GenerativeModel(model_name)
+
+    async def generate(self, prompt: str, request: QuizGenerationRequest) -> str:
+        # Асинхронный вызов SDK: event loop не блокируется на время генерации
+        response = await self.model.generate_content_async(prompt)
+        return response.text
+
+    async def stream(self, prompt: str, request: QuizGenerationRequest) -> AsyncIterator[str]:
+        response = await self.model.generate_content_async(prompt, stream=True)
+        async for chunk in response:
+            yield chunk.text
+
+
+class StubBackend:
+    """Детерминированный квиз без обращения к модели, для тестов и локальной разработки"""
+
+    # Размер куска текста в потоковом режиме
+    STREAM_CHUNK_SIZE = 64
+
+    def __init__(self, delay_seconds: float = 0.0):
+        self.delay_seconds = delay_seconds
+
+    async def generate(self, prompt: str, request: QuizGenerationRequest) -> str:
+        if self.delay_seconds:
+            await asyncio.sleep(self.delay_seconds)
+        return self._quiz_text(request)
+
+    async def stream(self, prompt: str, request: QuizGenerationRequest) -> AsyncIterator[str]:
+        # Задержка растягивается на весь поток, как у модели, печатающей ответ
+        text = self._quiz_text(request)
+        chunks = [text[i:i + self.STREAM_CHUNK_SIZE] for i in range(0, len(text), self.STREAM_CHUNK_SIZE)]
+        for chunk in chunks:
+            if self.delay_seconds:
+                await asyncio.sleep(self.delay_seconds / len(chunks))
+            yield chunk
+
+    def _quiz_text(self, request: QuizGenerationRequest) -> str:
+        question_types = request.question_types or ["single_choice"]
+        questions = []
+        for i in range(request.question_count):
+            question_type = question_types[i % len(question_types)]
+            if question_type == "long_answer":
+                answers = [{"answer_text": f"Ответ {i + 1}", "is_correct": True}]
+            else:
+                answers = [
+                    {"answer_text": f"Вариант {j + 1}", "is_correct": j == 0 or (question_type == "multiple_choice" and j == 1)}
+                    for j in range(4)
+                ]
+            questions.append({
+                "question_text": f"Вопрос {i + 1} по теме '{request.topic}'",
+                "question_type": question_type,
+                "points": 1,
+                "answers": answers,
+            })
+        
+        return json.dumps({
+            "title": f"Квиз по теме: {request.topic}",
+            "description": f"Тестовый квиз по теме '{request.topic}'",
+            "questions": questions,
+        }, ensure_ascii=False)
+
+
+@lru_cache
+def get_generation_backend() -> QuizGenerationBackend:
+    """Бэкенд из AI_GENERATION_BACKEND, один на процесс (SDK настраивается один раз)"""
+    if settings.AI_GENERATION_BACKEND == "stub":
+        return StubBackend(settings.AI_STUB_DELAY_SECONDS)
+    if settings.AI_GENERATION_BACKEND == "gemini":
+        return GeminiBackend(settings.GOOGLE_API_KEY, settings.AI_GENERATION_MODEL)
+    raise ValueError(f"Unknown AI_GENERATION_BACKEND: {settings.AI_GENERATION_BACKEND}")
+
+
+class GeminiService:
+    def __init__(self, backend: Optional[QuizGenerationBackend] = None, cache: Optional["GenerationCache"] = None):
+        self.backend = backend or get_generation_backend()
+        # Одинаковые запросы получают уже сгенерированный квиз
+        self.cache = cache
 
     def _create_prompt(self, request: QuizGenerationRequest) -> str:
         """Создает промпт для генерации квиза"""
@@ -94,10 +191,10 @@ class GeminiService:
         try:
             prompt = self._create_prompt(request)
             
-            response = self.model.generate_content(prompt)
+            response_text = await self.backend.generate(prompt, request)
             
             # Парсим JSON ответ
-            content = response.text.strip()
+            content = response_text.strip()
             
             # Убираем возможные markdown блоки
             if content.startswith("```json"):
@@ -114,14 +211,20 @@ class GeminiService:
         except Exception as e:
             raise Exception(f"Ошибка генерации квиза: {str(e)}")
 
+    def stream_quiz(self, request: QuizGenerationRequest) -> AsyncIterator[str]:
+        """Текст ответа модели по мере генерации, разбирается IncrementalQuizParser"""
+        return self.backend.stream(self._create_prompt(request), request)
+
     async def generate_quiz_with_fallback(self, request: QuizGenerationRequest) -> QuizGenerationResponse:
         """Генерирует квиз с fallback логикой"""
         
         try:
+            if self.cache is not None and request.use_cache:
+                return await self.cache.get_or_generate(request, lambda: self.generate_quiz(request))
             return await self.generate_quiz(request)
         except Exception as e:
             # Fallback: создаем простой квиз
-            print(f"Ошибка генерации, используем fallback: {e}")
+            logger.warning("Quiz generation failed, using fallback quiz: %s", e)
             
             return QuizGenerationResponse(
                 title=f"Квиз по теме: {request.topic}",
@@ -0,0 +1,161 @@
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from typing import Awaitable, Callable, Dict, Optional
+from uuid import uuid4
+
+from redis.exceptions import RedisError
+
+from services.quiz_service.app.config import settings
+from services.quiz_service.app.db import redis_client
+from services.quiz_service.app.services.gemini_service import QuizGenerationRequest, QuizGenerationResponse
+
+logger = logging.getLogger(__name__)
+
+Generate = Callable[[], Awaitable[QuizGenerationResponse]]
+
+# Результат и номер его выдачи; промах не создаёт ключ
+_READ_RESULT = """
+local quiz = redis.call('HGET', KEYS[1], 'quiz')
+if not quiz then
+    return false
+end
+return {quiz, redis.call('HINCRBY', KEYS[1], 'uses', 1)}
+"""
+
+# Снимает блокировку, только если она всё ещё наша
+_RELEASE_LOCK = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+_read_result = redis_client.register_script(_READ_RESULT)
+_release_lock = redis_client.register_script(_RELEASE_LOCK)
+
+
+def generation_cache_key(request: QuizGenerationRequest) -> str:
+    """Адрес результата: хэш нормализованных полей запроса"""
+    normalized = {
+        "topic": " ".join(request.topic.split()).casefold(),
+        "difficulty": request.difficulty.strip().lower(),
+        "question_count": request.question_count,
+        "question_types": sorted({qt.strip().lower() for qt in request.question_types}),
+        "language": request.language.strip().lower(),
+    }
+    digest = hashlib.sha256(json.dumps(normalized, sort_keys=True).encode()).hexdigest()
+    return f"quiz_generation_cache:{digest}"
+
+
+class GenerationCache:
+    """
+    Кэш сгенерированных квизов по содержимому запроса.
+
+    Результат живёт ttl секунд и отдаётся из кэша не больше max_reuses раз
+    (0 - без ограничения), после чего генерируется заново. Одинаковые запросы,
+    пришедшие одновременно, ждут одну генерацию: в процессе - общую задачу,
+    между процессами - блокировку в Redis на время генерации. Процесс, который
+    дождался чужой генерации, забирает результат через get(), то есть тоже
+    расходует выдачу. Потоковые задания генерации (request.stream) сюда не
+    сливаются: каждое ведёт свой поток модели и только читает и пишет кэш.
+    """
+
+    # Как часто ждущий процесс проверяет, не появился ли результат
+    POLL_INTERVAL_SECONDS = 0.5
+
+    def __init__(self, ttl: int, max_reuses: int, lock_timeout: float):
+        self.ttl = ttl
+        self.max_reuses = max_reuses
+        self.lock_timeout = lock_timeout
+        self._pending: Dict[str, asyncio.Task] = {}
+
+    async def get(self, key: str) -> Optional[QuizGenerationResponse]:
+        try:
+            reply = await _read_result(keys=[key])
+        except RedisError as e:
+            logger.warning("Generation cache read failed: %s", e)
+            return None
+
+        if not reply:
+            return None
+        quiz, uses = reply
+        if self.max_reuses and uses > self.max_reuses:
+            # Результат исчерпан, следующий запрос получит новый вариант
+            return None
+        return QuizGenerationResponse.model_validate_json(quiz)
+
+    async def put(self, key: str, quiz: QuizGenerationResponse) -> None:
+        try:
+            async with redis_client.pipeline(transaction=True) as pipe:
+                pipe.delete(key)
+                pipe.hset(key, mapping={"quiz": quiz.model_dump_json(), "uses": 0})
+                pipe.expire(key, self.ttl)
+                await pipe.execute()
+        except RedisError as e:
+            logger.warning("Generation cache write failed: %s", e)
+
+    async def get_or_generate(self, request: QuizGenerationRequest, generate: Generate) -> QuizGenerationResponse:
+        """Квиз из кэша или результат generate(), одна генерация на одинаковые запросы"""
+        if not self.ttl:
+            return await generate()
+
+        key = generation_cache_key(request)
+        cached = await self.get(key)
+        if cached is not None:
+            return cached
+
+        task = self._pending.get(key)
+        if task is None:
+            task = asyncio.create_task(self._generate_once(key, generate))
+            self._pending[key] = task
+            task.add_done_callback(lambda _: self._pending.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def _generate_once(self, key: str, generate: Generate) -> QuizGenerationResponse:
+        lock_key = f"{key}:lock"
+        token = str(uuid4())
+        try:
+            locked = await redis_client.set(lock_key, token, nx=True, ex=max(1, int(self.lock_timeout)))
+        except RedisError as e:
+            logger.warning("Generation cache lock failed: %s", e)
+            locked = True
+            token = None
+
+        if not locked:
+            # Тот же запрос генерирует другой процесс: ждём его результат. Под ключом
+            # может лежать исчерпанный прошлый результат, поэтому читаем через get()
+            deadline = time.monotonic() + self.lock_timeout
+            while time.monotonic() < deadline:
+                await asyncio.sleep(self.POLL_INTERVAL_SECONDS)
+                try:
+                    # Блокировку снимают после put(), так что проверяем её до чтения
+                    finished = not await redis_client.exists(lock_key)
+                except RedisError:
+                    break
+                quiz = await self.get(key)
+                if quiz is not None:
+                    return quiz
+                if finished:
+                    # Генерация там не удалась или результат уже разобрали, пробуем сами
+                    break
+
+        try:
+            quiz = await generate()
+            await self.put(key, quiz)
+            return quiz
+        finally:
+            if locked and token is not None:
+                try:
+                    await _release_lock(keys=[lock_key], args=[token])
+                except RedisError:
+                    pass
+
+
+generation_cache = GenerationCache(
+    ttl=settings.AI_GENERATION_CACHE_TTL_SECONDS,
+    max_reuses=settings.AI_GENERATION_CACHE_MAX_REUSES,
+    lock_timeout=settings.AI_GENERATION_TIMEOUT_SECONDS,
+)
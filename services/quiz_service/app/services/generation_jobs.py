@@ -0,0 +1,317 @@
+import asyncio
+import json
+import logging
+from contextlib import suppress
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from uuid import UUID, uuid4
+
+from pydantic import ValidationError
+
+from services.quiz_service.app.config import settings
+from services.quiz_service.app.db import new_session, redis_client
+from services.quiz_service.app.schemas import GenerationJobStatus, QuestionCreate, QuizCreate, QuizResponse, QuizUpdate
+from services.quiz_service.app.services.gemini_service import (
+    GeminiService,
+    QuizGenerationRequest,
+    QuizGenerationResponse,
+)
+from services.quiz_service.app.services.generation_cache import generation_cache, generation_cache_key
+from services.quiz_service.app.services.generation_stream import IncrementalQuizParser
+from services.quiz_service.app.services.quiz_cache import quiz_cache
+from services.quiz_service.app.services.quiz_service import QuizService
+
+logger = logging.getLogger(__name__)
+
+Job = Dict[str, str]
+# Событие канала задания: ("status", задание) или ("question", сохранённый вопрос)
+JobEvent = Tuple[str, Dict[str, Any]]
+
+TERMINAL_STATUSES = (GenerationJobStatus.COMPLETED.value, GenerationJobStatus.FAILED.value)
+
+# Через сколько сохранённых вопросов потоковое задание публикует квиз в кэш;
+# полная версия публикуется в конце задания
+CACHE_PUBLISH_EVERY = 5
+
+
+class GenerationQueueFull(Exception):
+    """Очередь генерации заполнена, задание не принято"""
+
+
+def build_quiz_create(generated: QuizGenerationResponse) -> QuizCreate:
+    """Преобразует сгенерированный квиз в формат QuizCreate"""
+    return QuizCreate(
+        title=generated.title,
+        description=generated.description,
+        is_ai_generated=True,
+        tags=[],  # Можно добавить автоматические теги
+        questions=[
+            {
+                "question_type": q["question_type"],
+                "question_text": q["question_text"],
+                "points": q["points"],
+                "answers": [
+                    {
+                        "answer_text": a["answer_text"],
+                        "is_correct": a["is_correct"]
+                    }
+                    for a in q["answers"]
+                ]
+            }
+            for q in generated.questions
+        ]
+    )
+
+
+class GenerationJobQueue:
+    """
+    Очередь заданий генерации квизов моделью.
+
+    POST только ставит задание в очередь; workers фоновых задач вызывают
+    модель и сохраняют квиз, так что одновременно идёт не больше workers
+    генераций, а запросы к квизам не ждут модель. Статус задания хранится
+    в Redis (HASH с TTL), каждое изменение публикуется в канал задания для SSE.
+    С request.stream квиз создаётся по первому готовому вопросу и дополняется
+    по мере генерации, каждый вопрос тоже публикуется в канал.
+    Очередь живёт в памяти процесса: при остановке сервиса незавершённые
+    задания помечаются failed.
+    """
+
+    KEY_PREFIX = "quiz_generation_job"
+
+    def __init__(self, workers: int, max_queue: int, timeout: float, job_ttl: int):
+        self.workers = workers
+        self.timeout = timeout
+        self.job_ttl = job_ttl
+        self._queue: asyncio.Queue[Tuple[str, QuizGenerationRequest, str]] = asyncio.Queue(max_queue)
+        self._tasks: List[asyncio.Task] = []
+
+    def _key(self, job_id: str) -> str:
+        return f"{self.KEY_PREFIX}:{job_id}"
+
+    def _channel(self, job_id: str) -> str:
+        return f"{self.KEY_PREFIX}:{job_id}:events"
+
+    async def _update(self, job_id: str, fields: Job) -> Job:
+        fields = {**fields, "updated_at": datetime.now(timezone.utc).isoformat()}
+        async with redis_client.pipeline(transaction=True) as pipe:
+            pipe.hset(self._key(job_id), mapping=fields)
+            pipe.expire(self._key(job_id), self.job_ttl)
+            pipe.hgetall(self._key(job_id))
+            _, _, job = await pipe.execute()
+        await self._publish(job_id, "status", job)
+        return job
+
+    async def _publish(self, job_id: str, event: str, data: Dict[str, Any]) -> None:
+        await redis_client.publish(self._channel(job_id), json.dumps({"event": event, "data": data}))
+
+    async def submit(self, request: QuizGenerationRequest, user_id: str) -> Job:
+        """Ставит задание в очередь, GenerationQueueFull если мест нет"""
+        if self._queue.full():
+            raise GenerationQueueFull()
+
+        job_id = str(uuid4())
+        job = await self._update(job_id, {
+            "job_id": job_id,
+            "user_id": user_id,
+            "status": GenerationJobStatus.QUEUED.value,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+        })
+        try:
+            self._queue.put_nowait((job_id, request, user_id))
+        except asyncio.QueueFull:
+            # Пока записывался статус, последние места заняли другие запросы:
+            # задание не принято, его статус не должен висеть в queued
+            await redis_client.delete(self._key(job_id))
+            raise GenerationQueueFull()
+        return job
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        job = await redis_client.hgetall(self._key(job_id))
+        return job or None
+
+    async def watch(self, job_id: str, heartbeat: float = 15.0) -> AsyncIterator[Optional[JobEvent]]:
+        """
+        Текущее состояние задания и все его события до завершения.
+        None - событий не было heartbeat секунд.
+        """
+        async with redis_client.pubsub() as pubsub:
+            # Подписываемся до чтения состояния, чтобы не пропустить изменение между ними
+            await pubsub.subscribe(self._channel(job_id))
+            job = await self.get(job_id)
+            if job is None:
+                return
+            yield "status", job
+
+            while job["status"] not in TERMINAL_STATUSES:
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=heartbeat)
+                if message is None:
+                    # Задание могло истечь по TTL, пока мы ждали
+                    if await self.get(job_id) is None:
+                        return
+                    yield None
+                    continue
+                message = json.loads(message["data"])
+                if message["event"] == "status":
+                    job = message["data"]
+                yield message["event"], message["data"]
+
+    async def _run_job(self, job_id: str, request: QuizGenerationRequest, user_id: str) -> None:
+        await self._update(job_id, {"status": GenerationJobStatus.RUNNING.value})
+        try:
+            if request.stream:
+                await self._run_streaming_job(job_id, request, user_id)
+                return
+
+            generated = await asyncio.wait_for(
+                GeminiService(cache=generation_cache).generate_quiz_with_fallback(request), self.timeout
+            )
+            async with new_session() as session:
+                quiz = await QuizService(session).create_quiz(build_quiz_create(generated), UUID(user_id))
+            await self._update(job_id, {"status": GenerationJobStatus.COMPLETED.value, "quiz_id": str(quiz.id)})
+        except asyncio.CancelledError:
+            # Сервис останавливается: клиент не должен ждать задание вечно
+            await asyncio.shield(
+                self._update(job_id, {"status": GenerationJobStatus.FAILED.value, "error": "Generation was interrupted"})
+            )
+            raise
+        except Exception as e:
+            logger.exception("Quiz generation job %s failed", job_id)
+            error = "Generation timed out" if isinstance(e, asyncio.TimeoutError) else str(e)
+            await self._update(job_id, {"status": GenerationJobStatus.FAILED.value, "error": error})
+
+    async def _run_streaming_job(self, job_id: str, request: QuizGenerationRequest, user_id: str) -> None:
+        """
+        Сохраняет вопросы по одному, как только модель допишет каждый. Если поток
+        оборвался или вышел таймаут, квиз остаётся с готовыми вопросами (partial).
+
+        В отличие от обычных заданий, generation_cache.get_or_generate здесь не
+        используется: одинаковые потоковые задания не ждут друг друга, каждое
+        ведёт свой поток модели (клиент ждёт вопросы сразу, а не итог чужой
+        генерации). Кэш только читается до старта и пополняется полным квизом.
+        """
+        key = generation_cache_key(request)
+        if request.use_cache and generation_cache.ttl:
+            cached = await generation_cache.get(key)
+            if cached is not None:
+                async with new_session() as session:
+                    quiz = await QuizService(session).create_quiz(build_quiz_create(cached), UUID(user_id))
+                await self._update(job_id, {
+                    "status": GenerationJobStatus.COMPLETED.value,
+                    "quiz_id": str(quiz.id),
+                    "questions_generated": str(len(cached.questions)),
+                })
+                return
+
+        parser = IncrementalQuizParser()
+        saved: List[Dict[str, Any]] = []
+        error = None
+        async with new_session() as session:
+            quiz_service = QuizService(session)
+            quiz = None
+            try:
+                async with asyncio.timeout(self.timeout):
+                    async for chunk in GeminiService().stream_quiz(request):
+                        for raw in parser.feed(chunk):
+                            try:
+                                question = QuestionCreate.model_validate(raw)
+                            except ValidationError as e:
+                                logger.warning("Skipping invalid generated question in job %s: %s", job_id, e)
+                                continue
+
+                            if quiz is None:
+                                # title и description модель пишет раньше вопросов
+                                quiz = QuizResponse.model_validate(await quiz_service.create_draft_quiz(
+                                    title=(parser.fields.get("title") or f"Квиз по теме: {request.topic}")[:200],
+                                    description=(parser.fields.get("description") or f"Квиз по теме '{request.topic}'")[:1000],
+                                    user_id=UUID(user_id),
+                                ))
+                            # Квиз собирается здесь же, а не перечитывается из базы после каждого вопроса
+                            quiz = await quiz_service.add_question(quiz, question)
+                            saved.append(question.model_dump(mode="json"))
+                            if len(saved) % CACHE_PUBLISH_EVERY == 0:
+                                await quiz_cache.replace(quiz)
+                            await self._update(job_id, {"quiz_id": str(quiz.id), "questions_generated": str(len(saved))})
+                            await self._publish(job_id, "question", {"index": len(saved) - 1, **saved[-1]})
+            except asyncio.TimeoutError:
+                error = "Generation timed out"
+            except Exception as e:
+                logger.warning("Quiz generation stream for job %s was interrupted: %s", job_id, e)
+                error = str(e)
+
+            if quiz is None:
+                await self._update(job_id, {
+                    "status": GenerationJobStatus.FAILED.value,
+                    "error": error or "Model returned no valid questions",
+                })
+                return
+
+            partial = error is not None or not parser.finished
+            # title и description, пришедшие после первого вопроса
+            late_fields = {
+                name: value for name, value in parser.fields.items()
+                if value and value != getattr(quiz, name)
+            }
+            updated = None
+            if late_fields:
+                try:
+                    updated = await quiz_service.update_quiz(quiz.id, QuizUpdate(**late_fields))
+                except ValidationError as e:
+                    logger.warning("Ignoring invalid generated quiz fields in job %s: %s", job_id, e)
+            # update_quiz сам публикует новую версию
+            if updated is None and len(saved) % CACHE_PUBLISH_EVERY:
+                await quiz_cache.replace(quiz)
+
+        if not partial and request.use_cache and generation_cache.ttl:
+            await generation_cache.put(key, QuizGenerationResponse(
+                title=parser.fields.get("title", quiz.title),
+                description=parser.fields.get("description", quiz.description),
+                questions=saved,
+            ))
+        result = {
+            "status": GenerationJobStatus.COMPLETED.value,
+            "quiz_id": str(quiz.id),
+            "questions_generated": str(len(saved)),
+            "partial": "1" if partial else "0",
+        }
+        if error is not None:
+            result["error"] = error
+        await self._update(job_id, result)
+
+    async def _worker(self) -> None:
+        while True:
+            job_id, request, user_id = await self._queue.get()
+            try:
+                await self._run_job(job_id, request, user_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # Например, Redis недоступен при обновлении статуса
+                logger.exception("Failed to process quiz generation job %s", job_id)
+            finally:
+                self._queue.task_done()
+
+    def start(self) -> None:
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            with suppress(asyncio.CancelledError):
+                await task
+        self._tasks = []
+
+        while not self._queue.empty():
+            job_id, _, _ = self._queue.get_nowait()
+            with suppress(Exception):
+                await self._update(job_id, {"status": GenerationJobStatus.FAILED.value, "error": "Generation was interrupted"})
+
+
+generation_jobs = GenerationJobQueue(
+    workers=settings.AI_GENERATION_WORKERS,
+    max_queue=settings.AI_GENERATION_MAX_QUEUE,
+    timeout=settings.AI_GENERATION_TIMEOUT_SECONDS,
+    job_ttl=settings.AI_GENERATION_JOB_TTL_SECONDS,
+)
@@ -0,0 +1,90 @@
+import json
+import re
+from typing import Any, Dict, List, Optional
+
+# Строковые поля квиза вне массива вопросов
+_FIELD = re.compile(r'"(title|description)"\s*:\s*("(?:[^"\\]|\\.)*")')
+_QUESTIONS = re.compile(r'"questions"\s*:\s*\[')
+
+
+class IncrementalQuizParser:
+    """
+    Разбирает JSON квиза по мере поступления текста от модели.
+
+    feed() возвращает вопросы, объекты которых уже закрылись, не дожидаясь
+    конца документа; title и description собираются в fields. Markdown-обёртка
+    вокруг JSON не мешает, а если поток оборвался, уже отданные вопросы
+    остаются целыми. finished - массив вопросов дочитан до конца.
+    """
+
+    def __init__(self):
+        self.fields: Dict[str, str] = {}
+        self.finished = False
+        self.invalid = 0  # Закрывшиеся объекты, которые не разобрались как JSON
+        self._buffer = ""
+        self._in_questions = False
+        self._pos = 0
+        self._start: Optional[int] = None
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    def _collect_fields(self, text: str) -> None:
+        for match in _FIELD.finditer(text):
+            self.fields.setdefault(match.group(1), json.loads(match.group(2)))
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        self._buffer += chunk
+        if self.finished:
+            self._collect_fields(self._buffer)
+            return []
+
+        if not self._in_questions:
+            match = _QUESTIONS.search(self._buffer)
+            self._collect_fields(self._buffer[:match.start()] if match else self._buffer)
+            if not match:
+                return []
+            self._in_questions = True
+            self._buffer = self._buffer[match.end():]
+
+        questions = []
+        buffer = self._buffer
+        i = self._pos
+        while i < len(buffer):
+            char = buffer[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char == "{":
+                if self._depth == 0:
+                    self._start = i
+                self._depth += 1
+            elif char == "}" and self._depth > 0:
+                self._depth -= 1
+                if self._depth == 0:
+                    try:
+                        questions.append(json.loads(buffer[self._start:i + 1]))
+                    except ValueError:
+                        self.invalid += 1
+                    self._start = None
+            elif char == "]" and self._depth == 0:
+                self.finished = True
+                i += 1
+                break
+            i += 1
+
+        # Из буфера выбрасываем всё, что уже разобрано
+        keep = self._start if self._start is not None else i
+        self._buffer = buffer[keep:]
+        self._pos = i - keep
+        if self._start is not None:
+            self._start = 0
+        if self.finished:
+            self._collect_fields(self._buffer)
+        return questions
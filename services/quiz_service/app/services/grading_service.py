@@ -0,0 +1,115 @@
+from dataclasses import dataclass, field
+from typing import Any, Dict, FrozenSet, List, Tuple
+from uuid import UUID
+
+from services.quiz_service.app.schemas import QuestionType, QuizAnswer, QuizResponse
+
+
+@dataclass(frozen=True)
+class QuestionKey:
+    question_id: UUID
+    question_type: QuestionType
+    points: int
+    correct_answer_ids: FrozenSet[str]
+    # Правильные текстовые ответы, уже приведённые к lower().strip()
+    correct_texts: Tuple[str, ...]
+
+
+@dataclass(frozen=True)
+class AnswerKey:
+    """Скомпилированный ключ ответов одной версии квиза"""
+
+    questions: Tuple[QuestionKey, ...]
+    total_points: int
+
+    @classmethod
+    def compile(cls, quiz: QuizResponse) -> "AnswerKey":
+        questions = tuple(
+            QuestionKey(
+                question_id=question.id,
+                question_type=question.question_type,
+                points=question.points,
+                correct_answer_ids=frozenset(
+                    str(a.id) for a in question.answers if a.is_correct
+                ),
+                correct_texts=tuple(
+                    a.answer_text.lower().strip() for a in question.answers if a.is_correct
+                ),
+            )
+            for question in quiz.questions
+        )
+        return cls(questions=questions, total_points=sum(q.points for q in questions))
+
+
+@dataclass
+class GradingResult:
+    total_questions: int
+    correct_answers: int
+    total_points: int
+    earned_points: int
+    score: int
+    details: List[Dict[str, Any]] = field(default_factory=list)
+
+
+def _is_text_answer_correct(key: QuestionKey, text_answer: str) -> bool:
+    # Если нет правильных ответов в базе, считаем любой непустой ответ правильным
+    if not key.correct_texts:
+        return True
+    # Ответ пользователя должен содержать правильный ответ (или наоборот)
+    user_answer = text_answer.lower().strip()
+    return any(
+        correct in user_answer or user_answer in correct
+        for correct in key.correct_texts
+    )
+
+
+def _is_choice_answer_correct(key: QuestionKey, answer_ids: List[str]) -> bool:
+    return (
+        len(answer_ids) == len(key.correct_answer_ids)
+        and key.correct_answer_ids.issuperset(answer_ids)
+    )
+
+
+def grade_submission(key: AnswerKey, answers: List[QuizAnswer]) -> GradingResult:
+    """Проверяет ответы пользователя за один проход по ключу"""
+    # Первый ответ на вопрос выигрывает, как и раньше
+    answers_by_question = {}
+    for answer in answers:
+        answers_by_question.setdefault(answer.question_id, answer)
+
+    correct_answers = 0
+    earned_points = 0
+    details = []
+
+    for question in key.questions:
+        user_answer = answers_by_question.get(question.question_id)
+        is_correct = False
+
+        if question.question_type == QuestionType.TEXT_ANSWER:
+            if user_answer and user_answer.text_answer and user_answer.text_answer.strip():
+                is_correct = _is_text_answer_correct(question, user_answer.text_answer)
+        elif user_answer and user_answer.answers:
+            is_correct = _is_choice_answer_correct(question, user_answer.answers)
+
+        if is_correct:
+            correct_answers += 1
+            earned_points += question.points
+
+        details.append({
+            "question_id": str(question.question_id),
+            "is_correct": is_correct,
+            "points": question.points,
+            "earned_points": question.points if is_correct else 0,
+        })
+
+    total_questions = len(key.questions)
+    score = round((correct_answers / total_questions) * 100) if total_questions > 0 else 0
+
+    return GradingResult(
+        total_questions=total_questions,
+        correct_answers=correct_answers,
+        total_points=key.total_points,
+        earned_points=earned_points,
+        score=score,
+        details=details,
+    )
@@ -0,0 +1,178 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional
+from uuid import UUID
+
+import httpx
+
+from services.quiz_service.app.config import settings
+from services.shared.edu_shared.metrics import InstrumentedTransport
+
+logger = logging.getLogger(__name__)
+
+Profile = Dict[str, Any]
+
+
+@dataclass
+class _CachedProfile:
+    # None - пользователя нет в auth service (негативный кэш)
+    profile: Optional[Profile]
+    expires_at: float
+
+
+class IdentityResolver:
+    """
+    Резолвер user_id -> профиль (id, email) поверх auth service.
+
+    Держит один httpx.AsyncClient с пулом keep-alive соединений на весь
+    процесс и LRU с TTL, в том числе для несуществующих пользователей
+    (с коротким TTL). Пачки id резолвятся одним запросом к /auth/users/batch,
+    одновременные промахи по одному id сливаются в один запрос.
+
+    Изменения профилей в auth service сюда не приходят: кэш каждого
+    процесса отстаёт от них не больше чем на TTL.
+    """
+
+    # Ограничение /auth/users/batch
+    BATCH_SIZE = 500
+
+    def __init__(
+        self,
+        base_url: str,
+        size: int,
+        ttl: int,
+        negative_ttl: int,
+        timeout: float,
+        max_connections: int,
+    ):
+        self.base_url = base_url
+        self.size = size
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self._client: Optional[httpx.AsyncClient] = None
+        self._cache: OrderedDict[str, _CachedProfile] = OrderedDict()
+        self._pending: Dict[str, asyncio.Task] = {}
+
+    def _http(self) -> httpx.AsyncClient:
+        # Создаётся в lifespan, но вне приложения (CLI) поднимется при первом запросе
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=self.timeout,
+                transport=InstrumentedTransport(httpx.AsyncHTTPTransport(
+                    limits=httpx.Limits(
+                        max_connections=self.max_connections,
+                        max_keepalive_connections=self.max_connections,
+                    ),
+                )),
+            )
+        return self._client
+
+    async def start(self) -> None:
+        self._http()
+
+    async def stop(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _cached(self, user_id: str) -> Optional[_CachedProfile]:
+        entry = self._cache.get(user_id)
+        if entry is None:
+            return None
+        if entry.expires_at <= time.monotonic():
+            del self._cache[user_id]
+            return None
+        self._cache.move_to_end(user_id)
+        return entry
+
+    def _remember(self, user_id: str, profile: Optional[Profile]) -> None:
+        ttl = self.ttl if profile is not None else self.negative_ttl
+        self._cache[user_id] = _CachedProfile(profile=profile, expires_at=time.monotonic() + ttl)
+        self._cache.move_to_end(user_id)
+        while len(self._cache) > self.size:
+            self._cache.popitem(last=False)
+
+    async def resolve(self, user_id: str) -> Optional[Profile]:
+        """Профиль пользователя или None, если его нет или auth service недоступен"""
+        user_id = str(user_id)
+        entry = self._cached(user_id)
+        if entry is not None:
+            return entry.profile
+
+        # Одновременные промахи по одному id ждут общий запрос
+        task = self._pending.get(user_id)
+        if task is None:
+            task = asyncio.create_task(self._fetch([user_id]))
+            self._pending[user_id] = task
+            task.add_done_callback(lambda _: self._pending.pop(user_id, None))
+        profiles = await asyncio.shield(task)
+        return profiles.get(user_id) if profiles is not None else None
+
+    async def resolve_many(self, user_ids: Iterable[str]) -> Dict[str, Optional[Profile]]:
+        """Профили пачки пользователей: кэш, затем один запрос на BATCH_SIZE промахов"""
+        result: Dict[str, Optional[Profile]] = {}
+        missing: List[str] = []
+        for user_id in dict.fromkeys(str(user_id) for user_id in user_ids):
+            entry = self._cached(user_id)
+            if entry is not None:
+                result[user_id] = entry.profile
+            else:
+                missing.append(user_id)
+
+        for i in range(0, len(missing), self.BATCH_SIZE):
+            batch = missing[i:i + self.BATCH_SIZE]
+            profiles = await self._fetch(batch)
+            for user_id in batch:
+                result[user_id] = profiles.get(user_id) if profiles is not None else None
+        return result
+
+    async def get_email(self, user_id: str) -> Optional[str]:
+        profile = await self.resolve(user_id)
+        return profile.get("email") if profile else None
+
+    async def _fetch(self, user_ids: List[str]) -> Optional[Dict[str, Profile]]:
+        """Запрашивает профили в auth service и кэширует ответ; None при сбое запроса"""
+        canonical_ids: Dict[str, str] = {}
+        for user_id in user_ids:
+            try:
+                canonical_ids[user_id] = str(UUID(user_id))
+            except ValueError:
+                # Такого пользователя заведомо нет
+                self._remember(user_id, None)
+
+        profiles: Dict[str, Profile] = {}
+        if canonical_ids:
+            try:
+                response = await self._http().post(
+                    "/auth/users/batch", json={"ids": list(set(canonical_ids.values()))}
+                )
+                response.raise_for_status()
+            except httpx.HTTPError as e:
+                # Сбой не кэшируем, чтобы не записать живых пользователей в отсутствующие
+                logger.warning("Failed to resolve %d user(s) in auth service: %s", len(canonical_ids), e)
+                return None
+            profiles = {profile["id"]: profile for profile in response.json()}
+
+        result: Dict[str, Profile] = {}
+        for user_id, canonical_id in canonical_ids.items():
+            profile = profiles.get(canonical_id)
+            self._remember(user_id, profile)
+            if profile is not None:
+                result[user_id] = profile
+        return result
+
+
+identity_resolver = IdentityResolver(
+    settings.AUTH_SERVICE_URL,
+    size=settings.IDENTITY_CACHE_SIZE,
+    ttl=settings.IDENTITY_CACHE_TTL_SECONDS,
+    negative_ttl=settings.IDENTITY_NEGATIVE_TTL_SECONDS,
+    timeout=settings.AUTH_SERVICE_TIMEOUT_SECONDS,
+    max_connections=settings.AUTH_SERVICE_MAX_CONNECTIONS,
+)
@@ -0,0 +1,176 @@
+import logging
+from typing import AsyncIterable, AsyncIterator, List, Tuple, Union
+from uuid import UUID, uuid4
+
+import asyncpg
+from pydantic import ValidationError
+from sqlalchemy import Table, func, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from services.quiz_service.app.models import Quiz, Question, Answer, quiz_tag_association
+from services.quiz_service.app.schemas import QuizCreate, QuizImportError, QuizImportReport
+from services.quiz_service.app.utils import get_or_create_tag_ids, normalize_tag_name
+
+logger = logging.getLogger(__name__)
+
+# Сколько ошибок по строкам возвращать в отчёте, остальные только считаются
+MAX_REPORTED_ERRORS = 1000
+
+# Колонки COPY в порядке значений строк, которые собирает QuizImporter._insert
+QUIZ_COLUMNS = ["id", "title", "description", "is_ai_generated", "created_at", "updated_at", "user_id"]
+QUESTION_COLUMNS = ["id", "quiz_id", "question_type", "question_text", "points", "created_at", "updated_at"]
+ANSWER_COLUMNS = ["id", "question_id", "answer_text", "is_correct"]
+QUIZ_TAG_COLUMNS = ["quiz_id", "tag_id"]
+
+
+async def iter_ndjson_lines(chunks: AsyncIterable[bytes], max_line_bytes: int) -> AsyncIterator[bytes]:
+    """
+    Режет поток байтов на строки, не держа в памяти всё тело запроса. От строки
+    длиннее max_line_bytes остаются первые max_line_bytes + 1 байт, остальное
+    до конца строки отбрасывается: такую строку отклонит QuizImporter
+    """
+    buffer = bytearray()
+    async for chunk in chunks:
+        view = memoryview(chunk)
+        start = 0
+        while True:
+            end = chunk.find(b"\n", start)
+            stop = len(chunk) if end == -1 else end
+            room = max_line_bytes + 1 - len(buffer)
+            if room > 0:
+                buffer += view[start:min(stop, start + room)]
+            if end == -1:
+                break
+            yield bytes(buffer)
+            buffer.clear()
+            start = end + 1
+    if buffer:
+        yield bytes(buffer)
+
+
+def _format_validation_error(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in e['loc']) or 'document'}: {e['msg']}"
+        for e in error.errors()
+    )
+
+
+class QuizImporter:
+    """
+    Потоковый импорт квизов из NDJSON (один QuizCreate на строку).
+
+    Строки валидируются и пишутся пачками: каждая пачка - одна транзакция,
+    в которой квизы, вопросы, ответы и связи с тегами пишутся через COPY
+    (copy_records_to_table asyncpg), по одному COPY на таблицу. Строки длиннее max_line_bytes (для str - символов) отклоняются
+    без разбора.
+    Если пачка не записалась, её строки повторяются по одной, чтобы
+    в отчёте оказались конкретные строки с ошибками.
+    """
+
+    def __init__(self, db: AsyncSession, user_id: UUID, chunk_size: int, max_line_bytes: int):
+        self.db = db
+        self.user_id = user_id
+        self.chunk_size = chunk_size
+        self.max_line_bytes = max_line_bytes
+        self.report = QuizImportReport()
+
+    async def run(self, lines: AsyncIterable[Union[bytes, str]]) -> QuizImportReport:
+        """Импортирует все строки и возвращает отчёт"""
+        chunk: List[Tuple[int, QuizCreate]] = []
+        line_number = 0
+
+        async for line in lines:
+            line_number += 1
+            if len(line) > self.max_line_bytes:
+                self._fail(line_number, f"Line is longer than {self.max_line_bytes} bytes")
+                continue
+            if not line.strip():
+                continue
+            try:
+                chunk.append((line_number, QuizCreate.model_validate_json(line)))
+            except ValidationError as e:
+                self._fail(line_number, _format_validation_error(e))
+                continue
+
+            if len(chunk) >= self.chunk_size:
+                await self._write(chunk)
+                chunk = []
+
+        if chunk:
+            await self._write(chunk)
+        return self.report
+
+    def _fail(self, line_number: int, error: str) -> None:
+        self.report.failed += 1
+        if len(self.report.errors) < MAX_REPORTED_ERRORS:
+            self.report.errors.append(QuizImportError(line=line_number, error=error))
+
+    async def _write(self, chunk: List[Tuple[int, QuizCreate]]) -> None:
+        try:
+            await self._insert([quiz_data for _, quiz_data in chunk])
+            await self.db.commit()
+        except (SQLAlchemyError, asyncpg.PostgresError) as e:
+            await self.db.rollback()
+            # Без SQL и параметров: в пачке их тысячи
+            error = str(getattr(e, "orig", None) or e)
+            if len(chunk) == 1:
+                self._fail(chunk[0][0], error)
+                return
+            logger.warning(
+                "Import chunk of lines %d-%d failed, retrying line by line: %s",
+                chunk[0][0], chunk[-1][0], error,
+            )
+            for item in chunk:
+                await self._write([item])
+            return
+
+        self.report.imported += len(chunk)
+
+    async def _insert(self, quizzes: List[QuizCreate]) -> None:
+        tag_ids = await get_or_create_tag_ids(
+            (tag for quiz_data in quizzes for tag in quiz_data.tags or []), self.db
+        )
+        # Значение default=func.now() моделей: COPY не вычисляет умолчания колонок
+        now = (await self.db.execute(select(func.localtimestamp()))).scalar_one()
+
+        quiz_rows, question_rows, answer_rows, tag_rows = [], [], [], []
+        # id генерируем сами, чтобы связать строки без RETURNING
+        for quiz_data in quizzes:
+            quiz_id = uuid4()
+            quiz_rows.append((
+                quiz_id, quiz_data.title, quiz_data.description, quiz_data.is_ai_generated, now, now, self.user_id,
+            ))
+
+            # Разные написания одного тега ведут к одному id
+            quiz_tag_ids = {tag_ids[name] for name in map(normalize_tag_name, quiz_data.tags or []) if name}
+            tag_rows.extend((quiz_id, tag_id) for tag_id in quiz_tag_ids)
+
+            for question_data in quiz_data.questions:
+                question_id = uuid4()
+                # В базе enum questiontype хранит имена членов QuestionType
+                question_rows.append((
+                    question_id, quiz_id, question_data.question_type.name,
+                    question_data.question_text, question_data.points, now, now,
+                ))
+                answer_rows.extend(
+                    (uuid4(), question_id, answer_data.answer_text, answer_data.is_correct)
+                    for answer_data in question_data.answers
+                )
+
+        for table, columns, rows in (
+            (Quiz.__table__, QUIZ_COLUMNS, quiz_rows),
+            (Question.__table__, QUESTION_COLUMNS, question_rows),
+            (Answer.__table__, ANSWER_COLUMNS, answer_rows),
+            (quiz_tag_association, QUIZ_TAG_COLUMNS, tag_rows),
+        ):
+            await self._copy(table, columns, rows)
+
+    async def _copy(self, table: Table, columns: List[str], rows: List[tuple]) -> None:
+        """COPY строк в таблицу через соединение и транзакцию сессии"""
+        if not rows:
+            return
+        connection = await (await self.db.connection()).get_raw_connection()
+        await connection.driver_connection.copy_records_to_table(
+            table.name, schema_name=table.schema, columns=columns, records=rows
+        )
@@ -0,0 +1,186 @@
+import json
+import logging
+from dataclasses import dataclass
+from typing import AsyncIterator, List, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from services.quiz_service.app.db import redis_client
+from services.quiz_service.app.models import QuizResult
+from services.quiz_service.app.services.identity_service import identity_resolver
+from services.quiz_service.app.services.leaderboard_service import LeaderboardService
+
+logger = logging.getLogger(__name__)
+
+
+class LeaderboardRebuildRefused(Exception):
+    """Собранный рейтинг пуст или намного меньше живого, подмена без force отменена"""
+
+
+@dataclass
+class LeaderboardRebuildReport:
+    users: int = 0  # Пользователей с попытками в quiz_result
+    skipped: int = 0  # Не нашлись в auth service, в рейтинг не попадают
+    updated: int = 0  # reconcile и сверка после rebuild: исправленные баллы
+    removed: int = 0  # reconcile с prune_unknown: удалённые участники без попыток в базе
+
+
+class LeaderboardRebuilder:
+    """
+    Восстановление общего рейтинга из quiz_result.
+
+    Суммы баллов по пользователям читаются серверным курсором пачками по
+    chunk_size, email резолвятся пачкой через identity_resolver, а ZADD
+    отправляются пайплайном в теневой ZSET. rebuild() подменяет им живой
+    рейтинг через RENAME, старый удаляется UNLINK в фоне Redis, так что
+    чтения не блокируются.
+
+    Пустой рейтинг или рейтинг меньше MIN_SIZE_RATIO от живого rebuild()
+    без force не подменяет (LeaderboardRebuildRefused): так бывает, когда
+    quiz_result ещё не заполнена, а в Redis баллы, начисленные до неё.
+    ZINCRBY новых попыток, пришедшие в живой рейтинг, пока собирался
+    теневой, при подмене пропадают, поэтому после неё rebuild() делает
+    сверку reconcile() с базой. Попытки, которые ещё лежат в буфере
+    AttemptWriter, не видит и она: их баллы вернёт повторный reconcile.
+
+    reconcile() не подменяет рейтинг, а исправляет
+    расхождения ZINCRBY на разницу; участников, которых нет в базе, он
+    удаляет (ZREM) только с prune_unknown. Их баллы теряются безвозвратно,
+    в том числе начисленные до появления quiz_result и отброшенные
+    AttemptWriter, а также у пользователей, не найденных в auth service.
+
+    Баллы попыток, ещё не записанных AttemptWriter, в базе пока нет:
+    повторный reconcile после всплеска нагрузки это выправит.
+    """
+
+    SHADOW_KEY = f"{LeaderboardService.LEADERBOARD_KEY}_shadow"
+    # Во сколько раз собранный рейтинг может быть меньше живого без force
+    MIN_SIZE_RATIO = 0.5
+    RETIRED_KEY = f"{LeaderboardService.LEADERBOARD_KEY}_retired"
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        chunk_size: int,
+        prune_unknown: bool = False,
+    ):
+        self.session_factory = session_factory
+        self.chunk_size = chunk_size
+        self.prune_unknown = prune_unknown
+        self.report = LeaderboardRebuildReport()
+
+    async def _iter_totals(self) -> AsyncIterator[List[Tuple[str, int]]]:
+        """Пачки (email, сумма баллов) по всем пользователям с попытками"""
+        stmt = (
+            select(QuizResult.user_id, func.sum(QuizResult.earned_points))
+            .group_by(QuizResult.user_id)
+            .execution_options(yield_per=self.chunk_size)
+        )
+        async with self.session_factory() as session:
+            result = await session.stream(stmt)
+            async for rows in result.partitions():
+                profiles = await identity_resolver.resolve_many(str(user_id) for user_id, _ in rows)
+                chunk = []
+                for user_id, points in rows:
+                    profile = profiles.get(str(user_id))
+                    if not profile or not profile.get("email"):
+                        self.report.skipped += 1
+                        continue
+                    chunk.append((profile["email"], int(points)))
+                self.report.users += len(rows)
+                yield chunk
+
+    def _keep_user_data(self, pipe, chunk: List[Tuple[str, int]]) -> None:
+        for email, _ in chunk:
+            # Профиль мог пропасть вместе с рейтингом, но сохранённые данные не затираем
+            pipe.hsetnx(LeaderboardService.USER_DATA_KEY, email, json.dumps({"email": email}))
+
+    async def _load_chunk(self, chunk: List[Tuple[str, int]]) -> None:
+        async with redis_client.pipeline(transaction=False) as pipe:
+            pipe.zadd(self.SHADOW_KEY, dict(chunk))
+            self._keep_user_data(pipe, chunk)
+            await pipe.execute()
+
+    async def rebuild(self, force: bool = False) -> LeaderboardRebuildReport:
+        """
+        Собирает рейтинг заново, атомарно подменяет им живой ZSET и сверяет
+        результат с базой. С force подменяет и пустым или намного меньшим.
+        """
+        await redis_client.unlink(self.SHADOW_KEY)
+        loaded = 0
+        async for chunk in self._iter_totals():
+            if chunk:
+                await self._load_chunk(chunk)
+                loaded += len(chunk)
+
+        live = await redis_client.zcard(LeaderboardService.LEADERBOARD_KEY)
+        if not force and (not loaded or loaded < live * self.MIN_SIZE_RATIO):
+            await redis_client.unlink(self.SHADOW_KEY)
+            raise LeaderboardRebuildRefused(
+                f"Rebuilt leaderboard has {loaded} members, the live one has {live}"
+            )
+
+        if not loaded:
+            await redis_client.unlink(LeaderboardService.LEADERBOARD_KEY)
+            return self.report
+
+        # RENAME поверх живого ключа удалял бы старый ZSET синхронно,
+        # поэтому сначала отодвигаем его и удаляем через UNLINK
+        async with redis_client.pipeline(transaction=True) as pipe:
+            pipe.rename(LeaderboardService.LEADERBOARD_KEY, self.RETIRED_KEY)
+            pipe.rename(self.SHADOW_KEY, LeaderboardService.LEADERBOARD_KEY)
+            _, swapped = await pipe.execute(raise_on_error=False)
+        if isinstance(swapped, Exception):
+            raise swapped
+        await redis_client.unlink(self.RETIRED_KEY)
+        # Баллы, начисленные в старый рейтинг во время сборки; users и skipped
+        # в отчёте - по этой сверке, она видит базу позже
+        self.report.users = self.report.skipped = 0
+        return await self.reconcile()
+
+    async def reconcile(self) -> LeaderboardRebuildReport:
+        """Сверяет живой рейтинг с базой и исправляет расхождения, с prune_unknown - и удаляет лишних"""
+        live_key = LeaderboardService.LEADERBOARD_KEY
+        await redis_client.unlink(self.SHADOW_KEY)
+        try:
+            async for chunk in self._iter_totals():
+                if not chunk:
+                    continue
+                emails = [email for email, _ in chunk]
+                live_scores = await redis_client.zmscore(live_key, emails)
+                async with redis_client.pipeline(transaction=False) as pipe:
+                    for (email, points), live_score in zip(chunk, live_scores):
+                        delta = points - int(live_score or 0)
+                        if live_score is None or delta:
+                            # Разницей, а не ZADD, чтобы не потерять параллельные ZINCRBY
+                            pipe.zincrby(live_key, delta, email)
+                            self.report.updated += 1
+                    self._keep_user_data(pipe, chunk)
+                    if self.prune_unknown:
+                        # Теневой ZSET здесь - только множество участников для второго прохода
+                        pipe.zadd(self.SHADOW_KEY, dict(chunk))
+                    await pipe.execute()
+
+            if not self.prune_unknown:
+                return self.report
+
+            members: List[str] = []
+            async for member, _ in redis_client.zscan_iter(live_key, count=self.chunk_size):
+                members.append(member)
+                if len(members) >= self.chunk_size:
+                    await self._remove_unknown(members)
+                    members = []
+            if members:
+                await self._remove_unknown(members)
+        finally:
+            await redis_client.unlink(self.SHADOW_KEY)
+        return self.report
+
+    async def _remove_unknown(self, members: List[str]) -> None:
+        known = await redis_client.zmscore(self.SHADOW_KEY, members)
+        unknown = [member for member, score in zip(members, known) if score is None]
+        if unknown:
+            await redis_client.zrem(LeaderboardService.LEADERBOARD_KEY, *unknown)
+            self.report.removed += len(unknown)
+            logger.info("Removed %d leaderboard members without stored attempts", len(unknown))
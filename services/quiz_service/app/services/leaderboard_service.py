@@ -1,9 +1,105 @@
-from typing import List, Optional, Dict, Any
+from datetime import date, datetime, timedelta, timezone
+from typing import List, Optional, Dict, Any, Tuple
 from uuid import UUID
 import json
-import httpx
+import logging
 from services.quiz_service.app.db import redis_client
 from services.quiz_service.app.config import settings
+from services.quiz_service.app.services.identity_service import identity_resolver
+
+logger = logging.getLogger(__name__)
+
+
+# Страница рейтинга и позиция участника за один вызов.
+# KEYS[1] - ZSET рейтинга, KEYS[2] - USER_DATA_KEY, KEYS[3..] - дневные ZSET,
+# из которых KEYS[1] собирается ZUNIONSTORE, если его нет (свёртка живёт ARGV[5] секунд).
+# ARGV[1] - режим: top (места ARGV[2]..ARGV[3] с нуля), around (ARGV[2] мест до
+# и ARGV[3] после участника ARGV[4]) или standing (только позиция ARGV[4]).
+# Ответ: [total, rank, score, start, member1, score1, profile1, member2, ...]
+_LEADERBOARD_PAGE = """
+local board = KEYS[1]
+if #KEYS > 2 and redis.call('EXISTS', board) == 0 then
+    redis.call('ZUNIONSTORE', board, #KEYS - 2, unpack(KEYS, 3))
+    redis.call('EXPIRE', board, ARGV[5])
+end
+local rank = false
+local score = false
+if ARGV[4] ~= '' then
+    rank = redis.call('ZREVRANK', board, ARGV[4])
+    score = redis.call('ZSCORE', board, ARGV[4])
+end
+local result = {redis.call('ZCARD', board), rank, score}
+local start, stop
+if ARGV[1] == 'top' then
+    start = tonumber(ARGV[2])
+    stop = tonumber(ARGV[3])
+elseif ARGV[1] == 'around' and rank then
+    start = math.max(0, rank - tonumber(ARGV[2]))
+    stop = rank + tonumber(ARGV[3])
+else
+    return result
+end
+result[4] = start
+local entries = redis.call('ZREVRANGE', board, start, stop, 'WITHSCORES')
+if #entries == 0 then
+    return result
+end
+local members = {}
+for i = 1, #entries, 2 do
+    members[#members + 1] = entries[i]
+end
+local profiles = redis.call('HMGET', KEYS[2], unpack(members))
+for i = 1, #members do
+    result[#result + 1] = members[i]
+    result[#result + 1] = entries[i * 2]
+    result[#result + 1] = profiles[i]
+end
+return result
+"""
+
+_leaderboard_page = redis_client.register_script(_LEADERBOARD_PAGE)
+
+# all - за всё время, остальные - по дням UTC: сегодня, текущая неделя (с понедельника), текущий месяц
+LEADERBOARD_WINDOWS = ("all", "daily", "weekly", "monthly")
+
+
+def _parse_profile(email: str, user_data: Optional[str]) -> Dict[str, Any]:
+    if user_data:
+        try:
+            return json.loads(user_data)
+        except ValueError:
+            # Если данные повреждены, создаем базовые данные
+            pass
+    # Если данных нет в Redis, создаем базовые данные
+    return {"email": email}
+
+
+def _parse_page(
+    reply: List[Any], with_user_data: bool = True
+) -> Tuple[List[Dict[str, Any]], Dict[str, Optional[int]]]:
+    """Разбирает ответ _LEADERBOARD_PAGE в записи рейтинга и позицию участника"""
+    total, rank, score = reply[:3]
+    standing = {
+        "rank": int(rank) + 1 if rank is not None else None,
+        "score": int(float(score)) if score is not None else None,
+        "total_users": int(total),
+    }
+    if len(reply) < 4:
+        return [], standing
+
+    start = int(reply[3])
+    result = []
+    for i in range(4, len(reply), 3):
+        email, score, user_data = reply[i:i + 3]
+        user_info = {
+            "user_id": email,  # Используем email как user_id для отображения
+            "score": int(float(score)),
+            "rank": start + len(result) + 1,
+        }
+        if with_user_data:
+            user_info["user_data"] = _parse_profile(email, user_data)
+        result.append(user_info)
+    return result, standing
 
 
 class LeaderboardService:
@@ -12,6 +108,70 @@ class LeaderboardService:
     LEADERBOARD_KEY = "quiz_leaderboard"
     USER_DATA_KEY = "user_data"
     
+    @staticmethod
+    def daily_key(day: date) -> str:
+        return f"{LeaderboardService.LEADERBOARD_KEY}:daily:{day.isoformat()}"
+    
+    @staticmethod
+    def quiz_key(quiz_id: Any) -> str:
+        return f"{LeaderboardService.LEADERBOARD_KEY}:quiz:{quiz_id}"
+    
+    @staticmethod
+    def board_keys(window: str = "all", quiz_id: Any = None) -> Tuple[str, List[str]]:
+        """
+        Ключ ZSET рейтинга и дневные ключи, из которых он собирается
+        
+        Args:
+            window: Период из LEADERBOARD_WINDOWS
+            quiz_id: ID квиза для рейтинга по квизу (только за всё время)
+            
+        Returns:
+            Tuple: Ключ рейтинга и список дневных ключей (пустой, если свёртка не нужна)
+        """
+        if window not in LEADERBOARD_WINDOWS:
+            raise ValueError(f"Unknown leaderboard window: {window}")
+        if quiz_id is not None:
+            if window != "all":
+                raise ValueError("Quiz leaderboards are only kept for all time")
+            return LeaderboardService.quiz_key(quiz_id), []
+        if window == "all":
+            return LeaderboardService.LEADERBOARD_KEY, []
+        
+        today = datetime.now(timezone.utc).date()
+        if window == "daily":
+            return LeaderboardService.daily_key(today), []
+        if window == "weekly":
+            first_day = today - timedelta(days=today.weekday())
+            key = f"{LeaderboardService.LEADERBOARD_KEY}:weekly:{first_day.isoformat()}"
+        else:
+            first_day = today.replace(day=1)
+            key = f"{LeaderboardService.LEADERBOARD_KEY}:monthly:{first_day:%Y-%m}"
+        days = (today - first_day).days + 1
+        return key, [LeaderboardService.daily_key(first_day + timedelta(days=i)) for i in range(days)]
+    
+    @staticmethod
+    async def _read_board(
+        mode: str,
+        first: int,
+        second: int,
+        email: Optional[str],
+        window: str,
+        quiz_id: Any,
+        with_user_data: bool = True
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, Optional[int]]]:
+        # Свёртка (при необходимости), позиция и страница - один вызов скрипта
+        key, sources = LeaderboardService.board_keys(window, quiz_id)
+        reply = await _leaderboard_page(
+            keys=[key, LeaderboardService.USER_DATA_KEY, *sources],
+            args=[mode, first, second, email or "", settings.LEADERBOARD_ROLLUP_TTL_SECONDS],
+        )
+        return _parse_page(reply, with_user_data)
+    
+    @staticmethod
+    async def _scan_board_keys() -> List[str]:
+        # Ключи рейтингов по периодам, квизам и свёрток
+        return [key async for key in redis_client.scan_iter(match=f"{LeaderboardService.LEADERBOARD_KEY}:*")]
+    
     @staticmethod
     async def get_user_email_from_auth(user_id: str) -> Optional[str]:
         """
@@ -23,22 +183,8 @@ class LeaderboardService:
         Returns:
             Optional[str]: Email пользователя или None
         """
-        try:
-            # Получаем базовый URL для auth service
-            auth_base_url = "http://auth-service:8000"
-            
-            async with httpx.AsyncClient() as client:
-                response = await client.get(f"{auth_base_url}/auth/user/{user_id}")
-                
-                if response.status_code == 200:
-                    user_data = response.json()
-                    return user_data.get("email")
-                else:
-                    print(f"Failed to get user data for {user_id}: {response.status_code}")
-                    return None
-        except Exception as e:
-            print(f"Error getting user data from auth service: {e}")
-            return None
+        # Пул соединений и кэш профилей живут в identity_resolver
+        return await identity_resolver.get_email(user_id)
     
     @staticmethod
     async def add_user_score(user_id: str, score: int, user_data: Dict[str, Any] = None) -> bool:
@@ -62,7 +208,7 @@ class LeaderboardService:
                 email = await LeaderboardService.get_user_email_from_auth(user_id)
             
             if not email:
-                print(f"Could not get email for user {user_id}")
+                logger.warning("Could not get email for user %s", user_id)
                 return False
             
             # Добавляем баллы в ZSET используя email как ключ
@@ -75,9 +221,64 @@ class LeaderboardService:
             
             return True
         except Exception as e:
-            print(f"Error adding user score: {e}")
+            logger.warning("Error adding user score: %s", e)
             return False
     
+    @staticmethod
+    async def increment_user_score(
+        user_id: str,
+        points: int,
+        user_data: Dict[str, Any] = None,
+        quiz_id: Any = None
+    ) -> Optional[int]:
+        """
+        Атомарно прибавляет баллы пользователю (ZINCRBY) в общем и дневном
+        рейтингах, записывает лучшую попытку в рейтинг квиза (если указан)
+        и обновляет данные пользователя в одной транзакции MULTI/EXEC,
+        без чтения текущего счёта
+        
+        Args:
+            user_id: ID пользователя
+            points: Сколько баллов прибавить
+            user_data: Данные пользователя; без них сохраняется только email,
+                если данных ещё нет
+            quiz_id: ID пройденного квиза
+        
+        Returns:
+            Optional[int]: Новый счёт пользователя или None при ошибке
+        """
+        try:
+            email = user_data.get("email") if user_data else None
+            if not email:
+                email = await LeaderboardService.get_user_email_from_auth(user_id)
+            if not email:
+                logger.warning("Could not get email for user %s", user_id)
+                return None
+            
+            async with redis_client.pipeline(transaction=True) as pipe:
+                pipe.zincrby(LeaderboardService.LEADERBOARD_KEY, points, email)
+                # Дневной ключ живёт дольше месяца, чтобы из него собирались недельная и месячная свёртки
+                daily_key = LeaderboardService.daily_key(datetime.now(timezone.utc).date())
+                pipe.zincrby(daily_key, points, email)
+                pipe.expire(daily_key, timedelta(days=settings.LEADERBOARD_DAILY_TTL_DAYS))
+                if quiz_id is not None:
+                    quiz_key = LeaderboardService.quiz_key(quiz_id)
+                    # Повторное прохождение не накручивает рейтинг квиза: ZADD GT
+                    # меняет счёт, только если новая попытка лучше
+                    pipe.zadd(quiz_key, {email: points}, gt=True)
+                    pipe.expire(quiz_key, timedelta(days=settings.LEADERBOARD_QUIZ_TTL_DAYS))
+                if user_data:
+                    pipe.hset(LeaderboardService.USER_DATA_KEY, email, json.dumps(user_data))
+                else:
+                    # Не затираем уже сохранённые данные (например, имя)
+                    pipe.hsetnx(LeaderboardService.USER_DATA_KEY, email, json.dumps({"email": email}))
+                replies = await pipe.execute()
+            
+            return int(replies[0])
+        except Exception as e:
+            logger.warning("Error incrementing user score: %s", e)
+            return None
+    
     @staticmethod
     async def get_user_score(user_id: str) -> Optional[int]:
         """
@@ -98,7 +299,7 @@ class LeaderboardService:
             score = await redis_client.zscore(LeaderboardService.LEADERBOARD_KEY, email)
             return int(score) if score is not None else None
         except Exception as e:
-            print(f"Error getting user score: {e}")
+            logger.warning("Error getting user score: %s", e)
             return None
     
     @staticmethod
@@ -121,66 +322,78 @@ class LeaderboardService:
             rank = await redis_client.zrevrank(LeaderboardService.LEADERBOARD_KEY, email)
             return int(rank + 1) if rank is not None else None
         except Exception as e:
-            print(f"Error getting user rank: {e}")
+            logger.warning("Error getting user rank: %s", e)
             return None
     
     @staticmethod
-    async def get_leaderboard(top: int = 10, with_user_data: bool = True) -> List[Dict[str, Any]]:
+    async def get_leaderboard(
+        top: int = 10,
+        with_user_data: bool = True,
+        window: str = "all",
+        quiz_id: Any = None
+    ) -> List[Dict[str, Any]]:
         """
         Получает топ пользователей по баллам
         
         Args:
             top: Количество топ пользователей
             with_user_data: Включать ли данные пользователей
+            window: Период из LEADERBOARD_WINDOWS
+            quiz_id: ID квиза для рейтинга по квизу
             
         Returns:
             List[Dict]: Список пользователей с их баллами и позициями
         """
         try:
-            # Получаем топ пользователей с баллами (по убыванию)
-            top_users = await redis_client.zrevrange(
-                LeaderboardService.LEADERBOARD_KEY, 
-                0, 
-                top - 1, 
-                withscores=True
+            entries, _ = await LeaderboardService._read_board(
+                "top", 0, top - 1, None, window, quiz_id, with_user_data
             )
-            
-            result = []
-            for i, (email, score) in enumerate(top_users):
-                user_info = {
-                    "user_id": email,  # Используем email как user_id для отображения
-                    "score": int(score),
-                    "rank": i + 1
-                }
-                
-                # Добавляем данные пользователя если запрошены
-                if with_user_data:
-                    user_data = await redis_client.hget(LeaderboardService.USER_DATA_KEY, email)
-                    if user_data:
-                        try:
-                            user_info["user_data"] = json.loads(user_data)
-                        except:
-                            # Если данные повреждены, создаем базовые данные
-                            user_info["user_data"] = {"email": email}
-                    else:
-                        # Если данных нет в Redis, создаем базовые данные
-                        user_info["user_data"] = {"email": email}
-                
-                result.append(user_info)
-            
-            return result
+            return entries
         except Exception as e:
-            print(f"Error getting leaderboard: {e}")
+            logger.warning("Error getting leaderboard: %s", e)
             return []
     
     @staticmethod
-    async def get_users_around_user(user_id: str, range_size: int = 5) -> List[Dict[str, Any]]:
+    async def get_leaderboard_page(
+        top: int,
+        user_id: str,
+        window: str = "all",
+        quiz_id: Any = None
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, Optional[int]]]:
+        """
+        Получает топ пользователей и позицию пользователя в том же рейтинге
+        
+        Args:
+            top: Количество топ пользователей
+            user_id: ID пользователя
+            window: Период из LEADERBOARD_WINDOWS
+            quiz_id: ID квиза для рейтинга по квизу
+            
+        Returns:
+            Tuple: Список пользователей и словарь rank, score, total_users как в get_user_standing
+        """
+        try:
+            email = await LeaderboardService.get_user_email_from_auth(user_id)
+            return await LeaderboardService._read_board("top", 0, top - 1, email, window, quiz_id)
+        except Exception as e:
+            logger.warning("Error getting leaderboard page: %s", e)
+            return [], {"rank": None, "score": None, "total_users": 0}
+    
+    @staticmethod
+    async def get_users_around_user(
+        user_id: str,
+        range_size: int = 5,
+        window: str = "all",
+        quiz_id: Any = None
+    ) -> List[Dict[str, Any]]:
         """
         Получает пользователей вокруг указанного пользователя
         
         Args:
             user_id: ID пользователя
             range_size: Количество пользователей с каждой стороны
+            window: Период из LEADERBOARD_WINDOWS
+            quiz_id: ID квиза для рейтинга по квизу
             
         Returns:
             List[Dict]: Список пользователей с их баллами и позициями
@@ -191,51 +404,42 @@ class LeaderboardService:
             if not email:
                 return []
             
-            # Получаем позицию пользователя
-            user_rank = await redis_client.zrevrank(LeaderboardService.LEADERBOARD_KEY, email)
-            if user_rank is None:
-                return []
-            
-            # Вычисляем диапазон
-            start_rank = max(0, user_rank - range_size)
-            end_rank = user_rank + range_size
-            
-            # Получаем пользователей в диапазоне
-            users = await redis_client.zrevrange(
-                LeaderboardService.LEADERBOARD_KEY,
-                start_rank,
-                end_rank,
-                withscores=True
+            # Позиция пользователя, окно вокруг неё и профили одним вызовом скрипта
+            result, _ = await LeaderboardService._read_board(
+                "around", range_size, range_size, email, window, quiz_id
             )
-            
-            result = []
-            for i, (user_email, score) in enumerate(users):
-                user_info = {
-                    "user_id": user_email,  # Используем email как user_id
-                    "score": int(score),
-                    "rank": start_rank + i + 1,
-                    "is_current_user": user_email == email
-                }
-                
-                # Добавляем данные пользователя
-                user_data = await redis_client.hget(LeaderboardService.USER_DATA_KEY, user_email)
-                if user_data:
-                    try:
-                        user_info["user_data"] = json.loads(user_data)
-                    except:
-                        # Если данные повреждены, создаем базовые данные
-                        user_info["user_data"] = {"email": user_email}
-                else:
-                    # Если данных нет в Redis, создаем базовые данные
-                    user_info["user_data"] = {"email": user_email}
-                
-                result.append(user_info)
-            
+            for user_info in result:
+                user_info["is_current_user"] = user_info["user_id"] == email
             return result
         except Exception as e:
-            print(f"Error getting users around user: {e}")
+            logger.warning("Error getting users around user: %s", e)
             return []
     
+    @staticmethod
+    async def get_user_standing(
+        user_id: str,
+        window: str = "all",
+        quiz_id: Any = None
+    ) -> Dict[str, Optional[int]]:
+        """
+        Получает позицию, баллы пользователя и размер рейтинга одним вызовом скрипта
+        
+        Args:
+            user_id: ID пользователя
+            window: Период из LEADERBOARD_WINDOWS
+            quiz_id: ID квиза для рейтинга по квизу
+            
+        Returns:
+            Dict: rank (1-based), score и total_users; rank и score None, если пользователя нет
+        """
+        try:
+            email = await LeaderboardService.get_user_email_from_auth(user_id)
+            _, standing = await LeaderboardService._read_board("standing", 0, 0, email, window, quiz_id)
+            return standing
+        except Exception as e:
+            logger.warning("Error getting user standing: %s", e)
+            return {"rank": None, "score": None, "total_users": 0}
+    
     @staticmethod
     async def get_total_users() -> int:
         """
@@ -247,7 +451,7 @@ class LeaderboardService:
         try:
             return await redis_client.zcard(LeaderboardService.LEADERBOARD_KEY)
         except Exception as e:
-            print(f"Error getting total users: {e}")
+            logger.warning("Error getting total users: %s", e)
             return 0
     
     @staticmethod
@@ -267,15 +471,17 @@ class LeaderboardService:
             if not email:
                 return False
             
-            # Удаляем из ZSET
-            await redis_client.zrem(LeaderboardService.LEADERBOARD_KEY, email)
-            
-            # Удаляем данные пользователя
-            await redis_client.hdel(LeaderboardService.USER_DATA_KEY, email)
+            # Удаляем из всех ZSET (общий, по периодам, по квизам) и данные пользователя
+            board_keys = await LeaderboardService._scan_board_keys()
+            async with redis_client.pipeline(transaction=True) as pipe:
+                for key in [LeaderboardService.LEADERBOARD_KEY, *board_keys]:
+                    pipe.zrem(key, email)
+                pipe.hdel(LeaderboardService.USER_DATA_KEY, email)
+                await pipe.execute()
             
             return True
         except Exception as e:
-            print(f"Error removing user: {e}")
+            logger.warning("Error removing user: %s", e)
             return False
     
     @staticmethod
@@ -287,9 +493,11 @@ class LeaderboardService:
             bool: True если успешно очищен
         """
         try:
-            await redis_client.delete(LeaderboardService.LEADERBOARD_KEY)
-            await redis_client.delete(LeaderboardService.USER_DATA_KEY)
+            board_keys = await LeaderboardService._scan_board_keys()
+            await redis_client.delete(
+                LeaderboardService.LEADERBOARD_KEY, LeaderboardService.USER_DATA_KEY, *board_keys
+            )
             return True
         except Exception as e:
-            print(f"Error clearing leaderboard: {e}")
+            logger.warning("Error clearing leaderboard: %s", e)
             return False 
\ No newline at end of file
@@ -0,0 +1,205 @@
+import asyncio
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import cached_property
+from typing import Optional
+from uuid import UUID
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from services.quiz_service.app.config import settings
+from services.quiz_service.app.db import redis_client
+from services.quiz_service.app.schemas import QuizResponse
+from services.quiz_service.app.services.grading_service import AnswerKey
+
+logger = logging.getLogger(__name__)
+
+
+# Пишем в Redis, только если сохранённая версия не новее нашей: медленный
+# читатель, загрузивший квиз до обновления, не перетрёт свежую запись.
+# Иначе возвращаем сохранённую версию и payload, чтобы не читать их вторым запросом.
+_STORE_IF_NEWER = """
+local current = redis.call('HGET', KEYS[1], 'version')
+if current and current > ARGV[1] then
+    return {0, current, redis.call('HGET', KEYS[1], 'payload')}
+end
+redis.call('HSET', KEYS[1], 'version', ARGV[1], 'payload', ARGV[2])
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+return {1}
+"""
+
+
+@dataclass
+class CachedQuiz:
+    version: str
+    quiz: QuizResponse
+    expires_at: float
+
+    @cached_property
+    def answer_key(self) -> AnswerKey:
+        """Ключ ответов строится один раз на версию квиза в L1"""
+        return AnswerKey.compile(self.quiz)
+
+
+class QuizCache:
+    """
+    Двухуровневый кэш скомпилированных квизов.
+
+    L1 - LRU в памяти воркера, L2 - Redis hash с полями version/payload.
+    Версия - это `updated_at` квиза, поэтому устаревшая запись не может
+    перезаписать более новую. Изменения рассылаются через pub/sub, чтобы
+    остальные воркеры сбросили свою L1 копию.
+    """
+
+    KEY_PREFIX = "quiz_cache"
+    INVALIDATION_CHANNEL = "quiz_cache:invalidate"
+    # Больше любой ISO-даты: удалённый квиз не вернётся в кэш до истечения TTL
+    TOMBSTONE_VERSION = "~"
+
+    def __init__(self, redis: Redis, l1_size: int, l1_ttl: int, ttl: int):
+        self.redis = redis
+        self.l1_size = l1_size
+        self.l1_ttl = l1_ttl
+        self.ttl = ttl
+        self._local: OrderedDict[UUID, CachedQuiz] = OrderedDict()
+        self._store_if_newer = redis.register_script(_STORE_IF_NEWER)
+        self._listener: Optional[asyncio.Task] = None
+        # Чтобы не сбрасывать L1 по собственным сообщениям
+        self._origin = uuid.uuid4().hex
+
+    @staticmethod
+    def version_of(quiz: QuizResponse) -> str:
+        return quiz.updated_at.isoformat(timespec="microseconds")
+
+    def _key(self, quiz_id: UUID) -> str:
+        return f"{self.KEY_PREFIX}:{quiz_id}"
+
+    def _remember(self, quiz: QuizResponse, version: str) -> CachedQuiz:
+        entry = CachedQuiz(
+            version=version,
+            quiz=quiz,
+            expires_at=time.monotonic() + self.l1_ttl,
+        )
+        self._local[quiz.id] = entry
+        self._local.move_to_end(quiz.id)
+        while len(self._local) > self.l1_size:
+            self._local.popitem(last=False)
+        return entry
+
+    def forget_local(self, quiz_id: UUID) -> None:
+        self._local.pop(quiz_id, None)
+
+    async def get(self, quiz_id: UUID) -> Optional[CachedQuiz]:
+        """Возвращает квиз из L1 или Redis, None при промахе"""
+        entry = self._local.get(quiz_id)
+        if entry is not None:
+            if entry.expires_at > time.monotonic():
+                self._local.move_to_end(quiz_id)
+                return entry
+            self.forget_local(quiz_id)
+
+        try:
+            version, payload = await self.redis.hmget(self._key(quiz_id), "version", "payload")
+        except RedisError as e:
+            logger.warning("Quiz cache read failed for %s: %s", quiz_id, e)
+            return None
+
+        if not payload or version == self.TOMBSTONE_VERSION:
+            return None
+
+        return self._remember(QuizResponse.model_validate_json(payload), version)
+
+    async def set(self, quiz: QuizResponse) -> Optional[CachedQuiz]:
+        """
+        Кладёт квиз в оба уровня кэша. Если в Redis версия новее (квиз прочитан
+        с отстающей реплики) или надгробие, возвращает то, что лежит в Redis:
+        более новый квиз или None для удалённого. В L1 попадает только версия
+        из Redis, иначе устаревший квиз проверял бы ответы до истечения L1 TTL.
+        """
+        version = self.version_of(quiz)
+        try:
+            stored, *current = await self._store_if_newer(
+                keys=[self._key(quiz.id)],
+                args=[version, quiz.model_dump_json(), self.ttl],
+            )
+        except RedisError as e:
+            logger.warning("Quiz cache write failed for %s: %s", quiz.id, e)
+            # Без Redis не узнать, не устарел ли квиз, поэтому в L1 его не кладём
+            return CachedQuiz(version=version, quiz=quiz, expires_at=time.monotonic())
+
+        if stored:
+            return self._remember(quiz, version)
+        current_version, payload = current
+        if current_version == self.TOMBSTONE_VERSION:
+            return None
+        return self._remember(QuizResponse.model_validate_json(payload), current_version)
+
+    async def replace(self, quiz: QuizResponse) -> None:
+        """Сохраняет новую версию квиза после изменения и оповещает воркеры"""
+        await self.set(quiz)
+        await self._publish(quiz.id)
+
+    async def invalidate(self, quiz_id: UUID) -> None:
+        """Удаляет квиз из кэша, оставляя в Redis надгробие до истечения TTL"""
+        self.forget_local(quiz_id)
+        try:
+            await self.redis.hset(
+                self._key(quiz_id),
+                mapping={"version": self.TOMBSTONE_VERSION, "payload": ""},
+            )
+            await self.redis.expire(self._key(quiz_id), self.ttl)
+        except RedisError as e:
+            logger.warning("Quiz cache invalidation failed for %s: %s", quiz_id, e)
+        await self._publish(quiz_id)
+
+    async def _publish(self, quiz_id: UUID) -> None:
+        try:
+            await self.redis.publish(self.INVALIDATION_CHANNEL, f"{self._origin}:{quiz_id}")
+        except RedisError as e:
+            logger.warning("Quiz cache publish failed for %s: %s", quiz_id, e)
+
+    async def _listen(self) -> None:
+        while True:
+            pubsub = self.redis.pubsub()
+            try:
+                await pubsub.subscribe(self.INVALIDATION_CHANNEL)
+                async for message in pubsub.listen():
+                    if message["type"] != "message":
+                        continue
+                    origin, quiz_id = message["data"].split(":", 1)
+                    if origin != self._origin:
+                        self.forget_local(UUID(quiz_id))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Пока подписка лежала, сообщения могли потеряться
+                logger.warning("Quiz cache subscription lost: %s", e)
+                self._local.clear()
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.aclose()
+
+    def start(self) -> None:
+        if self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+
+
+quiz_cache = QuizCache(
+    redis_client,
+    l1_size=settings.QUIZ_CACHE_L1_SIZE,
+    l1_ttl=settings.QUIZ_CACHE_L1_TTL_SECONDS,
+    ttl=settings.QUIZ_CACHE_TTL_SECONDS,
+)
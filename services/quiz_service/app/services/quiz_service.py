@@ -1,15 +1,189 @@
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Tuple, Union
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, and_, or_, desc, asc
-from services.quiz_service.app.models import Quiz, Question, Answer, Tag
-from services.quiz_service.app.schemas import QuizCreate, QuizUpdate
-from services.quiz_service.app.utils import get_or_create_tags, get_quiz_with_questions
+from sqlalchemy import select, update, func, and_, or_, desc, asc, tuple_, distinct, false
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.orm import lazyload
+from services.quiz_service.app.models import Quiz, Question, Answer, Tag, quiz_tag_association, SEARCH_CONFIGS
+from services.quiz_service.app.schemas import QuestionCreate, QuestionResponse, QuizCreate, QuizUpdate, QuizResponse, QuizSummaryResponse
+from services.quiz_service.app.utils import (
+    FULL_QUIZ_OPTIONS,
+    decode_cursor,
+    encode_cursor,
+    get_or_create_tags,
+    get_quiz_with_questions,
+    normalize_tag_name,
+    requested_tag_names,
+)
+from services.quiz_service.app.services.quiz_cache import CachedQuiz, quiz_cache
 from uuid import UUID
 
+# Режимы выдачи списков квизов
+SUMMARY_VIEW = "summary"
+FULL_VIEW = "full"
+
+RELEVANCE_SORT = "relevance"
+
+# Сколько самых частых тегов отдавать в фасетах поиска
+FACET_LIMIT = 20
+
+
+def _search_tsquery(search_query: str):
+    """Запрос пользователя в синтаксисе websearch для всех конфигураций индекса"""
+    tsquery = None
+    for config in SEARCH_CONFIGS:
+        part = func.websearch_to_tsquery(config, search_query)
+        tsquery = part if tsquery is None else tsquery.op("||")(part)
+    return tsquery
+
+
+def _search_filter(search_query: str):
+    """Полнотекстовое совпадение или подстрока (ILIKE обслуживают триграммные индексы)"""
+    return or_(
+        Quiz.search_vector.op("@@")(_search_tsquery(search_query)),
+        Quiz.title.ilike(f"%{search_query}%"),
+        Quiz.description.ilike(f"%{search_query}%"),
+    )
+
+
+def _search_rank(search_query: str):
+    return func.ts_rank(Quiz.search_vector, _search_tsquery(search_query))
+
+
+def _tags_filter(tags: List[str]):
+    """Квиз должен иметь все теги: одно полусоединение с GROUP BY/HAVING вместо JOIN на каждый тег"""
+    if not any(normalize_tag_name(tag) for tag in tags):
+        return false()
+    # Регистр сравнивает lower() базы, как уникальный индекс тегов
+    requested = select(func.lower(requested_tag_names(tags).c.name).label("key")).distinct().subquery()
+    tagged_quiz_ids = (
+        select(quiz_tag_association.c.quiz_id)
+        .join(Tag, Tag.id == quiz_tag_association.c.tag_id)
+        .where(func.lower(Tag.name).in_(select(requested.c.key)))
+        .group_by(quiz_tag_association.c.quiz_id)
+        .having(func.count(distinct(Tag.id)) == select(func.count()).select_from(requested).scalar_subquery())
+    )
+    return Quiz.id.in_(tagged_quiz_ids)
+
+
+def _search_filters(
+    search_query: str = None,
+    tags: List[str] = None,
+    user_id: UUID = None,
+    exclude_user_id: UUID = None,
+    is_ai_generated: bool = None,
+) -> list:
+    """Условия поиска, общие для выдачи, подсчёта и фасетов"""
+    filters = []
+
+    if search_query:
+        filters.append(_search_filter(search_query))
+
+    if tags:
+        filters.append(_tags_filter(tags))
+
+    if user_id:
+        filters.append(Quiz.user_id == user_id)
+
+    if exclude_user_id:
+        filters.append(Quiz.user_id != exclude_user_id)
+
+    if is_ai_generated is not None:
+        filters.append(Quiz.is_ai_generated == is_ai_generated)
+
+    return filters
+
+
+def _summary_select():
+    """SELECT карточек квизов: количество вопросов, баллы и теги считает Postgres"""
+    question_count = (
+        select(func.count(Question.id))
+        .where(Question.quiz_id == Quiz.id)
+        .correlate(Quiz)
+        .scalar_subquery()
+    )
+    total_points = (
+        select(func.coalesce(func.sum(Question.points), 0))
+        .where(Question.quiz_id == Quiz.id)
+        .correlate(Quiz)
+        .scalar_subquery()
+    )
+    tag_names = (
+        select(func.array_agg(aggregate_order_by(Tag.name, Tag.name)))
+        .join(quiz_tag_association, quiz_tag_association.c.tag_id == Tag.id)
+        .where(quiz_tag_association.c.quiz_id == Quiz.id)
+        .correlate(Quiz)
+        .scalar_subquery()
+    )
+    return select(
+        Quiz.id,
+        Quiz.title,
+        Quiz.description,
+        Quiz.is_ai_generated,
+        Quiz.user_id,
+        Quiz.created_at,
+        Quiz.updated_at,
+        tag_names.label("tags"),
+        question_count.label("question_count"),
+        total_points.label("total_points"),
+    )
+
+
 class QuizService:
     def __init__(self, db: AsyncSession):
         self.db = db
 
+    def _listing_select(self, view: str):
+        if view == FULL_VIEW:
+            return select(Quiz).options(*FULL_QUIZ_OPTIONS)
+        return _summary_select()
+
+    async def _fetch_listing(self, query, view: str) -> List[Tuple[Union[Quiz, QuizSummaryResponse], Any]]:
+        """Runs a listing query with a trailing sort_key column, returns (item, sort_key) pairs"""
+        result = await self.db.execute(query)
+        if view == FULL_VIEW:
+            return [(row[0], row.sort_key) for row in result.unique()]
+        return [
+            (QuizSummaryResponse.model_validate({**row._mapping, "tags": row.tags or []}), row.sort_key)
+            for row in result
+        ]
+
+    async def _fetch_page(
+        self,
+        query,
+        view: str,
+        sort_by: str,
+        sort_order: str,
+        limit: int,
+        cursor: Optional[str],
+        order_column=None,
+    ) -> Tuple[List[Union[Quiz, QuizSummaryResponse]], Optional[str]]:
+        """Keyset pagination on (sort column, id): fetches limit + 1 rows to find out has_next"""
+        if order_column is None:
+            order_column = getattr(Quiz, sort_by)
+        direction = asc if sort_order == "asc" else desc
+
+        if cursor:
+            value, last_id = decode_cursor(cursor, sort_by, sort_order)
+            position = tuple_(order_column, Quiz.id)
+            if sort_order == "asc":
+                query = query.where(position > tuple_(value, last_id))
+            else:
+                query = query.where(position < tuple_(value, last_id))
+
+        query = (
+            query.add_columns(order_column.label("sort_key"))
+            .order_by(direction(order_column), direction(Quiz.id))
+            .limit(limit + 1)
+        )
+        rows = await self._fetch_listing(query, view)
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last, sort_key = rows[-1]
+            next_cursor = encode_cursor(sort_by, sort_order, sort_key, last.id)
+        return [item for item, _ in rows], next_cursor
+
     async def create_quiz(self, quiz_data: QuizCreate, user_id: UUID) -> Quiz:
         """Create a new quiz with questions and answers using ORM relationships."""
 
@@ -68,19 +242,81 @@ class QuizService:
         
         return quiz
 
-    async def get_quiz(self, quiz_id: UUID) -> Optional[Quiz]:
-        """Get quiz by ID"""
-        quiz = await get_quiz_with_questions(quiz_id, self.db)
+    async def create_draft_quiz(self, title: str, description: str, user_id: UUID, is_ai_generated: bool = True) -> Quiz:
+        """Create a quiz without questions; they are appended with add_question as they arrive"""
+        quiz = Quiz(
+            title=title,
+            description=description,
+            is_ai_generated=is_ai_generated,
+            user_id=user_id
+        )
+        self.db.add(quiz)
+        await self.db.commit()
+        await self.db.refresh(quiz)
         return quiz
 
-    async def get_quizzes_by_user(self, user_id: UUID, limit: int = 20, offset: int = 0) -> List[Quiz]:
-        """Get quizzes created by user"""
-        query = select(Quiz).where(Quiz.user_id == user_id).offset(offset).limit(limit)
-        result = await self.db.execute(query)
-        return result.scalars().unique().all()
+    async def add_question(self, quiz: QuizResponse, question_data: QuestionCreate) -> QuizResponse:
+        """
+        Append a question with its answers to an existing quiz and return the
+        quiz with it. The quiz is not reloaded and not published to the quiz
+        cache: the caller decides when to publish the accumulated version
+        """
+        question = Question(
+            quiz_id=quiz.id,
+            question_type=question_data.question_type,
+            question_text=question_data.question_text,
+            points=question_data.points
+        )
+        question.answers = [
+            Answer(
+                answer_text=answer_data.answer_text,
+                is_correct=answer_data.is_correct
+            )
+            for answer_data in question_data.answers
+        ]
+        self.db.add(question)
+
+        # Новый вопрос - новая версия квиза для кэша
+        updated_at = (await self.db.execute(
+            update(Quiz).where(Quiz.id == quiz.id).values(updated_at=func.now()).returning(Quiz.updated_at)
+        )).scalar_one()
+        await self.db.commit()
+
+        return quiz.model_copy(update={
+            "updated_at": updated_at,
+            "questions": [*quiz.questions, QuestionResponse.model_validate(question)],
+        })
+
+    async def get_compiled_quiz(self, quiz_id: UUID) -> Optional[CachedQuiz]:
+        """Get compiled quiz (with its answer key), served from the quiz cache when possible"""
+        cached = await quiz_cache.get(quiz_id)
+        if cached:
+            return cached
 
-    async def update_quiz(self, quiz_id: UUID, quiz_data: QuizUpdate) -> Optional[Quiz]:
-        """Update quiz"""
+        quiz = await get_quiz_with_questions(quiz_id, self.db)
+        if not quiz:
+            return None
+
+        return await quiz_cache.set(QuizResponse.model_validate(quiz))
+
+    async def get_quiz(self, quiz_id: UUID) -> Optional[QuizResponse]:
+        """Get quiz by ID"""
+        compiled = await self.get_compiled_quiz(quiz_id)
+        return compiled.quiz if compiled else None
+
+    async def get_quizzes_by_user(
+        self,
+        user_id: UUID,
+        limit: int = 20,
+        cursor: Optional[str] = None,
+        view: str = SUMMARY_VIEW,
+    ) -> Tuple[List[Union[Quiz, QuizSummaryResponse]], Optional[str]]:
+        """Get a page of quizzes created by user (newest first) and the cursor of the next page"""
+        query = self._listing_select(view).where(Quiz.user_id == user_id)
+        return await self._fetch_page(query, view, "created_at", "desc", limit, cursor)
+
+    async def update_quiz(self, quiz_id: UUID, quiz_data: QuizUpdate) -> Optional[QuizResponse]:
+        """Update quiz and publish the new version to the quiz cache"""
         quiz = await get_quiz_with_questions(quiz_id, self.db)
         if not quiz:
             return None
@@ -126,10 +362,17 @@ class QuizService:
             
             quiz.questions = questions_list
 
+        # Версия кэша - updated_at, поэтому двигаем её даже если менялись
+        # только теги или вопросы
+        quiz.updated_at = func.now()
+
         await self.db.commit()
         
         # Получаем обновленный квиз с полной загрузкой связанных данных
-        return await get_quiz_with_questions(quiz_id, self.db)
+        updated_quiz = await get_quiz_with_questions(quiz_id, self.db)
+        compiled = QuizResponse.model_validate(updated_quiz)
+        await quiz_cache.replace(compiled)
+        return compiled
 
     async def delete_quiz(self, quiz_id: UUID) -> bool:
         """Delete quiz"""
@@ -139,6 +382,7 @@ class QuizService:
 
         await self.db.delete(quiz)
         await self.db.commit()
+        await quiz_cache.invalidate(quiz_id)
         return True
 
     async def search_quizzes_advanced(
@@ -151,54 +395,23 @@ class QuizService:
         sort_by: str = "created_at",
         sort_order: str = "desc",
         limit: int = 20,
-        offset: int = 0
-    ) -> List[Quiz]:
-        """Advanced search with sorting and filtering"""
-        query = select(Quiz)
-        
-        # Build filters
-        filters = []
-        
-        if search_query:
-            search_filter = or_(
-                Quiz.title.ilike(f"%{search_query}%"),
-                Quiz.description.ilike(f"%{search_query}%")
-            )
-            filters.append(search_filter)
-        
-        if user_id:
-            filters.append(Quiz.user_id == user_id)
-        
-        if exclude_user_id:
-            filters.append(Quiz.user_id != exclude_user_id)
-        
-        if is_ai_generated is not None:
-            filters.append(Quiz.is_ai_generated == is_ai_generated)
-        
+        cursor: Optional[str] = None,
+        view: str = SUMMARY_VIEW
+    ) -> Tuple[List[Union[Quiz, QuizSummaryResponse]], Optional[str]]:
+        """Advanced search with sorting and filtering, returns the page and the next page cursor"""
+        query = self._listing_select(view)
+
+        filters = _search_filters(search_query, tags, user_id, exclude_user_id, is_ai_generated)
         if filters:
             query = query.where(and_(*filters))
-        
-        # Handle tags filtering
-        if tags:
-            for tag_name in tags:
-                query = query.join(Quiz.tags).where(Tag.name == tag_name)
-        
-        # Apply sorting
-        if sort_by == "title":
-            order_column = Quiz.title
-        elif sort_by == "updated_at":
-            order_column = Quiz.updated_at
-        else:  # default to created_at
-            order_column = Quiz.created_at
-        
-        if sort_order == "asc":
-            query = query.order_by(asc(order_column))
-        else:
-            query = query.order_by(desc(order_column))
-        
-        query = query.offset(offset).limit(limit)
-        result = await self.db.execute(query)
-        return result.scalars().unique().all()
+
+        order_column = None
+        if sort_by == RELEVANCE_SORT and search_query:
+            order_column = _search_rank(search_query)
+        elif sort_by not in ("title", "updated_at"):
+            sort_by = "created_at"
+
+        return await self._fetch_page(query, view, sort_by, sort_order, limit, cursor, order_column)
 
     async def get_search_count(
         self,
@@ -210,37 +423,52 @@ class QuizService:
     ) -> int:
         """Get total count for search results"""
         query = select(func.count(Quiz.id))
-        
-        # Build filters (same as search_quizzes_advanced)
-        filters = []
-        
-        if search_query:
-            search_filter = or_(
-                Quiz.title.ilike(f"%{search_query}%"),
-                Quiz.description.ilike(f"%{search_query}%")
-            )
-            filters.append(search_filter)
-        
-        if user_id:
-            filters.append(Quiz.user_id == user_id)
-        
-        if exclude_user_id:
-            filters.append(Quiz.user_id != exclude_user_id)
-        
-        if is_ai_generated is not None:
-            filters.append(Quiz.is_ai_generated == is_ai_generated)
-        
+
+        filters = _search_filters(search_query, tags, user_id, exclude_user_id, is_ai_generated)
         if filters:
             query = query.where(and_(*filters))
-        
-        # Handle tags filtering
-        if tags:
-            for tag_name in tags:
-                query = query.join(Quiz.tags).where(Tag.name == tag_name)
-        
+
         result = await self.db.execute(query)
         return result.scalar() or 0
 
+    async def get_search_facets(
+        self,
+        search_query: str = None,
+        tags: List[str] = None,
+        user_id: UUID = None,
+        exclude_user_id: UUID = None,
+        is_ai_generated: bool = None,
+        limit: int = FACET_LIMIT
+    ) -> Tuple[int, Dict[str, int]]:
+        """Get total count and per-tag counts for search results in one query"""
+        matching = select(Quiz.id)
+        filters = _search_filters(search_query, tags, user_id, exclude_user_id, is_ai_generated)
+        if filters:
+            matching = matching.where(and_(*filters))
+        matching = matching.cte("matching")
+
+        hits = func.count().label("hits")
+        tag_counts = (
+            select(Tag.name, hits)
+            .join(quiz_tag_association, quiz_tag_association.c.tag_id == Tag.id)
+            .where(quiz_tag_association.c.quiz_id.in_(select(matching.c.id)))
+            .group_by(Tag.name)
+            .order_by(desc(hits), Tag.name)
+            .limit(limit)
+            .subquery()
+        )
+        facet_order = (desc(tag_counts.c.hits), tag_counts.c.name)
+        query = select(
+            select(func.count()).select_from(matching).scalar_subquery().label("total"),
+            select(func.array_agg(aggregate_order_by(tag_counts.c.name, *facet_order)))
+            .scalar_subquery().label("names"),
+            select(func.array_agg(aggregate_order_by(tag_counts.c.hits, *facet_order)))
+            .scalar_subquery().label("counts"),
+        )
+
+        row = (await self.db.execute(query)).one()
+        return row.total, dict(zip(row.names or [], row.counts or []))
+
     async def get_quiz_count_by_user(self, user_id: UUID) -> int:
         """Get total number of quizzes created by user"""
         query = select(func.count(Quiz.id)).where(Quiz.user_id == user_id)
@@ -249,13 +477,14 @@ class QuizService:
 
     async def get_all_tags(self) -> List[Tag]:
         """Get all available tags"""
-        query = select(Tag).order_by(Tag.name)
+        # Без lazyload joined-связь потянула бы все квизы тега с вопросами и ответами
+        query = select(Tag).options(lazyload(Tag.quizzes)).order_by(Tag.name)
         result = await self.db.execute(query)
         return result.scalars().unique().all()
 
     async def get_tags_with_search(self, search: str = None, limit: int = 50) -> List[Tag]:
         """Get tags with optional search"""
-        query = select(Tag)
+        query = select(Tag).options(lazyload(Tag.quizzes))
         
         if search:
             query = query.where(Tag.name.ilike(f"%{search}%"))
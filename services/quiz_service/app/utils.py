@@ -1,38 +1,107 @@
-from typing import List
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
-from services.quiz_service.app.models import Quiz, Tag, Question
+from sqlalchemy import String, column, func, select, values
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from services.quiz_service.app.models import Quiz, Tag, Question, Answer
 from uuid import UUID
-from sqlalchemy.orm import selectinload, joinedload
+from sqlalchemy.orm import selectinload, joinedload, lazyload
+
+# Полная загрузка квиза: selectin вместо lazy="joined" из models.py, обратные
+# связи не подтягиваем, иначе каждый запрос снова джойнит весь граф
+FULL_QUIZ_OPTIONS = (
+    selectinload(Quiz.questions).options(
+        lazyload(Question.quiz),
+        selectinload(Question.answers).lazyload(Answer.question),
+    ),
+    selectinload(Quiz.tags).lazyload(Tag.quizzes),
+)
+
+def encode_cursor(sort_by: str, sort_order: str, value: Any, quiz_id: UUID) -> str:
+    """Opaque keyset cursor: sort parameters, sort column value and quiz id"""
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    payload = json.dumps([sort_by, sort_order, value, str(quiz_id)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str, sort_by: str, sort_order: str) -> Tuple[Any, UUID]:
+    """Decode cursor produced by encode_cursor, raises ValueError if it is malformed"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_sort_by, cursor_sort_order, value, quiz_id = json.loads(base64.urlsafe_b64decode(padded))
+        quiz_id = UUID(quiz_id)
+        if cursor_sort_by in ("created_at", "updated_at"):
+            value = datetime.fromisoformat(value)
+        elif cursor_sort_by == "relevance":
+            value = float(value)
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+    if (cursor_sort_by, cursor_sort_order) != (sort_by, sort_order):
+        raise ValueError("Cursor does not match sort parameters")
+    return value, quiz_id
+
+def normalize_tag_name(name: str) -> str:
+    """Tag names are compared case-insensitively, surrounding whitespace is dropped"""
+    return name.strip()
+
+def _tag_names(tag_names: Iterable[str]) -> List[str]:
+    # Повторы убираем, а разные регистры оставляем: схлопывает их lower() базы,
+    # который не всегда совпадает с str.lower() (например, для 'İ')
+    return list(dict.fromkeys(name for name in map(normalize_tag_name, tag_names) if name))
+
+async def _insert_missing_tags(names: Iterable[str], db: AsyncSession) -> None:
+    # Строки вставляются по порядку: из написаний одного тега выигрывает первое
+    await db.execute(
+        pg_insert(Tag)
+        .values([{"name": name} for name in names])
+        .on_conflict_do_nothing(index_elements=[func.lower(Tag.name)])
+    )
+
+def requested_tag_names(tag_names: Iterable[str]):
+    """Requested tag names as a VALUES row set, to be matched against tags by the database lower()"""
+    return values(column("name", String), name="requested_tag").data([(name,) for name in _tag_names(tag_names)])
 
 async def get_or_create_tags(tag_names: List[str], db: AsyncSession) -> List[Tag]:
-    """Get existing tags or create new ones"""
-    tags = []
-    
-    for tag_name in tag_names:
-        # Check if tag exists
-        query = select(Tag).where(Tag.name == tag_name)
-        result = await db.execute(query)
-        tag = result.scalars().first()
-        
-        if not tag:
-            # Create new tag
-            tag = Tag(name=tag_name)
-            db.add(tag)
-            await db.flush()  # Get the ID without committing
-        
-        tags.append(tag)
-    
-    return tags
+    """Get existing tags or create new ones: one upsert and one SELECT for the whole list"""
+    names = _tag_names(tag_names)
+    if not names:
+        return []
+
+    await _insert_missing_tags(names, db)
+    requested = requested_tag_names(names)
+    result = await db.execute(
+        select(requested.c.name, Tag)
+        .join(Tag, func.lower(Tag.name) == func.lower(requested.c.name))
+        .options(lazyload(Tag.quizzes))
+    )
+    tags_by_name = dict(result.all())
+    # Несколько написаний одного тега дают одну строку
+    return list({tags_by_name[name].id: tags_by_name[name] for name in names}.values())
+
+async def get_or_create_tag_ids(tag_names: Iterable[str], db: AsyncSession) -> Dict[str, UUID]:
+    """Same as get_or_create_tags, but returns tag ids by normalized name without loading ORM objects"""
+    names = _tag_names(tag_names)
+    if not names:
+        return {}
+
+    await _insert_missing_tags(names, db)
+    requested = requested_tag_names(names)
+    result = await db.execute(
+        select(requested.c.name, Tag.id).join(Tag, func.lower(Tag.name) == func.lower(requested.c.name))
+    )
+    return dict(result.all())
 
 async def get_quiz_with_questions(quiz_id: UUID, db: AsyncSession) -> Quiz | None:
+    # Квиз мог уже быть в сессии со старыми вопросами (например, после add_question):
+    # populate_existing перезаписывает его и коллекции тем, что сейчас в базе
     result = await db.execute(
         select(Quiz)
-        .options(
-            selectinload(Quiz.questions).selectinload(Question.answers),
-            selectinload(Quiz.tags),
-        )
+        .options(*FULL_QUIZ_OPTIONS)
         .where(Quiz.id == quiz_id)
+        .execution_options(populate_existing=True)
     )
     return result.scalars().first()
 
@@ -0,0 +1,64 @@
+from datetime import datetime, timedelta
+from typing import Dict, List
+from uuid import UUID
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+OWNER_ID = UUID("00000000-0000-0000-0000-00000000a001")
+OTHER_ID = UUID("00000000-0000-0000-0000-00000000a002")
+# Квизы, которые тесты создают генерацией, не попадают в выборки OWNER_ID и OTHER_ID
+AUTHOR_ID = UUID("00000000-0000-0000-0000-00000000a003")
+TAGS = ["python", "sql", "history", "math", "physics"]
+OWNER_QUIZZES = 15
+OTHER_QUIZZES = 5
+QUESTIONS_PER_QUIZ = 5
+ANSWERS_PER_QUESTION = 4
+
+
+async def seed_quizzes(session: AsyncSession) -> Dict[str, List[UUID]]:
+    """
+    Очищает таблицы квизов и создаёт одни и те же данные: OWNER_QUIZZES квизов
+    у OWNER_ID и OTHER_QUIZZES у OTHER_ID, по два тега, вопросы всех типов.
+    """
+    # Модели читают настройки сервиса при импорте, а константы выше нужны и без них
+    from services.quiz_service.app.models import Answer, Question, QuestionType, Quiz, Tag
+
+    await session.execute(text(
+        "TRUNCATE quiz.quiz_result, quiz.quiz_tag_association, quiz.answer, "
+        "quiz.question, quiz.tag, quiz.quiz CASCADE"
+    ))
+    tags = [Tag(name=name) for name in TAGS]
+    session.add_all(tags)
+
+    question_types = list(QuestionType)
+    started = datetime(2025, 1, 1)
+    quizzes: Dict[UUID, List["Quiz"]] = {OWNER_ID: [], OTHER_ID: []}
+    for index in range(OWNER_QUIZZES + OTHER_QUIZZES):
+        user_id = OWNER_ID if index < OWNER_QUIZZES else OTHER_ID
+        created_at = started + timedelta(hours=index)
+        quiz = Quiz(
+            title=f"Quiz {index} about {TAGS[index % len(TAGS)]}",
+            description=f"Deterministic fixture quiz number {index}",
+            is_ai_generated=index % 4 == 0,
+            user_id=user_id,
+            created_at=created_at,
+            updated_at=created_at,
+            tags=[tags[index % len(TAGS)], tags[(index + 1) % len(TAGS)]],
+        )
+        for position in range(QUESTIONS_PER_QUIZ):
+            question = Question(
+                question_type=question_types[position % len(question_types)],
+                question_text=f"Question {position} of quiz {index}",
+                points=position + 1,
+            )
+            question.answers = [
+                Answer(answer_text=f"Answer {answer}", is_correct=answer == 0)
+                for answer in range(ANSWERS_PER_QUESTION)
+            ]
+            quiz.questions.append(question)
+        session.add(quiz)
+        quizzes[user_id].append(quiz)
+
+    await session.commit()
+    return {"owner": [quiz.id for quiz in quizzes[OWNER_ID]], "other": [quiz.id for quiz in quizzes[OTHER_ID]]}
@@ -0,0 +1,75 @@
+"""
+История попыток: удаление квиза не удаляет попытки, в том числе те, что
+ещё ждали записи в буфере attempt_writer.
+"""
+from typing import Dict, List
+from uuid import UUID
+
+import pytest
+from sqlalchemy import select
+
+from services.quiz_service.tests.seed import AUTHOR_ID
+
+pytestmark = pytest.mark.asyncio(loop_scope="session")
+
+
+def _one_question_quiz(title: str) -> dict:
+    return {
+        "title": title,
+        "description": "Quiz to delete",
+        "tags": [],
+        "questions": [{
+            "question_type": "single_choice",
+            "question_text": "Question",
+            "points": 3,
+            "answers": [
+                {"answer_text": "Right", "is_correct": True},
+                {"answer_text": "Wrong", "is_correct": False},
+            ],
+        }],
+    }
+
+
+async def _submit_attempt(client, headers: Dict[str, str], title: str) -> str:
+    quiz = (await client.post("/quiz/", json=_one_question_quiz(title), headers=headers)).json()
+    question = quiz["questions"][0]
+    right = next(answer["id"] for answer in question["answers"] if answer["answer_text"] == "Right")
+    response = await client.post(
+        f"/quiz/{quiz['id']}/calculate-result",
+        json={"quiz_id": quiz["id"], "answers": [{"question_id": question["id"], "answers": [right]}]},
+        headers=headers,
+    )
+    assert response.status_code == 200
+    return quiz["id"]
+
+
+async def _attempts(title: str) -> List:
+    from services.quiz_service.app.db import new_session
+    from services.quiz_service.app.models import QuizResult
+
+    async with new_session() as session:
+        result = await session.execute(
+            select(QuizResult.quiz_id, QuizResult.user_id, QuizResult.earned_points)
+            .where(QuizResult.quiz_title == title)
+        )
+        return result.all()
+
+
+async def test_deleting_quiz_keeps_stored_attempts(client, seeded, author_auth_headers, flush_attempts):
+    quiz_id = await _submit_attempt(client, author_auth_headers, "Deleted after the flush")
+    await flush_attempts()
+
+    response = await client.delete(f"/quiz/{quiz_id}", headers=author_auth_headers)
+
+    assert response.status_code == 204
+    assert await _attempts("Deleted after the flush") == [(None, AUTHOR_ID, 3)]
+
+
+async def test_deleting_quiz_keeps_buffered_attempts(client, seeded, author_auth_headers, flush_attempts):
+    quiz_id = await _submit_attempt(client, author_auth_headers, "Deleted before the flush")
+
+    response = await client.delete(f"/quiz/{quiz_id}", headers=author_auth_headers)
+    await flush_attempts()
+
+    assert response.status_code == 204
+    assert await _attempts("Deleted before the flush") == [(None, AUTHOR_ID, 3)]
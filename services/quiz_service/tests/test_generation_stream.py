@@ -0,0 +1,53 @@
+"""
+Потоковая генерация квиза: вопросы сохраняются по одному, а задание
+публикует собранный квиз в кэш каждые CACHE_PUBLISH_EVERY вопросов и в конце.
+Открытый после генерации квиз должен содержать все вопросы, а не одну из
+промежуточных версий.
+"""
+import asyncio
+
+import pytest
+
+pytestmark = pytest.mark.asyncio(loop_scope="session")
+
+# Больше CACHE_PUBLISH_EVERY: квиз публикуется и по ходу задания, и в конце
+QUESTION_COUNT = 7
+
+
+async def _wait_for_job(client, job_id: str, headers: dict) -> dict:
+    for _ in range(200):
+        job = (await client.get(f"/quiz/generate-with-ai/{job_id}", headers=headers)).json()
+        if job["status"] in ("completed", "failed"):
+            return job
+        await asyncio.sleep(0.05)
+    pytest.fail(f"Generation job {job_id} did not finish: {job}")
+
+
+async def test_streamed_quiz_has_all_questions(client, seeded, author_auth_headers, clear_quiz_cache):
+    response = await client.post(
+        "/quiz/generate-with-ai",
+        json={
+            "topic": "streamed quiz",
+            "question_count": QUESTION_COUNT,
+            "use_cache": False,
+            "stream": True,
+        },
+        headers=author_auth_headers,
+    )
+    assert response.status_code == 202
+
+    job = await _wait_for_job(client, response.json()["job_id"], author_auth_headers)
+    assert job["status"] == "completed", job
+    assert job["questions_generated"] == QUESTION_COUNT
+    assert not job["partial"]
+
+    # Квиз отдаётся из кэша, куда его опубликовало задание
+    quiz = (await client.get(f"/quiz/{job['quiz_id']}")).json()
+    assert [question["question_text"] for question in quiz["questions"]] == [
+        f"Вопрос {i + 1} по теме 'streamed quiz'" for i in range(QUESTION_COUNT)
+    ]
+    assert all(question["answers"] for question in quiz["questions"])
+
+    # Собранная заданием версия совпадает с квизом, прочитанным из базы
+    await clear_quiz_cache(job["quiz_id"])
+    assert (await client.get(f"/quiz/{job['quiz_id']}")).json() == quiz
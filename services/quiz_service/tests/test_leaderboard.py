@@ -0,0 +1,48 @@
+"""
+Рейтинг квиза хранит лучшую попытку участника: повторное прохождение не
+прибавляет баллы, а общий рейтинг их по-прежнему суммирует.
+"""
+import pytest
+
+from services.quiz_service.tests.seed import AUTHOR_ID
+
+pytestmark = pytest.mark.asyncio(loop_scope="session")
+
+
+async def _submit(client, headers, quiz: dict, right: bool) -> None:
+    question = quiz["questions"][0]
+    answer = next(a["id"] for a in question["answers"] if a["is_correct"] == right)
+    response = await client.post(
+        f"/quiz/{quiz['id']}/calculate-result",
+        json={"quiz_id": quiz["id"], "answers": [{"question_id": question["id"], "answers": [answer]}]},
+        headers=headers,
+    )
+    assert response.status_code == 200
+
+
+async def test_quiz_board_keeps_best_attempt(client, seeded, author_auth_headers):
+    from services.quiz_service.app.db import redis_client
+    from services.quiz_service.app.services.leaderboard_service import LeaderboardService
+
+    quiz = (await client.post("/quiz/", json={
+        "title": "Quiz taken twice",
+        "description": "Leaderboard test",
+        "tags": [],
+        "questions": [{
+            "question_type": "single_choice",
+            "question_text": "Question",
+            "points": 5,
+            "answers": [
+                {"answer_text": "Right", "is_correct": True},
+                {"answer_text": "Wrong", "is_correct": False},
+            ],
+        }],
+    }, headers=author_auth_headers)).json()
+    email = f"{AUTHOR_ID}@example.com"  # профиль из conftest.test_profile
+    total_before = await redis_client.zscore(LeaderboardService.LEADERBOARD_KEY, email) or 0
+
+    for right in (True, True, False):
+        await _submit(client, author_auth_headers, quiz, right)
+
+    assert await redis_client.zscore(LeaderboardService.quiz_key(quiz["id"]), email) == 5
+    assert await redis_client.zscore(LeaderboardService.LEADERBOARD_KEY, email) == total_before + 10
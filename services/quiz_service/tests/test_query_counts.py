@@ -0,0 +1,181 @@
+"""
+Верхние границы числа SQL-выражений и строк на эндпоинт.
+
+Границы - текущее поведение на данных из seed.py. Если тест упал, в
+сообщении есть список выражений: либо запрос стал хуже (N+1, лишний
+join, потерянный selectinload), либо изменение осознанное - тогда
+границу надо поправить вместе с ним.
+"""
+import pytest
+
+from services.quiz_service.tests.seed import (
+    ANSWERS_PER_QUESTION,
+    OTHER_ID,
+    OWNER_ID,
+    OWNER_QUIZZES,
+    QUESTIONS_PER_QUIZ,
+)
+
+pytestmark = pytest.mark.asyncio(loop_scope="session")
+
+
+def _new_quiz(title: str) -> dict:
+    return {
+        "title": title,
+        "description": "Created by the query count tests",
+        "tags": ["python", "fresh-tag"],
+        "questions": [
+            {
+                "question_type": "single_choice",
+                "question_text": f"Question {position}",
+                "points": 1,
+                "answers": [
+                    {"answer_text": f"Answer {answer}", "is_correct": answer == 0}
+                    for answer in range(ANSWERS_PER_QUESTION)
+                ],
+            }
+            for position in range(QUESTIONS_PER_QUIZ)
+        ],
+    }
+
+
+async def test_get_quiz_cold_cache(client, seeded, query_counter, clear_quiz_cache):
+    quiz_id = seeded["owner"][0]
+    await clear_quiz_cache(quiz_id)
+
+    with query_counter.measure() as stats:
+        response = await client.get(f"/quiz/{quiz_id}")
+
+    assert response.status_code == 200
+    assert len(response.json()["questions"]) == QUESTIONS_PER_QUIZ
+    stats.check(max_statements=4, max_rows=28)
+
+
+async def test_get_quiz_warm_cache(client, seeded, query_counter):
+    quiz_id = seeded["owner"][1]
+    await client.get(f"/quiz/{quiz_id}")
+
+    with query_counter.measure() as stats:
+        response = await client.get(f"/quiz/{quiz_id}")
+
+    assert response.status_code == 200
+    stats.check(max_statements=6, max_rows=283)
+
+
+async def test_search_with_tags(client, seeded, query_counter):
+    with query_counter.measure() as stats:
+        response = await client.get(
+            "/quiz/search/",
+            params={"q": "quiz", "tags": ["python", "sql"], "size": 10, "include_total": True},
+        )
+
+    assert response.status_code == 200
+    assert response.json()["items"]
+    stats.check(max_statements=2, max_rows=5)
+
+
+async def test_search_facets(client, seeded, query_counter):
+    with query_counter.measure() as stats:
+        response = await client.get("/quiz/search/", params={"tags": ["history"], "facets": True})
+
+    assert response.status_code == 200
+    stats.check(max_statements=2, max_rows=9)
+
+
+async def test_user_listing_summary(client, seeded, query_counter):
+    with query_counter.measure() as stats:
+        response = await client.get(f"/quiz/user/{OWNER_ID}", params={"size": 10, "include_total": True})
+
+    body = response.json()
+    assert response.status_code == 200
+    assert len(body["items"]) == 10 and body["total"] == OWNER_QUIZZES
+    stats.check(max_statements=2, max_rows=12)
+
+
+async def test_user_listing_next_page(client, seeded, query_counter):
+    first = (await client.get(f"/quiz/user/{OWNER_ID}", params={"size": 10})).json()
+
+    with query_counter.measure() as stats:
+        response = await client.get(f"/quiz/user/{OWNER_ID}", params={"size": 10, "cursor": first["next_cursor"]})
+
+    assert response.status_code == 200
+    assert len(response.json()["items"]) == OWNER_QUIZZES - 10
+    stats.check(max_statements=1, max_rows=5)
+
+
+async def test_user_listing_full_view(client, seeded, query_counter):
+    with query_counter.measure() as stats:
+        response = await client.get(f"/quiz/user/{OTHER_ID}", params={"size": 10, "view": "full"})
+
+    assert response.status_code == 200
+    assert len(response.json()["items"]) == 5
+    stats.check(max_statements=4, max_rows=140)
+
+
+async def test_tags(client, seeded, query_counter):
+    with query_counter.measure() as stats:
+        response = await client.get("/quiz/tags/", params={"search": "py"})
+
+    assert response.status_code == 200
+    stats.check(max_statements=1, max_rows=1)
+
+
+async def test_calculate_result(client, seeded, query_counter, auth_headers, clear_quiz_cache, flush_attempts):
+    quiz_id = seeded["other"][0]
+    await clear_quiz_cache(quiz_id)
+    quiz = (await client.get(f"/quiz/{quiz_id}")).json()
+    answers = [
+        {"question_id": question["id"], "answers": [question["answers"][0]["id"]]}
+        for question in quiz["questions"]
+    ]
+
+    # Квиз уже в кэше: проверка ответов не должна ходить в базу, попытка пишется фоном
+    with query_counter.measure() as stats:
+        response = await client.post(
+            f"/quiz/{quiz_id}/calculate-result",
+            json={"quiz_id": str(quiz_id), "answers": answers},
+            headers=auth_headers,
+        )
+
+    assert response.status_code == 200
+    stats.check(max_statements=6, max_rows=283)
+
+    # Фоновая запись - одна вставка на пачку
+    with query_counter.measure() as stats:
+        await flush_attempts()
+
+    stats.check(max_statements=1, max_rows=1)
+
+
+async def test_create_quiz(client, seeded, query_counter, auth_headers):
+    with query_counter.measure() as stats:
+        response = await client.post("/quiz/", json=_new_quiz("Created quiz"), headers=auth_headers)
+
+    assert response.status_code == 201
+    stats.check(max_statements=7, max_rows=69)
+
+
+async def test_update_quiz(client, seeded, query_counter, auth_headers):
+    quiz_id = (await client.post("/quiz/", json=_new_quiz("Quiz to update"), headers=auth_headers)).json()["id"]
+    update = _new_quiz("Updated quiz")
+    update["tags"] = ["sql"]
+
+    with query_counter.measure() as stats:
+        response = await client.put(f"/quiz/{quiz_id}", json=update, headers=auth_headers)
+
+    assert response.status_code == 200
+    assert response.json()["title"] == "Updated quiz"
+    stats.check(max_statements=22, max_rows=112)
+
+
+async def test_import_quizzes(client, seeded, query_counter, author_auth_headers):
+    import json
+
+    body = "\n".join(json.dumps(_new_quiz(f"Imported quiz {i}")) for i in range(10))
+
+    with query_counter.measure() as stats:
+        response = await client.post("/quiz/import", content=body, headers=author_auth_headers)
+
+    assert response.json() == {"imported": 10, "failed": 0, "errors": []}
+    # Теги и now() на пачку; сами строки пишет COPY, мимо событий engine
+    stats.check(max_statements=3, max_rows=4)
@@ -0,0 +1,42 @@
+"""
+Кэш квизов и отстающие чтения: квиз, прочитанный до обновления или
+удаления, не должен оседать в L1 поверх того, что уже лежит в Redis.
+"""
+from datetime import timedelta
+
+import pytest
+
+pytestmark = pytest.mark.asyncio(loop_scope="session")
+
+
+async def _load(client, quiz_id):
+    from services.quiz_service.app.schemas import QuizResponse
+
+    return QuizResponse.model_validate((await client.get(f"/quiz/{quiz_id}")).json())
+
+
+async def test_stale_read_gets_newer_version(client, seeded, clear_quiz_cache):
+    from services.quiz_service.app.services.quiz_cache import quiz_cache
+
+    quiz_id = seeded["other"][1]
+    await clear_quiz_cache(quiz_id)
+    quiz = await _load(client, quiz_id)
+    stale = quiz.model_copy(update={"title": "Stale title", "updated_at": quiz.updated_at - timedelta(seconds=1)})
+
+    entry = await quiz_cache.set(stale)
+
+    assert entry.quiz.title == quiz.title
+    assert (await quiz_cache.get(quiz_id)).quiz.title == quiz.title
+
+
+async def test_stale_read_of_deleted_quiz_is_not_cached(client, seeded, clear_quiz_cache):
+    from services.quiz_service.app.services.quiz_cache import quiz_cache
+
+    quiz_id = seeded["other"][2]
+    await clear_quiz_cache(quiz_id)
+    quiz = await _load(client, quiz_id)
+    await quiz_cache.invalidate(quiz_id)
+
+    assert await quiz_cache.set(quiz) is None
+    assert await quiz_cache.get(quiz_id) is None
+    await clear_quiz_cache(quiz_id)
@@ -0,0 +1,41 @@
+"""
+Теги сравниваются без учёта регистра по lower() базы. str.lower() с ним
+расходится (lower('İ') в Postgres - 'i', в Python - 'i' с точкой сверху),
+поэтому такие написания должны вести к одному тегу, а не ронять запрос.
+"""
+import json
+
+import pytest
+
+pytestmark = pytest.mark.asyncio(loop_scope="session")
+
+
+def _quiz(title: str, tags: list) -> dict:
+    return {
+        "title": title,
+        "description": "Tag matching test",
+        "tags": tags,
+        "questions": [{
+            "question_type": "single_choice",
+            "question_text": "Question",
+            "points": 1,
+            "answers": [{"answer_text": "Answer", "is_correct": True}],
+        }],
+    }
+
+
+async def test_spellings_of_one_tag_share_it(client, seeded, author_auth_headers):
+    created = await client.post(
+        "/quiz/", json=_quiz("Tagged by spellings", ["İstanbul", "istanbul"]), headers=author_auth_headers
+    )
+    assert created.status_code == 201
+    assert [tag["name"] for tag in created.json()["tags"]] == ["İstanbul"]
+
+    body = json.dumps(_quiz("Imported with another spelling", ["ISTANBUL", "İSTANBUL"]))
+    report = (await client.post("/quiz/import", content=body, headers=author_auth_headers)).json()
+    assert report == {"imported": 1, "failed": 0, "errors": []}
+
+    response = await client.get("/quiz/search/", params={"tags": ["İstanbul", "ISTANBUL"], "size": 10})
+    assert sorted(quiz["title"] for quiz in response.json()["items"]) == [
+        "Imported with another spelling", "Tagged by spellings",
+    ]
@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends
 from services.results_service.app.schemas import CreateUserResult, Result
-from services.results_service.app.dependencies import db_depends
+from services.shared.edu_shared.dependencies import db_depends, read_db_depends
 from services.results_service.app.services.results_service import user_result, create_user_result
 from services.shared.edu_shared.dependencies import get_current_user_id
 
@@ -9,7 +9,7 @@ router = APIRouter()
 
 
 @router.get("/result", response_model=Result)
-async def get_user_result(db: db_depends, current_user_id: str = Depends(get_current_user_id)):
+async def get_user_result(db: read_db_depends, current_user_id: str = Depends(get_current_user_id)):
     return await user_result(current_user_id, db)
 
 
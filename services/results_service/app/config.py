@@ -1,11 +1,11 @@
 from pathlib import Path
-from pydantic_settings import BaseSettings
+from services.shared.edu_shared.db import DatabaseSettings
+from services.shared.edu_shared.log import LoggingSettings
 
 
-class Settings(BaseSettings):
+class Settings(DatabaseSettings, LoggingSettings):
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
-    DATABASE_URL: str
 
     
     class Config:
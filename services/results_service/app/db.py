@@ -1,17 +1,16 @@
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncAttrs
+from sqlalchemy.ext.asyncio import AsyncAttrs
 from sqlalchemy.orm import DeclarativeBase
 from services.results_service.app.config import settings
+from services.shared.edu_shared.db import Database
 
 
 
 
-engine = create_async_engine(settings.DATABASE_URL)
+database = Database(settings)
 
-new_session = async_sessionmaker(engine, expire_on_commit=False)
+engine = database.engine
 
-async def get_session():
-    async with new_session() as session:
-        yield session
+new_session = database.new_session
 
 class Base(AsyncAttrs, DeclarativeBase):
     pass
\ No newline at end of file
@@ -1,9 +1,16 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from services.results_service.app.api.results_router import router as results_router
+from services.results_service.app.config import settings
+from services.results_service.app.db import database
+from services.shared.edu_shared.log import RequestIdMiddleware, configure_logging
+from services.shared.edu_shared.metrics import install_metrics
+
+configure_logging(settings, "results-service")
 
 
 app = FastAPI(summary="Results Service")
+app.state.database = database
 
 # CORS middleware
 app.add_middleware(
@@ -14,4 +21,8 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Латентность и SQL на запрос: /metrics и заголовок Server-Timing
+install_metrics(app, database)
+app.add_middleware(RequestIdMiddleware)
+
 app.include_router(results_router, prefix="/results", tags=["results"])
\ No newline at end of file
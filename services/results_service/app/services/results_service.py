@@ -1,7 +1,7 @@
 
 
 from sqlalchemy import select
-from services.results_service.app.dependencies import db_depends
+from services.shared.edu_shared.dependencies import db_depends
 from services.results_service.app.models import Result
 from services.results_service.app.schemas import CreateUserResult, Result as ResultSchema
 
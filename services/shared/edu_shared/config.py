@@ -1,14 +1,22 @@
 
+from functools import lru_cache
 from pydantic_settings import BaseSettings
 from pathlib import Path
 
 class SharedSettings(BaseSettings):
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
+    # Сколько уже проверенных токенов помнить до их exp
+    TOKEN_CACHE_SIZE: int = 10000
     
     class Config:
         env_file = Path.cwd() / ".env"
         extra = "allow"
 
-async def fetch_settings() -> SharedSettings:
+@lru_cache
+def get_shared_settings() -> SharedSettings:
+    # .env читается один раз на процесс
     return SharedSettings()
+
+async def fetch_settings() -> SharedSettings:
+    return get_shared_settings()
@@ -0,0 +1,115 @@
+import itertools
+import logging
+import time
+from typing import Dict, List
+
+from pydantic_settings import BaseSettings
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+
+logger = logging.getLogger(__name__)
+
+
+class DatabaseSettings(BaseSettings):
+    """Подключение к базе, общее для настроек всех сервисов"""
+
+    DATABASE_URL: str
+    # Реплики только для чтения через запятую; пусто - чтение тоже с primary
+    DATABASE_REPLICA_URLS: str = ""
+
+    # Пул соединений каждого engine (на процесс)
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT_SECONDS: float = 10.0
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    # Подготовленные выражения asyncpg на соединение; 0 - для pgbouncer в transaction mode
+    DB_STATEMENT_CACHE_SIZE: int = 500
+    # Сколько не обращаться к реплике после неудачного подключения
+    DB_REPLICA_RETRY_SECONDS: int = 30
+
+
+def create_engine(url: str, settings: DatabaseSettings) -> AsyncEngine:
+    connect_args = {}
+    if make_url(url).drivername.endswith("+asyncpg"):
+        connect_args = {
+            # Кэш SQLAlchemy поверх asyncpg и собственный кэш asyncpg
+            "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+            "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+        }
+    return create_async_engine(
+        url,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+        pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+        pool_pre_ping=True,
+        connect_args=connect_args,
+    )
+
+
+class Database:
+    """
+    Engine primary и реплик одного сервиса.
+
+    new_session - сессия primary: запись и чтение, которое должно видеть
+    только что записанное. new_read_session - сессия реплики для GET-запросов,
+    реплики берутся по кругу. Реплика, к которой не удалось подключиться,
+    пропускается DB_REPLICA_RETRY_SECONDS, а без доступных реплик чтение
+    идёт на primary. Реплика может отставать от primary на время репликации.
+    """
+
+    def __init__(self, settings: DatabaseSettings):
+        self.engine = create_engine(settings.DATABASE_URL, settings)
+        self.new_session = async_sessionmaker(self.engine, expire_on_commit=False)
+
+        replica_urls = [url.strip() for url in settings.DATABASE_REPLICA_URLS.split(",") if url.strip()]
+        self.replicas: List[AsyncEngine] = [create_engine(url, settings) for url in replica_urls]
+        self._replica_sessions = [async_sessionmaker(replica, expire_on_commit=False) for replica in self.replicas]
+        self._unavailable_until = [0.0] * len(self.replicas)
+        self._turn = itertools.count()
+        self.retry_seconds = settings.DB_REPLICA_RETRY_SECONDS
+
+    async def new_read_session(self) -> AsyncSession:
+        """Сессия доступной реплики, или primary, если таких нет"""
+        if not self.replicas:
+            return self.new_session()
+
+        now = time.monotonic()
+        first = next(self._turn)
+        for offset in range(len(self.replicas)):
+            index = (first + offset) % len(self.replicas)
+            if self._unavailable_until[index] > now:
+                continue
+
+            session = self._replica_sessions[index]()
+            try:
+                # Соединение берём сразу: недоступная реплика выясняется здесь, а не посреди запроса
+                await session.connection()
+                return session
+            except (OSError, TimeoutError, DBAPIError) as e:
+                await session.close()
+                self._unavailable_until[index] = time.monotonic() + self.retry_seconds
+                logger.warning("Read replica %d is unavailable, skipping it for %ds: %s", index, self.retry_seconds, e)
+        return self.new_session()
+
+    def is_replica(self, session: AsyncSession) -> bool:
+        """Сессия читает с реплики, и её данные могут отставать от primary"""
+        return session.bind is not self.engine
+
+    def pool_stats(self) -> Dict[str, Dict[str, int]]:
+        """Занятость пулов соединений primary и реплик"""
+        engines = {"primary": self.engine}
+        engines.update({f"replica_{index}": replica for index, replica in enumerate(self.replicas)})
+        return {
+            name: {
+                "size": engine.pool.size(),
+                "checked_out": engine.pool.checkedout(),
+                "overflow": engine.pool.overflow(),
+            }
+            for name, engine in engines.items()
+        }
+
+    async def dispose(self) -> None:
+        for engine in [self.engine, *self.replicas]:
+            await engine.dispose()
@@ -1,9 +1,31 @@
-from fastapi import Depends, HTTPException, status
+from typing import Annotated, AsyncIterator
+
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy.ext.asyncio import AsyncSession
+
 from .security import decode_and_validate_token
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
+
+async def get_session(request: Request) -> AsyncIterator[AsyncSession]:
+    """Сессия primary базы сервиса (Database в app.state.database)"""
+    async with request.app.state.database.new_session() as session:
+        yield session
+
+
+async def get_read_session(request: Request) -> AsyncIterator[AsyncSession]:
+    """Сессия реплики, если она настроена и доступна, иначе primary"""
+    async with await request.app.state.database.new_read_session() as session:
+        yield session
+
+
+db_depends = Annotated[AsyncSession, Depends(get_session)]
+# Только чтение: данные реплики могут отставать от primary
+read_db_depends = Annotated[AsyncSession, Depends(get_read_session)]
+
+
 async def get_current_user_id(token: str = Depends(oauth2_scheme)) -> str:
     try:
         user_id = await decode_and_validate_token(token)
@@ -13,4 +35,4 @@ async def get_current_user_id(token: str = Depends(oauth2_scheme)) -> str:
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
             headers={"WWW-Authenticate": "Bearer"},
-        )
\ No newline at end of file
+        )
@@ -0,0 +1,269 @@
+import atexit
+import json
+import logging
+import queue
+import random
+import re
+import sys
+import uuid
+from contextvars import ContextVar
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Optional
+
+from pydantic_settings import BaseSettings
+from starlette.datastructures import MutableHeaders
+
+from .metrics import CallbackMetric, register
+
+# Логи сервисов: на event loop запись только кладётся в очередь, в stdout
+# её выводит отдельный поток QueueListener. Записи, сделанные во время
+# запроса, получают его request id.
+
+REQUEST_ID_HEADER = b"x-request-id"
+_REQUEST_ID = re.compile(r"^[A-Za-z0-9._:-]{1,128}$")
+
+# Атрибуты LogRecord; всё остальное пришло через extra= и выводится как поля
+# (кроме раскрашенной копии сообщения, которую добавляет uvicorn)
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {
+    "message", "request_id", "color_message"
+}
+# Библиотеки, которые пишут INFO на каждый запрос; исходящие вызовы и так есть в /metrics
+_QUIET_LOGGERS = ("httpx", "httpcore")
+
+
+class LoggingSettings(BaseSettings):
+    """Логирование, общее для настроек всех сервисов"""
+
+    LOG_LEVEL: str = "INFO"
+    # json - по записи JSON на строку, text - для чтения глазами при разработке
+    LOG_FORMAT: str = "json"
+    # Записей в очереди до вывода; сверх этого записи отбрасываются, а не ждут
+    LOG_QUEUE_SIZE: int = 10000
+    # Доля запросов, для которых пишутся отладочные (DEBUG) записи кода сервиса
+    LOG_DEBUG_SAMPLE_RATE: float = 0.0
+    # Доли по маршрутам через запятую: "POST /quiz/{quiz_id}/calculate-result=0.1,/quiz/search/=0.01"
+    LOG_DEBUG_SAMPLE_ROUTES: str = ""
+
+
+@dataclass
+class RequestContext:
+    request_id: str
+    method: str
+    scope: Dict[str, Any]
+    # Решение по отладочным записям принимается один раз на запрос, когда маршрут уже известен
+    debug_sampled: Optional[bool] = None
+
+    @property
+    def route(self) -> Optional[str]:
+        route = self.scope.get("route")
+        return getattr(route, "path", None)
+
+
+_request_context: ContextVar[Optional[RequestContext]] = ContextVar("request_context", default=None)
+
+
+def current_request_id() -> Optional[str]:
+    context = _request_context.get()
+    return context.request_id if context is not None else None
+
+
+class RequestIdMiddleware:
+    """
+    ASGI middleware: request id из заголовка X-Request-ID (или новый) в
+    контексте логов на время запроса и в заголовке ответа.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope["headers"]:
+            if name == REQUEST_ID_HEADER:
+                request_id = value.decode("latin-1")
+                break
+        if request_id is None or not _REQUEST_ID.match(request_id):
+            request_id = uuid.uuid4().hex
+
+        token = _request_context.set(RequestContext(request_id, scope["method"], scope))
+
+        async def send_with_request_id(message):
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).append("X-Request-ID", request_id)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            _request_context.reset(token)
+
+
+class DebugSampler(logging.Filter):
+    """
+    Пропускает отладочные записи кода сервиса только для выбранной доли
+    запросов: по маршруту из routes ("METHOD /path" или "/path") или
+    default_rate. При LOG_LEVEL=DEBUG пропускает всё, вне запросов - ничего.
+    """
+
+    def __init__(self, default_rate: float, routes: Dict[str, float], always: bool):
+        super().__init__()
+        self.default_rate = default_rate
+        self.routes = routes
+        self.always = always
+
+    def _rate(self, context: RequestContext) -> Optional[float]:
+        route = context.route
+        if route is None:
+            return None
+        rate = self.routes.get(f"{context.method} {route}")
+        if rate is None:
+            rate = self.routes.get(route, self.default_rate)
+        return rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG or self.always:
+            return True
+        context = _request_context.get()
+        if context is None:
+            return False
+        if context.debug_sampled is None:
+            rate = self._rate(context)
+            if rate is None:
+                # До маршрутизации решение не запоминаем
+                return random.random() < self.default_rate
+            context.debug_sampled = random.random() < rate
+        return context.debug_sampled
+
+
+class AsyncQueueHandler(QueueHandler):
+    """
+    QueueHandler с ограниченной очередью: запись не блокирует event loop,
+    а при переполненной очереди отбрасывается и учитывается в dropped.
+    Сообщение и traceback собираются здесь: args могут измениться после вызова.
+    """
+
+    def __init__(self, log_queue: "queue.Queue[logging.LogRecord]"):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = logging.makeLogRecord(record.__dict__)
+        record.message = record.getMessage()
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.msg = record.message
+        record.args = None
+        record.exc_info = None
+        record.request_id = current_request_id()
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class JsonFormatter(logging.Formatter):
+    def __init__(self, service: str):
+        super().__init__()
+        self.service = service
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "service": self.service,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if getattr(record, "request_id", None):
+            entry["request_id"] = record.request_id
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s [%(request_id)s] %(name)s: %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        if getattr(record, "request_id", None) is None:
+            record.request_id = "-"
+        return super().format(record)
+
+
+def parse_sample_routes(value: str) -> Dict[str, float]:
+    routes = {}
+    for item in value.split(","):
+        if not item.strip():
+            continue
+        route, _, rate = item.rpartition("=")
+        routes[route.strip()] = float(rate)
+    return routes
+
+
+_handler: Optional[AsyncQueueHandler] = None
+
+
+def configure_logging(settings: LoggingSettings, service: str) -> AsyncQueueHandler:
+    """
+    Настраивает корневой логгер процесса: уровень, формат, очередь и
+    выборку отладочных записей. Логи uvicorn идут через ту же очередь.
+    Повторный вызов возвращает уже настроенный обработчик.
+    """
+    global _handler
+    if _handler is not None:
+        return _handler
+
+    level = logging.getLevelName(settings.LOG_LEVEL.upper())
+    if not isinstance(level, int):
+        raise ValueError(f"Unknown LOG_LEVEL: {settings.LOG_LEVEL}")
+    routes = parse_sample_routes(settings.LOG_DEBUG_SAMPLE_ROUTES)
+
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(JsonFormatter(service) if settings.LOG_FORMAT == "json" else TextFormatter())
+
+    handler = AsyncQueueHandler(queue.Queue(settings.LOG_QUEUE_SIZE))
+    handler.addFilter(DebugSampler(settings.LOG_DEBUG_SAMPLE_RATE, routes, always=level <= logging.DEBUG))
+    listener = QueueListener(handler.queue, output)
+
+    root = logging.getLogger()
+    root.handlers = [handler]
+    root.setLevel(level)
+    if level > logging.DEBUG and (settings.LOG_DEBUG_SAMPLE_RATE or routes):
+        # Отладочные записи создаются только в коде сервисов, библиотеки остаются на LOG_LEVEL
+        logging.getLogger("services").setLevel(logging.DEBUG)
+    if level > logging.DEBUG:
+        for name in _QUIET_LOGGERS:
+            logging.getLogger(name).setLevel(logging.WARNING)
+    for name in ("uvicorn", "uvicorn.error", "uvicorn.access"):
+        # Свои обработчики uvicorn пишут в stdout прямо из event loop
+        uvicorn_logger = logging.getLogger(name)
+        uvicorn_logger.handlers = []
+        uvicorn_logger.propagate = True
+
+    listener.start()
+    # Остаток очереди выводится при завершении процесса
+    atexit.register(listener.stop)
+
+    register(CallbackMetric(
+        "log_records_queued", "Log records waiting to be written", (),
+        lambda: {(): handler.queue.qsize()},
+    ))
+    register(CallbackMetric(
+        "log_records_dropped_total", "Log records dropped because the log queue was full", (),
+        lambda: {(): handler.dropped}, kind="counter",
+    ))
+    _handler = handler
+    return handler
@@ -0,0 +1,341 @@
+import math
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from dataclasses import dataclass
+from functools import wraps
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.datastructures import MutableHeaders
+
+from .db import Database
+
+# Метрики процесса в текстовом формате Prometheus. Каждый воркер uvicorn
+# отдаёт свои значения, суммирует их Prometheus.
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+Labels = Tuple[str, ...]
+
+
+def _format_labels(names: Sequence[str], values: Labels, extra: str = "") -> str:
+    pairs = [
+        '{}="{}"'.format(name, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for name, value in zip(names, values)
+    ]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # Значения по сериям: счётчики корзин (без накопления), сумма, количество
+        self._series: Dict[Labels, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = ([0] * (len(self.buckets) + 1), [0.0, 0.0])
+        counts, totals = series
+        counts[bisect_left(self.buckets, value)] += 1
+        totals[0] += value
+        totals[1] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, (total, count)) in self._series.items():
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, math.inf), counts):
+                cumulative += bucket_count
+                le = _format_labels(self.labelnames, labels, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            label_str = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_str} {_format_value(total)}")
+            lines.append(f"{self.name}_count{label_str} {_format_value(count)}")
+        return lines
+
+
+class CallbackMetric:
+    """Значения, которые callback возвращает в момент запроса /metrics: {labels: value}"""
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str],
+        callback: Callable[[], Dict[Labels, float]],
+        kind: str = "gauge",
+    ):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.callback = callback
+        self.kind = kind
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for labels, value in self.callback().items():
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+REGISTRY: List[Any] = []
+
+
+def register(metric):
+    REGISTRY.append(metric)
+    return metric
+
+
+def render_metrics() -> str:
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+REQUEST_DURATION = register(Histogram(
+    "http_request_duration_seconds", "Request latency by route", ("method", "route", "status")
+))
+REQUEST_SQL_STATEMENTS = register(Histogram(
+    "http_request_sql_statements", "SQL statements executed per request", ("route",), COUNT_BUCKETS
+))
+REQUEST_REDIS_COMMANDS = register(Histogram(
+    "http_request_redis_commands", "Redis commands sent per request", ("route",), COUNT_BUCKETS
+))
+REQUEST_OUTBOUND_CALLS = register(Histogram(
+    "http_request_outbound_calls", "Outbound HTTP calls made per request", ("route",), COUNT_BUCKETS
+))
+SQL_DURATION = register(Histogram(
+    "sql_statement_duration_seconds", "SQL statement latency", ("database",)
+))
+REDIS_DURATION = register(Histogram(
+    "redis_command_duration_seconds", "Redis command or pipeline round-trip latency", ("command",)
+))
+OUTBOUND_DURATION = register(Histogram(
+    "outbound_http_request_duration_seconds", "Outbound HTTP call latency", ("host", "method", "status")
+))
+
+
+@dataclass
+class RequestStats:
+    """Сколько запрос сделал обращений к базе, Redis и другим сервисам и сколько они заняли"""
+
+    sql_count: int = 0
+    sql_seconds: float = 0.0
+    redis_count: int = 0
+    redis_seconds: float = 0.0
+    http_count: int = 0
+    http_seconds: float = 0.0
+
+    def server_timing(self, total_seconds: float) -> str:
+        parts = [f"app;dur={total_seconds * 1000:.1f}"]
+        for name, count, seconds in (
+            ("db", self.sql_count, self.sql_seconds),
+            ("redis", self.redis_count, self.redis_seconds),
+            ("http", self.http_count, self.http_seconds),
+        ):
+            if count:
+                parts.append(f'{name};dur={seconds * 1000:.1f};desc="{count}"')
+        return ", ".join(parts)
+
+
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def current_request_stats() -> Optional[RequestStats]:
+    return _request_stats.get()
+
+
+def instrument_engine(engine: AsyncEngine, name: str = "primary") -> None:
+    """Время и число SQL-выражений через события engine"""
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("metrics_started", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["metrics_started"].pop()
+        SQL_DURATION.observe(elapsed, name)
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.sql_count += 1
+            stats.sql_seconds += elapsed
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _error(context):
+        # Выражение упало: убираем его отметку времени
+        started = context.connection.info.get("metrics_started") if context.connection is not None else None
+        if started:
+            started.pop()
+
+
+def _observe_redis(command: str, commands: int, elapsed: float) -> None:
+    REDIS_DURATION.observe(elapsed, command)
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.redis_count += commands
+        stats.redis_seconds += elapsed
+
+
+def instrument_redis(client) -> None:
+    """
+    Время и число команд клиента redis.asyncio. Пайплайн - один round trip,
+    в счётчик запроса идут все его команды. Скрипты (EVALSHA) идут через
+    execute_command клиента и считаются как обычные команды.
+    """
+    execute_command = client.execute_command
+
+    @wraps(execute_command)
+    async def timed_execute_command(*args, **options):
+        started = time.perf_counter()
+        try:
+            return await execute_command(*args, **options)
+        finally:
+            _observe_redis(str(args[0]).upper(), 1, time.perf_counter() - started)
+
+    create_pipeline = client.pipeline
+
+    @wraps(create_pipeline)
+    def timed_pipeline(*args, **kwargs):
+        pipe = create_pipeline(*args, **kwargs)
+        execute = pipe.execute
+
+        @wraps(execute)
+        async def timed_execute(*execute_args, **execute_kwargs):
+            commands = len(pipe.command_stack)
+            started = time.perf_counter()
+            try:
+                return await execute(*execute_args, **execute_kwargs)
+            finally:
+                _observe_redis("PIPELINE", commands, time.perf_counter() - started)
+
+        pipe.execute = timed_execute
+        return pipe
+
+    client.execute_command = timed_execute_command
+    client.pipeline = timed_pipeline
+
+
+class InstrumentedTransport:
+    """
+    Обёртка транспорта httpx (AsyncHTTPTransport и т.п.), которая меряет
+    исходящие запросы, включая упавшие: AsyncClient(transport=InstrumentedTransport(...))
+    """
+
+    def __init__(self, transport):
+        self.transport = transport
+
+    async def handle_async_request(self, request):
+        started = time.perf_counter()
+        status = "error"
+        try:
+            response = await self.transport.handle_async_request(request)
+            status = str(response.status_code)
+            return response
+        finally:
+            elapsed = time.perf_counter() - started
+            OUTBOUND_DURATION.observe(elapsed, request.url.host, request.method, status)
+            stats = _request_stats.get()
+            if stats is not None:
+                stats.http_count += 1
+                stats.http_seconds += elapsed
+
+    async def __aenter__(self):
+        await self.transport.__aenter__()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.transport.__aexit__(*exc_info)
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware: латентность по шаблону маршрута и заголовок Server-Timing
+    с временем и числом обращений к базе, Redis и другим сервисам.
+    """
+
+    def __init__(self, app, exclude_paths: Iterable[str] = ("/metrics",)):
+        self.app = app
+        self.exclude_paths = set(exclude_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.exclude_paths:
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                # Для потоковых ответов - время до начала тела
+                MutableHeaders(scope=message).append(
+                    "Server-Timing", stats.server_timing(time.perf_counter() - started)
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _request_stats.reset(token)
+            route = scope.get("route")
+            # Шаблон пути, а не сам путь: id в URL не плодят серии
+            route_path = getattr(route, "path", "unmatched")
+            REQUEST_DURATION.observe(time.perf_counter() - started, scope["method"], route_path, str(status))
+            REQUEST_SQL_STATEMENTS.observe(stats.sql_count, route_path)
+            REQUEST_REDIS_COMMANDS.observe(stats.redis_count, route_path)
+            REQUEST_OUTBOUND_CALLS.observe(stats.http_count, route_path)
+
+
+def _pool_stats(database: Database) -> Dict[Labels, float]:
+    return {
+        (name, state): value
+        for name, pool in database.pool_stats().items()
+        for state, value in pool.items()
+    }
+
+
+def install_metrics(app: FastAPI, database: Optional[Database] = None, redis_clients: Sequence[Any] = ()) -> None:
+    """Подключает middleware, инструментирует базу и Redis сервиса и добавляет GET /metrics"""
+    if database is not None:
+        instrument_engine(database.engine, "primary")
+        for index, replica in enumerate(database.replicas):
+            instrument_engine(replica, f"replica_{index}")
+        register(CallbackMetric(
+            "db_pool_connections", "Connection pool usage", ("database", "state"),
+            lambda: _pool_stats(database),
+        ))
+    for client in redis_clients:
+        instrument_redis(client)
+
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
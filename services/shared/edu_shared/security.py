@@ -1,22 +1,74 @@
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
 from jose import JWTError, jwt
 from .config import fetch_settings
 
+logger = logging.getLogger(__name__)
+
+
+class VerifiedTokenCache:
+    """LRU уже проверенных токенов: sha256 токена -> (user_id, exp)"""
+
+    def __init__(self, size: int):
+        self.size = size
+        self._tokens: OrderedDict[str, Tuple[str, float]] = OrderedDict()
+
+    @staticmethod
+    def _key(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token: str) -> Optional[str]:
+        key = self._key(token)
+        entry = self._tokens.get(key)
+        if entry is None:
+            return None
+        user_id, expires_at = entry
+        if expires_at <= time.time():
+            del self._tokens[key]
+            return None
+        self._tokens.move_to_end(key)
+        return user_id
+
+    def put(self, token: str, user_id: str, expires_at: float) -> None:
+        key = self._key(token)
+        self._tokens[key] = (user_id, expires_at)
+        self._tokens.move_to_end(key)
+        while len(self._tokens) > self.size:
+            self._tokens.popitem(last=False)
+
+    def clear(self) -> None:
+        self._tokens.clear()
+
+
+_token_cache: Optional[VerifiedTokenCache] = None
+
 
 async def decode_and_validate_token(token: str) -> str:
+    global _token_cache
     try:
-        
         settings = await fetch_settings()
+        if _token_cache is None:
+            _token_cache = VerifiedTokenCache(settings.TOKEN_CACHE_SIZE)
+        
+        # Повторно присланный токен не проверяем заново до его exp
+        user_id = _token_cache.get(token)
+        if user_id is not None:
+            return user_id
         
         payload = jwt.decode(
             token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
         )
-        print("Payload:", payload)
-        print("Token:", token)
-        user_id: str | None = payload.get("sub")
-        print(user_id)
+        user_id = payload.get("sub")
         if user_id is None:
             raise JWTError("User ID ('sub') not found in token")
+        # Токены без exp не кэшируем: неизвестно, до какого момента им верить
+        if isinstance(payload.get("exp"), (int, float)):
+            _token_cache.put(token, user_id, payload["exp"])
         return user_id
     except Exception as e:
-        print("Error decoding token:", e)
-        raise ValueError(f"Token is invalid: {e}")
\ No newline at end of file
+        # Сам токен в лог не пишем
+        logger.debug("Rejected access token: %s", e)
+        raise ValueError(f"Token is invalid: {e}")
@@ -43,6 +43,9 @@ export default function DashboardPage() {
   } = useQuizStore();
 
   const [currentPage, setCurrentPage] = useState(1);
+  // cursors[i] - курсор страницы i + 1 (у первой страницы курсора нет)
+  const [cursors, setCursors] = useState<(string | null)[]>([null]);
+  const currentCursor = cursors[currentPage - 1] ?? null;
   const [searchQuery, setSearchQuery] = useState("");
   const [activeTab, setActiveTab] = useState<
     "my" | "available" | "leaderboard"
@@ -65,7 +68,7 @@ export default function DashboardPage() {
         const userId = token ? getUserIdFromToken(token) : null;
 
         if (userId) {
-          getUserQuizzes(userId, currentPage, 10);
+          getUserQuizzes(userId, currentCursor, 10);
         }
       } else if (activeTab === "available") {
         // Получаем user_id из токена для исключения квизов пользователя
@@ -76,7 +79,7 @@ export default function DashboardPage() {
         const userId = token ? getUserIdFromToken(token) : null;
 
         searchQuizzes({
-          page: currentPage,
+          cursor: currentCursor,
           size: 10,
           exclude_user_id: userId || undefined, // Исключаем квизы пользователя
         });
@@ -84,11 +87,22 @@ export default function DashboardPage() {
         // Leaderboard tab doesn't require specific user quizzes, just fetch all
         // For now, we'll fetch a small number of quizzes for the leaderboard
         // In a real app, you'd fetch all quizzes or a specific leaderboard set
-        searchQuizzes({ page: 1, size: 10 });
+        searchQuizzes({ size: 10 });
       }
     }
   }, [user?.email, activeTab, currentPage]);
 
+  const resetPagination = () => {
+    setCurrentPage(1);
+    setCursors([null]);
+  };
+
+  const handleNextPage = () => {
+    if (!pagination.next_cursor) return;
+    setCursors([...cursors.slice(0, currentPage), pagination.next_cursor]);
+    setCurrentPage(currentPage + 1);
+  };
+
   const handleLogout = () => {
     logout();
     router.push("/auth/login");
@@ -118,7 +132,7 @@ export default function DashboardPage() {
         const userId = token ? getUserIdFromToken(token) : null;
 
         if (userId) {
-          getUserQuizzes(userId, currentPage, 10);
+          getUserQuizzes(userId, currentCursor, 10);
         }
       }
     }
@@ -126,13 +140,13 @@ export default function DashboardPage() {
 
   const handleSearch = () => {
     if (activeTab === "available") {
-      searchQuizzes({ q: searchQuery, page: 1, size: 10 });
-      setCurrentPage(1);
+      searchQuizzes({ q: searchQuery, size: 10 });
+      resetPagination();
     }
   };
 
   const getQuestionCount = (quiz: any) => {
-    return quiz.questions?.length || 0;
+    return quiz.question_count ?? quiz.questions?.length ?? 0;
   };
 
   const formatDate = (dateString: string) => {
@@ -213,7 +227,10 @@ export default function DashboardPage() {
           <div className="border-b border-gray-200 dark:border-gray-700">
             <nav className="-mb-px flex space-x-8">
               <button
-                onClick={() => setActiveTab("my")}
+                onClick={() => {
+                  setActiveTab("my");
+                  resetPagination();
+                }}
                 className={`py-2 px-1 border-b-2 font-medium text-sm ${
                   activeTab === "my"
                     ? "border-blue-500 text-blue-600"
@@ -223,7 +240,10 @@ export default function DashboardPage() {
                 Мои квизы
               </button>
               <button
-                onClick={() => setActiveTab("available")}
+                onClick={() => {
+                  setActiveTab("available");
+                  resetPagination();
+                }}
                 className={`py-2 px-1 border-b-2 font-medium text-sm ${
                   activeTab === "available"
                     ? "border-blue-500 text-blue-600"
@@ -233,7 +253,10 @@ export default function DashboardPage() {
                 Доступные квизы
               </button>
               <button
-                onClick={() => setActiveTab("leaderboard")}
+                onClick={() => {
+                  setActiveTab("leaderboard");
+                  resetPagination();
+                }}
                 className={`py-2 px-1 border-b-2 font-medium text-sm ${
                   activeTab === "leaderboard"
                     ? "border-blue-500 text-blue-600"
@@ -345,11 +368,11 @@ export default function DashboardPage() {
                           <div className="flex flex-wrap gap-1">
                             {quiz.tags.slice(0, 3).map((tag) => (
                               <Badge
-                                key={tag.id}
+                                key={tag}
                                 variant="outline"
                                 className="text-xs px-2 py-1 bg-gray-50 text-gray-700 border-gray-200"
                               >
-                                {tag.name}
+                                {tag}
                               </Badge>
                             ))}
                             {quiz.tags.length > 3 && (
@@ -463,7 +486,7 @@ export default function DashboardPage() {
                   </span>
                   <Button
                     variant="outline"
-                    onClick={() => setCurrentPage(currentPage + 1)}
+                    onClick={handleNextPage}
                     disabled={!pagination.has_next || isLoading}
                   >
                     Вперед
@@ -38,6 +38,8 @@ export default function PlayQuizPage() {
   const [selectedAnswers, setSelectedAnswers] = useState<string[]>([]);
   const [textAnswer, setTextAnswer] = useState("");
   const [quizResult, setQuizResult] = useState<any>(null);
+  // Время начала прохождения, уходит на бэкенд как duration_ms
+  const [startedAt] = useState(() => Date.now());
 
   useEffect(() => {
     if (quizId) {
@@ -205,6 +207,7 @@ export default function PlayQuizPage() {
         const result = await quizApi.calculateResult(quizId, {
           quiz_id: quizId,
           answers: formattedAnswers,
+          duration_ms: Date.now() - startedAt,
         });
         setQuizResult(result);
         setShowResults(true);
@@ -262,9 +262,14 @@ export const quizApi = {
     return response.json();
   },
 
-  async getUserQuizzes(userId: string, page = 1, size = 10) {
+  async getUserQuizzes(userId: string, cursor: string | null = null, size = 10) {
+    const searchParams = new URLSearchParams({ size: size.toString() });
+    if (cursor) {
+      searchParams.append("cursor", cursor);
+    }
+
     const response = await quizApiClient.get(
-      `/api/quiz/user/${userId}?page=${page}&size=${size}`
+      `/api/quiz/user/${userId}?${searchParams.toString()}`
     );
     return response.json();
   },
@@ -315,7 +320,29 @@ export const quizApi = {
       "/api/quiz/generate-with-ai",
       generationData
     );
-    return response.json();
+    let job = await response.json();
+    if (!response.ok) {
+      throw new Error(job.detail || "Не удалось запустить генерацию квиза");
+    }
+
+    // Квиз генерируется в фоне: опрашиваем задание, пока он не будет сохранен
+    while (job.status === "queued" || job.status === "running") {
+      await new Promise((resolve) => setTimeout(resolve, 1000));
+      const statusResponse = await quizApiClient.get(
+        `/api/quiz/generate-with-ai/${job.job_id}`
+      );
+      job = await statusResponse.json();
+      if (!statusResponse.ok) {
+        throw new Error(job.detail || "Задание генерации не найдено");
+      }
+    }
+
+    if (job.status === "failed") {
+      throw new Error(job.error || "Ошибка генерации квиза");
+    }
+
+    const quizResponse = await quizApiClient.get(`/api/quiz/${job.quiz_id}`);
+    return quizResponse.json();
   },
 
   // Leaderboard methods
@@ -35,6 +35,7 @@ interface Quiz {
   questions: Question[];
 }
 
+// Карточка квиза в списках (view=summary): агрегаты считает бэкенд
 interface QuizList {
   id: string;
   title: string;
@@ -43,15 +44,16 @@ interface QuizList {
   user_id: string;
   created_at: string;
   updated_at: string;
-  tags: Tag[];
-  questions: Question[];
+  tags: string[];
+  question_count: number;
+  total_points: number;
 }
 
 interface PaginatedResponse {
   items: QuizList[];
-  total: number;
+  total: number | null;
   limit: number;
-  offset: number;
+  next_cursor: string | null;
   has_next: boolean;
   has_prev: boolean;
 }
@@ -62,7 +64,8 @@ interface QuizState {
   isLoading: boolean;
   error: string | null;
   pagination: {
-    total: number;
+    total: number | null;
+    next_cursor: string | null;
     has_next: boolean;
     has_prev: boolean;
   };
@@ -72,7 +75,7 @@ interface QuizActions {
   // Получение квизов
   getUserQuizzes: (
     userId: string,
-    page?: number,
+    cursor?: string | null,
     size?: number
   ) => Promise<void>;
   getQuiz: (quizId: string) => Promise<void>;
@@ -84,7 +87,7 @@ interface QuizActions {
     is_ai_generated?: boolean;
     sort_by?: string;
     sort_order?: string;
-    page?: number;
+    cursor?: string | null;
     size?: number;
   }) => Promise<void>;
 
@@ -151,23 +154,25 @@ export const useQuizStore = create<QuizStore>()(
       isLoading: false,
       error: null,
       pagination: {
-        total: 0,
+        total: null,
+        next_cursor: null,
         has_next: false,
         has_prev: false,
       },
 
       // Actions
-      getUserQuizzes: async (userId: string, page = 1, size = 10) => {
+      getUserQuizzes: async (userId: string, cursor = null, size = 10) => {
         set({ isLoading: true, error: null });
 
         try {
           // Используем user_id для получения квизов пользователя
-          const response = await quizApi.getUserQuizzes(userId, page, size);
+          const response = await quizApi.getUserQuizzes(userId, cursor, size);
 
           set({
             quizzes: response.items,
             pagination: {
               total: response.total,
+              next_cursor: response.next_cursor,
               has_next: response.has_next,
               has_prev: response.has_prev,
             },
@@ -211,6 +216,7 @@ export const useQuizStore = create<QuizStore>()(
             quizzes: response.items,
             pagination: {
               total: response.total,
+              next_cursor: response.next_cursor,
               has_next: response.has_next,
               has_prev: response.has_prev,
             },